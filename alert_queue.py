@@ -0,0 +1,289 @@
+"""
+Durable outbound alert queue backed by SQLite in WAL mode.
+
+enqueue() appends the alert to the insert-only `alerts` table and returns
+its id in a few milliseconds; background worker threads claim due rows from
+`deliveries` in batches, call the channel handler and record the outcome.
+Failures are retried with exponential backoff up to max_attempts. A worker
+that dies mid-send leaves its rows leased, and they become due again once the
+lease expires, so alerts survive reruns and process restarts. Re-enqueueing
+with the same idempotency key returns the existing alert instead of sending
+twice.
+
+Every claim writes a fresh token on the row. A worker renews the lease right
+before it sends a row and records the outcome only while the token is still
+its own, so a row whose lease ran out and was claimed by another worker is
+neither sent again by the first worker nor overwritten by it.
+
+The rows of one claimed batch (e.g. the email and WhatsApp rows of the same
+alert) are sent in parallel through notify.dispatch_alert. There is one send thread per row a worker can
+claim, so no row waits for a thread. Handlers are called with the payload's
+keys plus timeout=send_timeout and must bound their own I/O by it. A row is
+retried only after its handler has returned. While a handler is still
+running, the worker keeps renewing that row's lease, so no other worker
+claims it and sends it a second time.
+"""
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+from notify import dispatch_alert
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    channel TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deliveries (
+    alert_id INTEGER PRIMARY KEY REFERENCES alerts(id),
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    updated_at REAL NOT NULL,
+    claim_token TEXT
+);
+CREATE INDEX IF NOT EXISTS deliveries_due ON deliveries (status, next_attempt_at);
+"""
+
+PENDING, SENDING, SENT, FAILED = "pending", "sending", "sent", "failed"
+FINAL = (SENT, FAILED)
+
+
+def idempotency_key(channel, payload, scope=None):
+    """Stable key for (channel, payload); scope narrows it, e.g. to a session or time bucket."""
+    blob = json.dumps([channel, payload, scope], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class AlertQueue:
+    def __init__(self, path="alerts.sqlite3", handlers=None, workers=4, batch_size=32,
+                 max_attempts=6, base_delay=1.0, max_delay=300.0, lease=60.0, send_timeout=30.0, poll_interval=0.25):
+        self.path = path
+        self.handlers = dict(handlers or {})
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease = lease
+        self.send_timeout = send_timeout  # passed to handlers as timeout=
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._executor = None
+        db = self._db()
+        db.executescript(SCHEMA)
+        columns = {row[1] for row in db.execute("PRAGMA table_info(deliveries)")}
+        if "claim_token" not in columns:  # queues created before claim tokens
+            db.execute("ALTER TABLE deliveries ADD COLUMN claim_token TEXT")
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def enqueue(self, channel, payload, key=None):
+        """Persist an alert for channel and return its id (existing id if key was seen before)."""
+        return self.enqueue_many([(channel, payload, key)])[0]
+
+    def enqueue_many(self, alerts):
+        """enqueue() for each (channel, payload, key) in one transaction; returns the ids in order."""
+        alerts = list(alerts)
+        for channel, _, _ in alerts:
+            if channel not in self.handlers:
+                raise ValueError(f"No handler registered for channel {channel!r}")
+        now = time.time()
+        ids = []
+        with self._transaction() as db:
+            for channel, payload, key in alerts:
+                key = key or idempotency_key(channel, payload)
+                db.execute(
+                    "INSERT OR IGNORE INTO alerts (idempotency_key, channel, payload, created_at) VALUES (?, ?, ?, ?)",
+                    (key, channel, json.dumps(payload, ensure_ascii=False), now),
+                )
+                alert_id = db.execute("SELECT id FROM alerts WHERE idempotency_key = ?", (key,)).fetchone()[0]
+                db.execute(
+                    "INSERT OR IGNORE INTO deliveries (alert_id, status, next_attempt_at, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (alert_id, PENDING, now, now),
+                )
+                ids.append(alert_id)
+        self._wake.set()
+        return ids
+
+    def status(self, alert_ids):
+        """Return {alert_id: (status, attempts, last_error)}."""
+        alert_ids = list(alert_ids)
+        result = {}
+        for i in range(0, len(alert_ids), 500):  # stay under SQLite's bound-parameter limit
+            chunk = alert_ids[i:i + 500]
+            rows = self._db().execute(
+                f"SELECT alert_id, status, attempts, last_error FROM deliveries "
+                f"WHERE alert_id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            result.update((row[0], row[1:]) for row in rows)
+        return result
+
+    def group_status(self, key_prefix):
+        """
+        {channel: {status: count}} over the alerts whose idempotency key starts with
+        key_prefix + ":", e.g. every row of one contact fan-out.
+        """
+        # A range on the unique key's index; ";" is the character after ":"
+        rows = self._db().execute(
+            "SELECT a.channel, d.status, COUNT(*) FROM alerts a JOIN deliveries d ON d.alert_id = a.id "
+            "WHERE a.idempotency_key >= ? AND a.idempotency_key < ? GROUP BY a.channel, d.status",
+            (key_prefix + ":", key_prefix + ";"),
+        )
+        result = {}
+        for channel, status, count in rows:
+            result.setdefault(channel, {})[status] = count
+        return result
+
+    def watch(self, alert_ids, timeout=15.0, interval=0.05):
+        """Yield (alert_id, status, attempts, last_error) as each alert reaches sent/failed."""
+        waiting = set(alert_ids)
+        deadline = time.monotonic() + timeout
+        while waiting and time.monotonic() < deadline:
+            for alert_id, (status, attempts, error) in self.status(waiting).items():
+                if status in FINAL:
+                    waiting.discard(alert_id)
+                    yield alert_id, status, attempts, error
+            if waiting:
+                time.sleep(interval)
+
+    def start(self):
+        if not self._threads:
+            self._stop.clear()
+            # A thread for every row the workers can hold at once
+            self._executor = ThreadPoolExecutor(max_workers=self.workers * self.batch_size,
+                                                thread_name_prefix="alert-send")
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"alert-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _claim(self):
+        """Lease up to batch_size due rows under a new token; returns (token, rows)."""
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT d.alert_id, d.attempts, a.channel, a.payload FROM deliveries d "
+                "JOIN alerts a ON a.id = d.alert_id "
+                "WHERE d.status IN (?, ?) AND d.next_attempt_at <= ? "
+                "ORDER BY d.next_attempt_at LIMIT ?",
+                (PENDING, SENDING, now, self.batch_size),
+            ).fetchall()
+            db.executemany(
+                "UPDATE deliveries SET status = ?, attempts = attempts + 1, next_attempt_at = ?, updated_at = ?, "
+                "claim_token = ? WHERE alert_id = ?",
+                [(SENDING, now + self.lease, now, token, row[0]) for row in rows],
+            )
+        return token, [(alert_id, attempts + 1, channel, json.loads(payload))
+                       for alert_id, attempts, channel, payload in rows]
+
+    def _renew(self, alert_id, token):
+        """Extend the lease on a row being sent; False if another worker has claimed it since."""
+        now = time.time()
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE deliveries SET next_attempt_at = ?, updated_at = ? "
+                "WHERE alert_id = ? AND claim_token = ? AND status = ?",
+                (now + self.lease, now, alert_id, token, SENDING),
+            )
+        return cursor.rowcount == 1
+
+    def _finish(self, alert_id, token, attempt, error):
+        """Record the outcome of one send, unless the row's claim has moved on."""
+        now = time.time()
+        if error is None:
+            update = (SENT, now, None)
+        elif attempt >= self.max_attempts:
+            update = (FAILED, now, error)
+        else:
+            delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+            update = (PENDING, now + delay * random.uniform(0.8, 1.2), error)
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE deliveries SET status = ?, next_attempt_at = ?, last_error = ?, updated_at = ?, "
+                "claim_token = NULL WHERE alert_id = ? AND claim_token = ?",
+                update + (now, alert_id, token),
+            )
+
+    def _send(self, alert_id, token, channel, payload):
+        if not self._renew(alert_id, token):
+            return False  # claimed elsewhere; the outcome is not ours to record
+        return self.handlers[channel](**payload, timeout=self.send_timeout)
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                token, batch = self._claim()
+                if not batch:
+                    self._wake.wait(self.poll_interval)
+                    self._wake.clear()
+                    continue
+                rows = {alert_id: (attempt, channel) for alert_id, attempt, channel, _ in batch}
+                sends = {alert_id: partial(self._send, alert_id, token, channel, payload)
+                         for alert_id, _, channel, payload in batch}
+
+                def renew(alert_ids):
+                    # Slow sends keep their rows; only a dead worker's rows expire
+                    for alert_id in alert_ids:
+                        self._renew(alert_id, token)
+
+                for result in dispatch_alert(sends, deadline=None, executor=self._executor,
+                                             keepalive=renew, keepalive_interval=self.lease / 3):
+                    attempt, channel = rows[result.channel]
+                    if result.ok:
+                        error = None
+                    elif result.error is None:
+                        error = f"{channel} handler reported failure"
+                    else:
+                        error = f"{type(result.error).__name__}: {result.error}"
+                    self._finish(result.channel, token, attempt, error)
+            except Exception as e:
+                # e.g. database locked past the busy timeout; keep the worker alive
+                print(f"Alert queue worker error: {type(e).__name__}: {e}")
+                self._stop.wait(self.poll_interval)
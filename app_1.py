@@ -1,25 +1,14 @@
 import streamlit as st # type: ignore
-from utils import load_emergency_model, detect_emergency, get_current_location, send_whatsapp, send_email, find_nearby
+from utils import (get_model_registry, get_cascade, get_current_location, get_alert_queue, find_nearby, find_within,
+                   whatsapp_recipients, get_contact_directory, notify_contacts, CONTACTS_RADIUS_KM)
 import os
-import speech_recognition as sr 
-import pyttsx3 
-import math
-import folium # type: ignore
-from streamlit_folium import st_folium # type: ignore
-# --- Haversine function ---
-def haversine(lat1, lon1, lat2, lon2):
-    """
-    Calculate the distance in kilometers between two latitude/longitude points using the Haversine formula.
-    """
-    R = 6371  # Earth radius in kilometers
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
-
-    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-    return round(R * c, 2)
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from alert_queue import idempotency_key
+# speech_recognition and folium are imported where they are used, so sessions
+# that never touch the microphone or the map don't pay for them at startup.
+_rerun_started = time.perf_counter()
 
 # ----- Streamlit Page Configuration -----
 st.set_page_config(
@@ -278,15 +267,35 @@ st.markdown("""
 st.markdown("<p style='text-align: center; color: #c9d1d9; font-size: 1.1em;'>Your immediate assistant in critical situations. Describe your emergency below.</p>", unsafe_allow_html=True)
 st.markdown("---") # A stylish horizontal rule
 
-# ----- Load Model Once (cached for performance) -----
-@st.cache_resource
-def cached_load_emergency_model():
-    st.spinner("Loading AI Model...") # Show a spinner while loading
-    model, vectorizer = load_emergency_model()
+# ----- Rerun timing -----
+if "rerun_log" not in st.session_state:
+    st.session_state.rerun_log = []
+
+def record_timing(section, ms):
+    log = st.session_state.rerun_log
+    log.append((time.strftime("%H:%M:%S"), section, ms))
+    del log[:-50]
+
+@contextmanager
+def timed(section):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(section, (time.perf_counter() - start) * 1000)
+
+# ----- Load Model (shared by all sessions, reloaded when retrained) -----
+# The registry is created once per process and swaps in a retrained model in the
+# background, so a new emergency_model.bundle is live without a restart.
+if "model_loaded" not in st.session_state:
+    with st.spinner("Loading AI Model..."):
+        get_model_registry()
     st.success("✅ AI Model Loaded Successfully!")
-    return model, vectorizer
+    st.session_state.model_loaded = True
 
-model, vectorizer = cached_load_emergency_model()
+# Delivery workers run from app load, so alerts left pending by a restart go out
+# without waiting for a new one to be raised.
+get_alert_queue()
 
 # ----- Emergency Guide Data -----
 EMERGENCY_GUIDE = {
@@ -360,6 +369,259 @@ EMERGENCY_GUIDE = {
         ]
     },
 }
+# The keyword rules report "accident"/"violence"; the model has no such classes
+# and reports violent incidents as "police", which gets the violence guide.
+MODEL_CLASS_GUIDES = {"police": "violence"}
+
+def guide_for(category):
+    return EMERGENCY_GUIDE.get(category) or EMERGENCY_GUIDE.get(MODEL_CLASS_GUIDES.get(category))
+
+# ----- Per-session memoization -----
+def classify_input(text):
+    """Classify each distinct input once per model version; reruns and other tabs reuse the stored result."""
+    version = get_model_registry().current()
+    cached = st.session_state.get("classification")
+    if cached and cached[:2] == (text, version.fingerprint):
+        return cached[2]
+    with timed("classify"):
+        # Obvious cases are settled by keyword rules; the rest go through the shared
+        # micro-batcher, so sessions classifying at the same moment share one model call
+        category = get_cascade()(text)[0]
+    st.session_state.classification = (text, version.fingerprint, category)
+    return category
+
+def get_cached_location():
+    """Locate the visitor (not the server) once per session."""
+    if st.session_state.get("location") is None:
+        with timed("locate"):
+            forwarded = st.context.headers.get("X-Forwarded-For", "")
+            client_ip = forwarded.split(",")[0].strip() or None
+            st.session_state.location = get_current_location(client_ip)
+    return st.session_state.location
+
+# ----- Fragments -----
+# Each panel below reruns on its own when its widgets are used, so pressing a
+# button in one tab doesn't re-run classification, re-fetch the location,
+# rebuild the map or resend the page CSS.
+
+@st.fragment
+def mic_panel():
+    st.markdown("<br>", unsafe_allow_html=True) # Adds a little space above the button
+    if st.button("🎤 Use Microphone", key="mic_button", use_container_width=True):
+        st.info("🎙️ Listening... Please speak clearly after the beep.")
+        from audio_input import listen_streaming
+        provisional_box = st.empty()
+
+        # Fires while the user is still speaking, as soon as a keyword is heard
+        def show_provisional(hit):
+            provisional_box.warning(f"⚡ Heard \"{hit.keyword}\" — possible **{hit.category.upper()}** emergency. Still listening...")
+
+        try:
+            with timed("microphone"):
+                result = listen_streaming(classify_input, show_provisional)
+            if not result.text:
+                st.warning("⏱️ Listening timed out or speech was not understood. Please try again or type your message.")
+            else:
+                st.session_state.text_input = result.text
+                st.chat_message("user").write(f"🗣️ You said: *\"{result.text}\"*")
+                st.rerun() # Full rerun to update the text_area and trigger detection
+        except Exception as e:
+            st.error(f"An unexpected error occurred with microphone input: {e}")
+
+MAP_OVERLAY_RADIUS_KM = 25
+MAP_OVERLAY_TYPES = (("hospital", "Hospitals", "red", "plus"), ("police", "Police stations", "blue", "star"), ("fire_station", "Fire stations", "orange", "fire"))
+
+def map_overlays(lat, lon):
+    """
+    Per-session facility overlays; each only rebuilds when new facilities come into range.
+    They start over when the (rounded) location changes, so facilities near the old spot don't linger.
+    """
+    from map_layer import MapOverlay, view_key
+    if "map_overlays" not in st.session_state:
+        st.session_state.map_overlays = {
+            place_type: MapOverlay(name, color=color, icon=icon)
+            for place_type, name, color, icon in MAP_OVERLAY_TYPES
+        }
+    overlays = st.session_state.map_overlays
+    position = view_key(lat, lon, 0)[:2]
+    if st.session_state.get("map_overlays_position") != position:
+        for overlay in overlays.values():
+            overlay.clear()
+        st.session_state.map_overlays_position = position
+    for place_type, overlay in overlays.items():
+        overlay.add(find_within(lat, lon, place_type, radius_km=MAP_OVERLAY_RADIUS_KM))
+    return [o for o in overlays.values() if len(o)]
+
+@st.fragment
+def location_panel():
+    lat, lon, city = get_cached_location()
+
+    # --- Centering the map and location info ---
+    col_left, col_center, col_right = st.columns([1, 4, 1])
+
+    with col_center:
+        if lat and lon:
+            st.success(f"📌 Location Found: **{city}** (Lat: {lat:.4f}, Lon: {lon:.4f})")
+            with timed("map"):
+                from streamlit_folium import st_folium # type: ignore
+                from map_layer import base_map
+                # The base map is kept per session and rounded position; only the
+                # overlays are sent again when they change.
+                if "base_maps" not in st.session_state:
+                    st.session_state.base_maps = OrderedDict()
+                location_map = base_map(st.session_state.base_maps, lat, lon, zoom=15, label=city)
+                overlays = map_overlays(lat, lon)
+                st_folium(
+                    location_map,
+                    width=800,
+                    height=500,
+                    key="current_location_map",
+                    feature_group_to_add=[o.feature_group() for o in overlays],
+                    returned_objects=[], # panning/zooming shouldn't trigger a rerun
+                )
+                st.caption(" · ".join(f"{o.name}: {len(o)}" for o in overlays))
+
+            map_link = f"https://www.openstreetmap.org/?mlat={lat}&mlon={lon}#map=18/{lat}/{lon}"
+            st.markdown(f"🔗 [View and Share Location on OpenStreetMap]({map_link})", unsafe_allow_html=True)
+        else:
+            st.error("❌ Could not retrieve current location. Please ensure location services are enabled or try again.")
+            if st.button("🔄 Retry Location", key="retry_location_button"):
+                st.session_state.location = None
+                st.rerun()
+
+def show_places(places, icon, fallback_name):
+    with st.container(border=True):
+        for i, place in enumerate(places[:5]):
+            name = place.get('display_name', fallback_name).split(',')[0]
+            phone = place.get('contact:phone', 'N/A')
+            st.markdown(f"**{i+1}. {icon} {name}**")
+            st.markdown(f"    📞 Phone: `{phone}`")
+            st.markdown(f"    📏 Distance: `{place['distance_km']} km`")
+            if place.get('address'):
+                st.markdown(f"    📍 Address: _{place['address']}_")
+            st.markdown("---")
+
+@st.fragment
+def nearby_panel():
+    lat, lon, city = get_cached_location()
+    col_hosp, col_police = st.columns(2)
+
+    with col_hosp:
+        if st.button("🏥 Show Nearby Hospitals", key="hospitals_button", use_container_width=True):
+            if lat and lon:
+                with st.spinner("Searching for hospitals..."), timed("nearby hospitals"):
+                    hospitals = find_nearby(lat, lon, place_type="hospital")
+                st.markdown("### Nearby Hospitals:")
+                if hospitals:
+                    show_places(hospitals, "🏥", "Unknown Hospital")
+                else:
+                    st.info("No hospitals found nearby. Try again or check your location.")
+            else:
+                st.warning("Please enable location services to find nearby places.")
+
+    with col_police:
+        if st.button("🚓 Show Nearby Police Stations", key="police_button", use_container_width=True):
+            if lat and lon:
+                with st.spinner("Searching for police stations..."), timed("nearby police"):
+                    stations = find_nearby(lat, lon, place_type="police")
+                st.markdown("### Nearby Police Stations:")
+                if stations:
+                    show_places(stations, "🚓", "Unknown Police Station")
+                else:
+                    st.info("No police stations found nearby. Try again or check your location.")
+            else:
+                st.warning("Please enable location services to find nearby places.")
+
+def alert_message(category, text, lat, lon, city):
+    maps_link = f"https://www.google.com/maps/search/?api=1&query={lat},{lon}"
+    return (
+        f"🚨 EMERGENCY ALERT 🚨\n\n"
+        f"**Type:** {category.upper()}\n"
+        f"**Location:** {city}\n"
+        f"**Coordinates:** {lat:.4f}, {lon:.4f}\n"
+        f"**Google Maps:** {maps_link}\n\n"
+        f"_{text}_\n"
+        f"Please check on me!"
+    )
+
+@st.fragment
+def notify_panel(current_category, text):
+    lat, lon, city = get_cached_location()
+
+    if st.button("📱 Send Emergency Notification", key="send_notify_button", use_container_width=True):
+        if not lat or not lon:
+            st.error("Cannot send notifications without a valid location. Please ensure location services are active.")
+        else:
+            with st.spinner("Composing and sending notifications..."), timed("notify"):
+                msg = alert_message(current_category, text, lat, lon, city)
+
+                st.markdown("---")
+                # Alerts are persisted first and delivered by background workers with
+                # retries, so a rerun or restart can't lose them. Identical alerts
+                # within the same minute are deduplicated rather than sent twice.
+                alert_queue = get_alert_queue()
+                minute = int(time.time() // 60)
+                # One row per WhatsApp number, so a retry only resends to the numbers that failed
+                payloads = [("email", {"subject": f"URGENT: EMERGENCY ALERT - {current_category.upper()}", "body": msg})]
+                numbers = whatsapp_recipients()
+                payloads += [("whatsapp", {"message": msg, "to": number}) for number in numbers]
+                if not numbers:
+                    st.warning("⚠️ WhatsApp not sent: no recipients. Set `WHATSAPP_TO` in `.env`.")
+                alert_ids = {
+                    alert_queue.enqueue(channel, payload, key=idempotency_key(channel, payload, minute)): channel
+                    for channel, payload in payloads
+                }
+                st.session_state.pending_alerts = alert_ids
+                st.write("Alert queued. Delivering Email and WhatsApp in the background...")
+            st.balloons()
+
+    if get_contact_directory().contacts and st.button(
+        f"📣 Alert registered contacts within {CONTACTS_RADIUS_KM:g} km", key="notify_contacts_button", use_container_width=True
+    ):
+        if not lat or not lon:
+            st.error("Cannot alert nearby contacts without a valid location.")
+        else:
+            subject = f"URGENT: EMERGENCY ALERT - {current_category.upper()}"
+            msg = alert_message(current_category, text, lat, lon, city)
+            with timed("notify_contacts"):
+                # Queued for the background workers; a second click in the same minute
+                # maps to the same rows instead of alerting everyone again.
+                key = idempotency_key("contacts", [subject, msg], int(time.time() // 60))
+                _, alerts = notify_contacts(subject, msg, lat, lon, CONTACTS_RADIUS_KM, key=key)
+            if not any(alerts.values()):
+                st.info("No registered contacts inside the area.")
+            else:
+                st.session_state.pending_contact_alert = key
+
+
+ALERT_CHANNEL_NAMES = {"email": "Email", "whatsapp": "WhatsApp"}
+
+
+@st.fragment(run_every=1)
+def alert_status_panel():
+    # One cheap status read per second instead of blocking the rerun until delivery
+    contact_alert = st.session_state.get("pending_contact_alert")
+    if contact_alert:
+        for channel, counts in get_alert_queue().group_status(contact_alert).items():
+            total, sent, failed = sum(counts.values()), counts.get("sent", 0), counts.get("failed", 0)
+            done = (sent + failed) / total
+            name = ALERT_CHANNEL_NAMES[channel]
+            st.progress(done, text=f"📣 Registered contacts, {name}: {sent}/{total} deliveries sent, {failed} failed")
+    alert_ids = st.session_state.get("pending_alerts")
+    if not alert_ids:
+        return
+    for alert_id, (status, attempts, error) in get_alert_queue().status(alert_ids).items():
+        channel = alert_ids[alert_id]
+        if status == "sent":
+            st.success(f"✅ {ALERT_CHANNEL_NAMES[channel]} sent.")
+        elif status == "failed" and channel == "email":
+            st.error("❌ Email failed. Check `EMAIL_SENDER`, `EMAIL_RECEIVER`, `GMAIL_APP_PASSWORD` in `.env`.")
+        elif status == "failed":
+            st.warning("⚠️ WhatsApp failed. Check `TWILIO_SID`, `TWILIO_AUTH`, `TWILIO_WHATSAPP_FROM` in `.env` and recipient number.")
+        elif attempts > 1:
+            st.info(f"⏳ {ALERT_CHANNEL_NAMES[channel]} is being retried in the background (attempt {attempts}).")
+        else:
+            st.info(f"⏳ Sending {ALERT_CHANNEL_NAMES[channel]}...")
 
 # ----- Tabs Layout -----
 tab1, tab2, tab3 = st.tabs(["🆘 Emergency Input", "📍 Location & Nearby Help", "📤 Notify Contacts"])
@@ -382,27 +644,7 @@ with tab1:
         )
 
     with col_mic:
-        st.markdown("<br>", unsafe_allow_html=True) # Adds a little space above the button
-        if st.button("🎤 Use Microphone", key="mic_button", use_container_width=True):
-            st.info("🎙️ Listening... Please speak clearly after the beep.")
-            recognizer = sr.Recognizer()
-            with sr.Microphone() as source:
-                try:
-                    recognizer.adjust_for_ambient_noise(source, duration=0.5) 
-                    audio = recognizer.listen(source, timeout=7, phrase_time_limit=15)
-                    st.success("✅ Audio captured. Processing speech...")
-                    recognized_text = recognizer.recognize_google(audio)
-                    st.session_state.text_input = recognized_text
-                    st.chat_message("user").write(f"🗣️ You said: *\"{recognized_text}\"*")
-                    st.rerun() # Rerun to update the text_area and trigger detection
-                except sr.WaitTimeoutError:
-                    st.warning("⏱️ Listening timed out. No speech detected. Please try again.")
-                except sr.UnknownValueError:
-                    st.warning("🛑 Could not understand audio. Please speak more clearly or try typing.")
-                except sr.RequestError as e:
-                    st.error(f"❌ Could not request results from Google Speech Recognition service; {e}. Check your internet connection.")
-                except Exception as e:
-                    st.error(f"An unexpected error occurred with microphone input: {e}")
+        mic_panel()
 
     # --- Emergency Detection & Guide Display ---
     st.markdown("---") # Separator
@@ -410,10 +652,11 @@ with tab1:
     category = None
     if st.session_state.text_input:
         with st.spinner("Analyzing emergency type..."):
-            category = detect_emergency(st.session_state.text_input, model, vectorizer)
+            category = classify_input(st.session_state.text_input)
         st.success(f"🚨 **Emergency Type Detected:** `{category.upper()}`")
 
-        if category in EMERGENCY_GUIDE:
+        guide = guide_for(category)
+        if guide:
             # Assign an ID to the expander for scrolling
             st.markdown('<div id="emergency-guide-section"></div>', unsafe_allow_html=True) # Anchor for scrolling
             with st.expander(f"📚 Emergency Guide for {category.upper()} Situations", expanded=True):
@@ -421,7 +664,7 @@ with tab1:
 
                 # Construct HTML for each guide section and render it
                 with col_prec:
-                    precautions_list_html = ''.join([f"<li>{p}</li>" for p in EMERGENCY_GUIDE[category]["Precautions"]])
+                    precautions_list_html = ''.join([f"<li>{p}</li>" for p in guide["Precautions"]])
                     st.markdown(f"""
                     <div class='guide-section'>
                         <h3>⚠️ Precautions</h3>
@@ -432,7 +675,7 @@ with tab1:
                     """, unsafe_allow_html=True)
                 
                 with col_do:
-                    dos_list_html = ''.join([f"<li>{d}</li>" for d in EMERGENCY_GUIDE[category]["Do's"]])
+                    dos_list_html = ''.join([f"<li>{d}</li>" for d in guide["Do's"]])
                     st.markdown(f"""
                     <div class='guide-section'>
                         <h3>✅ Do's</h3>
@@ -443,7 +686,7 @@ with tab1:
                     """, unsafe_allow_html=True)
                 
                 with col_dont:
-                    donts_list_html = ''.join([f"<li>{n}</li>" for n in EMERGENCY_GUIDE[category]["Don'ts"]])
+                    donts_list_html = ''.join([f"<li>{n}</li>" for n in guide["Don'ts"]])
                     st.markdown(f"""
                     <div class='guide-section'>
                         <h3>❌ Don'ts</h3>
@@ -475,129 +718,42 @@ with tab1:
 # --- Tab 2: Location & Nearby Help ---
 with tab2:
     st.subheader("📍 Your Current Location")
-    st.info("Fetching your location... This might take a moment.")
-    
-    @st.cache_data(ttl=300) # Cache for 5 minutes
-    def get_cached_location():
-        return get_current_location()
-
-    lat, lon, city = get_cached_location()
-
-    # --- Centering the map and location info ---
-    col_left, col_center, col_right = st.columns([1, 4, 1])
-
-    with col_center:
-        if lat and lon:
-            st.success(f"📌 Location Found: **{city}** (Lat: {lat:.4f}, Lon: {lon:.4f})")
-            location_map = folium.Map(location=[lat, lon], zoom_start=15)
-            folium.Marker([lat, lon], tooltip="You are here", popup=city).add_to(location_map)
-            
-            st_data = st_folium(location_map, width=800, height=500, key="current_location_map")
-            
-            map_link = f"https://www.openstreetmap.org/?mlat={lat}&mlon={lon}#map=18/{lat}/{lon}"
-            st.markdown(f"🔗 [View and Share Location on OpenStreetMap]({map_link})", unsafe_allow_html=True)
-        else:
-            st.error("❌ Could not retrieve current location. Please ensure location services are enabled or try again.")
+    location_panel()
 
     st.markdown("---") # Separator
 
     st.subheader("🔍 Find Nearby Emergency Services")
-    col_hosp, col_police = st.columns(2)
-
-    with col_hosp:
-        if st.button("🏥 Show Nearby Hospitals", key="hospitals_button", use_container_width=True):
-            if lat and lon:
-                with st.spinner("Searching for hospitals..."):
-                    hospitals = find_nearby(lat, lon, place_type="hospital")
-                st.markdown("### Nearby Hospitals:")
-                if hospitals:
-                    with st.container(border=True):
-                        for i, h in enumerate(hospitals[:5]):
-                            name = h.get('display_name', 'Unknown Hospital').split(',')[0]
-                            phone = h.get('contact:phone', 'N/A')
-                            lat2 = float(h.get('lat', 0))
-                            lon2 = float(h.get('lon', 0))
-                            dist = haversine(lat, lon, lat2, lon2)
-                            st.markdown(f"**{i+1}. 🏥 {name}**")
-                            st.markdown(f"    📞 Phone: `{phone}`")
-                            st.markdown(f"    📏 Distance: `{dist} km`")
-                            if h.get('address'):
-                                st.markdown(f"    📍 Address: _{h['address'].get('street')}, {h['address'].get('city')}_")
-                            st.markdown("---")
-                else:
-                    st.info("No hospitals found nearby. Try again or check your location.")
-            else:
-                st.warning("Please enable location services to find nearby places.")
-
-    with col_police:
-        if st.button("🚓 Show Nearby Police Stations", key="police_button", use_container_width=True):
-            if lat and lon:
-                with st.spinner("Searching for police stations..."):
-                    stations = find_nearby(lat, lon, place_type="police")
-                st.markdown("### Nearby Police Stations:")
-                if stations:
-                    with st.container(border=True):
-                        for i, p in enumerate(stations[:5]):
-                            name = p.get('display_name', 'Unknown Police Station').split(',')[0]
-                            phone = p.get('contact:phone', 'N/A')
-                            lat2 = float(p.get('lat', 0))
-                            lon2 = float(p.get('lon', 0))
-                            dist = haversine(lat, lon, lat2, lon2)
-                            st.markdown(f"**{i+1}. 🚓 {name}**")
-                            st.markdown(f"    📞 Phone: `{phone}`")
-                            st.markdown(f"    📏 Distance: `{dist} km`")
-                            if p.get('address'):
-                                st.markdown(f"    📍 Address: _{p['address'].get('street')}, {p['address'].get('city')}_")
-                            st.markdown("---")
-                else:
-                    st.info("No police stations found nearby. Try again or check your location.")
-            else:
-                st.warning("Please enable location services to find nearby places.")
+    nearby_panel()
 
 # --- Tab 3: Notify Contacts & Help ---
 with tab3:
     st.subheader("📤 Notify Your Emergency Contacts")
     st.info("This section allows you to send an emergency alert to your pre-configured contacts via Email and WhatsApp.")
 
-    current_category = detect_emergency(st.session_state.text_input, model, vectorizer) if st.session_state.text_input else None
-    
     if not st.session_state.text_input:
         st.warning("Please describe your emergency in the 'Emergency Input' tab first to enable notifications.")
-    elif not current_category:
+    elif not category:
         st.warning("Could not determine emergency category from your input. Please provide more details.")
     else:
-        st.markdown(f"Emergency detected: **`{current_category.upper()}`**")
+        st.markdown(f"Emergency detected: **`{category.upper()}`**")
         st.markdown("---")
-
-        lat, lon, city = get_cached_location()
-
-        if st.button("📱 Send Emergency Notification", key="send_notify_button", use_container_width=True):
-            if not lat or not lon:
-                st.error("Cannot send notifications without a valid location. Please ensure location services are active.")
-            else:
-                with st.spinner("Composing and sending notifications..."):
-                    maps_link = f"https://www.google.com/maps/search/?api=1&query={lat},{lon}"
-                    msg = (
-                        f"🚨 EMERGENCY ALERT 🚨\n\n"
-                        f"**Type:** {current_category.upper()}\n"
-                        f"**Location:** {city}\n"
-                        f"**Coordinates:** {lat:.4f}, {lon:.4f}\n"
-                        f"**Google Maps:** {maps_link}\n\n"
-                        f"_{st.session_state.text_input}_\n"
-                        f"Please check on me!"
-                    )
-                    
-                    st.markdown("---")
-                    st.write("Sending Email...")
-                    email_success = send_email(f"URGENT: EMERGENCY ALERT - {current_category.upper()}", msg)
-                    st.success("✅ Email sent successfully." if email_success else "❌ Email failed. Check `SENDER_EMAIL`, `RECEIVER_EMAIL`, `APP_PASSWORD` in `.env`.")
-                    
-                    st.write("Sending WhatsApp...")
-                    whatsapp_success = send_whatsapp(msg)
-                    st.success("✅ WhatsApp message sent." if whatsapp_success else "⚠️ WhatsApp failed. Check `TWILIO_ACCOUNT_SID`, `TWILIO_AUTH_TOKEN`, `TWILIO_PHONE_NUMBER` in `.env` and recipient number.")
-                st.balloons()
+        notify_panel(category, st.session_state.text_input)
+        alert_status_panel()
 
 
 # --- Footer ---
 st.markdown("---")
 st.markdown("<p style='text-align: center; color: #888888; font-size: 0.9em;'>Developed with ❤️ using Streamlit and Machine Learning.</p>", unsafe_allow_html=True)
+
+
+# --- Rerun timing (sidebar) ---
+record_timing("full rerun", (time.perf_counter() - _rerun_started) * 1000)
+with st.sidebar.expander("⏱️ Rerun timing", expanded=False):
+    st.caption("Most recent first. Fragment reruns appear as their own sections.")
+    for stamp, section, ms in reversed(st.session_state.rerun_log[-20:]):
+        st.caption(f"{stamp} · {section}: {ms:.1f} ms")
+    cascade = get_cascade().stats()
+    st.caption(" · ".join(
+        f"{stage}: {cascade[stage]['share']:.0%} of texts, {cascade[stage]['mean_us']:.0f} µs"
+        for stage in ("rules", "model")
+    ))
@@ -1,13 +1,118 @@
+import json
+import os
+
 import speech_recognition as sr
 
-def listen_from_mic():
+# ----- Speech recognition backends -----
+# Select with ASR_BACKEND=google|sphinx|vosk|whisper. Every backend takes an
+# sr.AudioData and raises sr.UnknownValueError / sr.RequestError like
+# recognize_google does, so callers handle all of them the same way.
+
+class ASRBackend:
+    name = "base"
+    local = False
+
+    def transcribe(self, audio):
+        raise NotImplementedError
+
+    def transcribe_pcm(self, pcm, sample_rate, sample_width=2):
+        """Transcribe raw PCM; returns "" when nothing intelligible was said."""
+        try:
+            return self.transcribe(sr.AudioData(pcm, sample_rate, sample_width))
+        except sr.UnknownValueError:
+            return ""
+
+
+class GoogleBackend(ASRBackend):
+    """Free Google Web Speech endpoint (network round trip, undocumented limits)."""
+    name = "google"
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio):
+        return self.recognizer.recognize_google(audio)
+
+
+class SphinxBackend(ASRBackend):
+    """CMU PocketSphinx, fully local (pip install pocketsphinx)."""
+    name = "sphinx"
+    local = True
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, audio):
+        return self.recognizer.recognize_sphinx(audio)
+
+
+class VoskBackend(ASRBackend):
+    """Kaldi-based Vosk, fully local (pip install vosk; model dir in VOSK_MODEL_PATH)."""
+    name = "vosk"
+    local = True
+    sample_rate = 16000
+
+    def __init__(self, model_path=None):
+        import vosk
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(model_path or os.getenv("VOSK_MODEL_PATH", "vosk-model"))
+
+    def transcribe(self, audio):
+        import vosk
+        recognizer = vosk.KaldiRecognizer(self.model, self.sample_rate)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+class WhisperBackend(ASRBackend):
+    """OpenAI Whisper run locally (pip install openai-whisper); size via WHISPER_MODEL."""
+    name = "whisper"
+    local = True
+
+    def __init__(self, model=None):
+        self.recognizer = sr.Recognizer()
+        self.model = model or os.getenv("WHISPER_MODEL", "base.en")
+
+    def transcribe(self, audio):
+        text = self.recognizer.recognize_whisper(audio, model=self.model).strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+BACKENDS = {cls.name: cls for cls in (GoogleBackend, SphinxBackend, VoskBackend, WhisperBackend)}
+_backends = {}
+
+def get_backend(name=None):
+    """Return the (cached) backend named by name or ASR_BACKEND, default google."""
+    name = name or os.getenv("ASR_BACKEND", "google")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown ASR backend {name!r}; choose from {', '.join(BACKENDS)}")
+    if name not in _backends:
+        _backends[name] = BACKENDS[name]()
+    return _backends[name]
+
+
+def listen_from_mic(backend=None):
     recognizer = sr.Recognizer()
     with sr.Microphone() as source:
         print("🎤 Listening...")
         audio = recognizer.listen(source)
         try:
-            return recognizer.recognize_google(audio)
+            return get_backend(backend).transcribe(audio)
         except sr.UnknownValueError:
             return "Could not understand audio"
         except sr.RequestError:
             return "API unavailable"
+
+def listen_streaming(classify, on_provisional=None):
+    """
+    Listen until the phrase ends, calling on_provisional(hit) as soon as an
+    emergency keyword is heard. Returns audio_stream.StreamResult.
+    """
+    from audio_stream import StreamingPipeline, make_transcriber, microphone_frames
+    pipeline = StreamingPipeline(make_transcriber(), classify, on_provisional=on_provisional)
+    return pipeline.run(microphone_frames())
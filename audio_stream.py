@@ -0,0 +1,352 @@
+"""
+Streaming speech pipeline: classify an SOS while the caller is still talking.
+
+Frames of 16-bit mono PCM flow from a source (microphone or WAV file) into a
+ring buffer. An energy-based voice-activity detector decides where the
+utterance starts and ends, and voiced frames are fed to an incremental
+transcriber. Whenever the partial transcript contains an emergency keyword
+the pipeline fires a provisional classification immediately, without
+waiting for the phrase to end.
+
+Three threads keep a slow recognizer from costing audio. A capture thread
+only reads the source into a queue, so the microphone is drained even while
+an HTTP recognizer is busy; the driver's buffer would otherwise overflow and
+the words spoken meanwhile be dropped. A transcription thread feeds voiced
+frames to the transcriber. The calling thread runs the VAD, so end of speech
+is detected on time, plus keyword spotting, classify and on_provisional, so
+those may use caller state such as Streamlit's session.
+
+    pipeline = StreamingPipeline(make_transcriber(), classify=lambda t: detect_emergency(t, model, vectorizer))
+    result = pipeline.run(wav_frames("sos.wav"))
+"""
+import json
+import math
+import os
+import queue
+import re
+import threading
+import time
+import wave
+from array import array
+from collections import deque, namedtuple
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+
+EMERGENCY_KEYWORDS = frozenset({
+    "fire", "smoke", "burning", "help", "emergency", "ambulance", "heart", "fainted",
+    "bleeding", "unconscious", "breathing", "accident", "crash", "gun", "gunshots",
+    "robbery", "attack", "police", "thief",
+})
+
+Provisional = namedtuple("Provisional", "keyword category partial_text elapsed")
+StreamResult = namedtuple("StreamResult", "text category provisional elapsed")
+
+
+class FrameRingBuffer:
+    """Keeps the most recent max_frames PCM frames (pre-roll before speech is detected)."""
+
+    def __init__(self, max_frames):
+        self.frames = deque(maxlen=max_frames)
+
+    def append(self, frame):
+        self.frames.append(frame)
+
+    def drain(self):
+        frames = list(self.frames)
+        self.frames.clear()
+        return frames
+
+
+def frame_rms(frame):
+    samples = array("h", frame)
+    return math.sqrt(sum(s * s for s in samples) / len(samples)) if samples else 0.0
+
+
+class EnergyVAD:
+    """
+    RMS-energy voice activity detector with an adaptive noise floor.
+    A frame is speech if its RMS exceeds max(min_rms, noise_floor * ratio).
+    """
+
+    def __init__(self, min_rms=300.0, ratio=3.0, adapt=0.05):
+        self.min_rms = min_rms
+        self.ratio = ratio
+        self.adapt = adapt
+        self.noise_floor = None
+
+    def is_speech(self, frame):
+        rms = frame_rms(frame)
+        if self.noise_floor is None:
+            self.noise_floor = rms
+        speech = rms > max(self.min_rms, self.noise_floor * self.ratio)
+        if not speech:
+            self.noise_floor += self.adapt * (rms - self.noise_floor)
+        return speech
+
+
+class KeywordSpotter:
+    def __init__(self, keywords=None):
+        self.keywords = keywords or EMERGENCY_KEYWORDS
+        self.seen = set()
+
+    def spot(self, text):
+        """Return keywords in text not reported before."""
+        new = [w for w in re.findall(r"[a-z]+", text.lower()) if w in self.keywords and w not in self.seen]
+        self.seen.update(new)
+        return new
+
+
+class VoskTranscriber:
+    """
+    Fully offline incremental transcription with Vosk (pip install vosk + a downloaded model).
+    Pass an already loaded vosk.Model to share it; loading one takes seconds.
+    """
+
+    def __init__(self, model_path=None, sample_rate=SAMPLE_RATE, model=None):
+        import vosk
+        vosk.SetLogLevel(-1)
+        self.model = model or vosk.Model(model_path or os.getenv("VOSK_MODEL_PATH", "vosk-model"))
+        self.sample_rate = sample_rate
+        self.reset()
+
+    def reset(self):
+        import vosk
+        self.recognizer = vosk.KaldiRecognizer(self.model, self.sample_rate)
+        self.committed = []
+
+    def accept(self, frame):
+        """Feed one frame; return the best transcript so far."""
+        if self.recognizer.AcceptWaveform(frame):
+            self.committed.append(json.loads(self.recognizer.Result()).get("text", ""))
+            partial = ""
+        else:
+            partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        return " ".join(t for t in self.committed + [partial] if t)
+
+    def finish(self):
+        self.committed.append(json.loads(self.recognizer.FinalResult()).get("text", ""))
+        return " ".join(t for t in self.committed if t)
+
+
+class ChunkedTranscriber:
+    """
+    Incremental transcription for engines that only do whole clips.
+    recognize(pcm_bytes, sample_rate) -> text
+
+    Every `every_ms` of new audio, the open segment is transcribed again. Once
+    the open segment is longer than window_ms, it is cut at its quietest frame
+    (usually a pause between words). The part before the cut is transcribed
+    one last time and its text is kept, and that audio is dropped. Each call
+    therefore uploads at most about window_ms of audio, not the whole
+    utterance.
+    """
+
+    def __init__(self, recognize, sample_rate=SAMPLE_RATE, every_ms=1000, window_ms=5000, frame_ms=FRAME_MS):
+        self.recognize = recognize
+        self.sample_rate = sample_rate
+        self.every_bytes = int(sample_rate * every_ms / 1000) * 2
+        self.window_bytes = int(sample_rate * window_ms / 1000) * 2
+        self.frame_bytes = int(sample_rate * frame_ms / 1000) * 2
+        self.reset()
+
+    def reset(self):
+        self.pcm = bytearray()  # audio after the last cut
+        self.committed = []
+        self.pending = 0
+        self.text = ""
+
+    def accept(self, frame):
+        self.pcm.extend(frame)
+        self.pending += len(frame)
+        if self.pending >= self.every_bytes:
+            self.pending = 0
+            if len(self.pcm) >= self.window_bytes:
+                self._commit()
+            self._update()
+        return self.text
+
+    def finish(self):
+        if self.pending or not self.text:
+            self._update()
+        return self.text
+
+    def _cut(self):
+        """Byte offset just after the quietest frame in the second half of the open segment."""
+        step = self.frame_bytes
+        first = (len(self.pcm) // 2) // step * step
+        offsets = range(first, len(self.pcm) - step + 1, step)
+        quietest = min(offsets, key=lambda i: frame_rms(self.pcm[i:i + step]), default=None)
+        return len(self.pcm) if quietest is None else quietest + step
+
+    def _commit(self):
+        cut = self._cut()
+        text = self._recognize(bytes(self.pcm[:cut]))
+        if text is None:
+            return  # keep the audio and try again on the next update
+        if text:
+            self.committed.append(text)
+        del self.pcm[:cut]
+
+    def _update(self):
+        partial = self._recognize(bytes(self.pcm)) if self.pcm else ""
+        if partial is not None:
+            self.text = " ".join(self.committed + ([partial] if partial else []))
+
+    def _recognize(self, pcm):
+        try:
+            return self.recognize(pcm, self.sample_rate) or ""
+        except Exception as e:
+            print("Transcription error:", e)
+            return None
+
+
+class StreamingPipeline:
+    def __init__(self, transcriber, classify, keywords=None, vad=None, frame_ms=FRAME_MS,
+                 preroll_ms=300, end_silence_ms=800, max_speech_ms=15000, start_timeout_ms=7000,
+                 on_provisional=None):
+        self.transcriber = transcriber
+        self.classify = classify
+        self.keywords = keywords
+        self.vad = vad or EnergyVAD()
+        self.frame_ms = frame_ms
+        self.preroll = max(1, preroll_ms // frame_ms)
+        self.end_silence = max(1, end_silence_ms // frame_ms)
+        self.max_speech = max(1, max_speech_ms // frame_ms)
+        self.start_timeout = max(1, start_timeout_ms // frame_ms)
+        self.on_provisional = on_provisional
+
+    def run(self, frames):
+        """
+        Consume frames until the utterance ends, the source is exhausted or nobody
+        speaks within start_timeout_ms, and return a StreamResult (text is "" if
+        no speech was heard).
+        """
+        start = time.perf_counter()
+        ring = FrameRingBuffer(self.preroll)
+        spotter = KeywordSpotter(self.keywords)
+        self.transcriber.reset()
+        provisional = []
+        captured, voiced_frames, partials, errors = queue.Queue(), queue.Queue(), queue.Queue(), []
+        stop = threading.Event()
+        capture = threading.Thread(target=_capture, args=(frames, captured, stop, errors),
+                                   name="audio-capture", daemon=True)
+        worker = threading.Thread(target=self._transcribe, args=(voiced_frames, partials, errors),
+                                  name="audio-transcribe", daemon=True)
+        capture.start()
+        worker.start()
+        speaking, silence, voiced, waited = False, 0, 0, 0
+
+        try:
+            while True:
+                frame = captured.get()
+                if frame is None:
+                    break  # source exhausted (or failed)
+                if not speaking:
+                    ring.append(frame)
+                    if not self.vad.is_speech(frame):
+                        waited += 1
+                        if waited >= self.start_timeout:
+                            break
+                        continue
+                    speaking = True
+                    pending = ring.drain()
+                else:
+                    silence = 0 if self.vad.is_speech(frame) else silence + 1
+                    pending = [frame]
+
+                for f in pending:
+                    voiced_frames.put(f)
+                    voiced += 1
+                self._spot(partials, spotter, provisional, start)
+                if silence >= self.end_silence or voiced >= self.max_speech:
+                    break
+        finally:
+            # Release the microphone as soon as the utterance is over
+            stop.set()
+            voiced_frames.put(None)
+        worker.join()
+        if errors:
+            raise errors[0]
+
+        text = self.transcriber.finish() if speaking else ""
+        category = self.classify(text) if text else None
+        return StreamResult(text, category, provisional, time.perf_counter() - start)
+
+    def _transcribe(self, voiced_frames, partials, errors):
+        try:
+            while True:
+                frame = voiced_frames.get()
+                if frame is None:
+                    return
+                partials.put(self.transcriber.accept(frame))
+        except Exception as e:
+            errors.append(e)
+
+    def _spot(self, partials, spotter, provisional, start):
+        """Fire a provisional classification for keywords in the newest partial transcript."""
+        text = None
+        while True:
+            try:
+                text = partials.get_nowait()
+            except queue.Empty:
+                break
+        if text is None:
+            return
+        for keyword in spotter.spot(text):
+            hit = Provisional(keyword, self.classify(text), text, time.perf_counter() - start)
+            provisional.append(hit)
+            if self.on_provisional:
+                self.on_provisional(hit)
+
+
+def _capture(frames, out, stop, errors):
+    """Read frames into out until stop is set or the source ends; None marks the end."""
+    try:
+        for frame in frames:
+            if stop.is_set():
+                break
+            out.put(frame)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        close = getattr(frames, "close", None)
+        if close:
+            close()
+        out.put(None)
+
+
+def wav_frames(path, frame_ms=FRAME_MS, realtime=False, sample_rate=SAMPLE_RATE):
+    """Yield PCM frames from a 16-bit mono WAV file, optionally paced like a live microphone."""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1 or wav.getframerate() != sample_rate:
+            raise ValueError(f"{path}: expected 16-bit mono PCM at {sample_rate} Hz")
+        per_frame = int(wav.getframerate() * frame_ms / 1000)
+        while True:
+            frame = wav.readframes(per_frame)
+            if len(frame) < per_frame * 2:
+                return
+            if realtime:
+                time.sleep(frame_ms / 1000)
+            yield frame
+
+
+def microphone_frames(sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS):
+    """Yield live PCM frames from the default microphone."""
+    import speech_recognition as sr
+
+    per_frame = int(sample_rate * frame_ms / 1000)
+    with sr.Microphone(sample_rate=sample_rate, chunk_size=per_frame) as source:
+        while True:
+            yield source.stream.read(per_frame)
+
+
+def make_transcriber(sample_rate=SAMPLE_RATE, backend=None):
+    """Incremental transcriber for the configured ASR backend (see audio_input.get_backend)."""
+    from audio_input import get_backend
+
+    name = backend or os.getenv("ASR_BACKEND", "google")
+    if name == "vosk":
+        # Share the backend's loaded model; only the per-utterance recognizer is new
+        return VoskTranscriber(sample_rate=sample_rate, model=get_backend("vosk").model)
+    return ChunkedTranscriber(get_backend(name).transcribe_pcm, sample_rate)
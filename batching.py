@@ -0,0 +1,108 @@
+"""
+Micro-batching scheduler for classification.
+
+Concurrent callers submit single texts and get a concurrent.futures.Future.
+One scheduler thread takes the first waiting text, keeps collecting for up to
+max_wait_ms or until max_batch texts are queued, then scores the whole batch
+with one vectorized call and resolves each future with its own result. Under
+load this turns many tiny transform/predict calls into a few large ones.
+
+When the previous batch held a single text (an idle system), the next one is
+dispatched without waiting, so a lone caller doesn't pay the window on every
+request. Once callers overlap, batches grow and the window applies again.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+_STOP = object()
+
+
+class InferenceScheduler:
+    def __init__(self, predict_batch, max_wait_ms=2.0, max_batch=64, adaptive=True):
+        """predict_batch(items) must return one result per item, in order."""
+        self.predict_batch = predict_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self.adaptive = adaptive
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def mean_batch_size(self):
+        return self.items / self.batches if self.batches else 0.0
+
+    def submit(self, item):
+        """Queue one item; the returned Future resolves to its result."""
+        if self._thread is None:
+            self.start()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        return self.submit(item).result(timeout)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def _collect(self, first, last_size):
+        batch = [first]
+        wait = not (self.adaptive and last_size <= 1)
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                if wait:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    entry = self._queue.get(timeout=remaining)
+                else:
+                    entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self):
+        last_size = 0
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stopping = self._collect(first, last_size)
+            last_size = len(batch)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        live = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+        if not live:
+            return
+        self.batches += 1
+        self.items += len(live)
+        try:
+            results = self.predict_batch([item for item, _ in live])
+        except Exception as e:
+            for _, future in live:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(live, results):
+            future.set_result(result)
@@ -0,0 +1,56 @@
+"""
+Enqueue latency and delivery throughput of the durable alert queue.
+
+    python -m benchmarks.alert_queue --alerts 5000 --workers 8 --latency-ms 5 --failure-rate 0.1
+
+Channels are in-process stand-ins that sleep for --latency-ms and fail a
+fraction of sends, so retries and backoff are exercised.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from alert_queue import AlertQueue
+from benchmarks.common import percentiles
+
+
+def stand_in(latency, failure_rate):
+    def send(**payload):
+        time.sleep(latency)
+        return random.random() >= failure_rate
+    return send
+
+
+def run(alerts, workers, latency_ms, failure_rate):
+    channel = stand_in(latency_ms / 1000, failure_rate)
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = AlertQueue(os.path.join(tmp, "alerts.sqlite3"), {"email": channel, "whatsapp": channel},
+                           workers=workers, base_delay=0.01, max_delay=0.1)
+        samples, ids = [], []
+        start = time.perf_counter()
+        queue.start()
+        for i in range(alerts):
+            t = time.perf_counter()
+            ids.append(queue.enqueue("email" if i % 2 else "whatsapp", {"message": f"alert {i}"}))
+            samples.append((time.perf_counter() - t) * 1e3)
+        outcomes = {}
+        for _, status, _, _ in queue.watch(ids, timeout=600):
+            outcomes[status] = outcomes.get(status, 0) + 1
+        elapsed = time.perf_counter() - start
+        queue.stop()
+
+    p = percentiles(samples)
+    print(f"enqueue: p50 {p[50]:.3f} ms  p99 {p[99]:.3f} ms")
+    print(f"delivered {alerts} alerts in {elapsed:.2f}s = {alerts / elapsed:,.0f}/s with {workers} workers: {outcomes}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--alerts", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    args = parser.parse_args()
+    run(args.alerts, args.workers, args.latency_ms, args.failure_rate)
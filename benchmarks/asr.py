@@ -0,0 +1,82 @@
+"""
+Compare speech-recognition backends on a folder of WAV fixtures.
+
+    python -m benchmarks.asr fixtures/ --backends google sphinx vosk whisper
+
+Each `name.wav` may have a `name.txt` reference transcript for word error
+rate. Reports real-time factor (processing time / audio duration), p50/p95
+latency per clip and WER per backend. Backends that fail to load are skipped.
+"""
+import argparse
+import glob
+import os
+import time
+
+import speech_recognition as sr
+
+from audio_input import get_backend
+from benchmarks.common import percentiles
+
+
+def word_error_rate(reference, hypothesis):
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1] / max(len(ref), 1)
+
+
+def load_fixtures(folder):
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(folder, "*.wav"))):
+        with sr.AudioFile(path) as source:
+            audio = sr.Recognizer().record(source)
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        ref_path = os.path.splitext(path)[0] + ".txt"
+        reference = open(ref_path, encoding="utf-8").read().strip() if os.path.exists(ref_path) else None
+        fixtures.append((os.path.basename(path), audio, duration, reference))
+    return fixtures
+
+
+def run(folder, backends):
+    fixtures = load_fixtures(folder)
+    if not fixtures:
+        raise SystemExit(f"No .wav files in {folder}")
+    print(f"{len(fixtures)} clips, {sum(f[2] for f in fixtures):.1f}s of audio")
+    print(f"{'backend':>8} {'local':>6} {'RTF':>6} {'p50 s':>7} {'p95 s':>7} {'WER':>6} {'errors':>7}")
+    for name in backends:
+        try:
+            backend = get_backend(name)
+        except Exception as e:
+            print(f"{name:>8}: unavailable ({e})")
+            continue
+        latencies, errors, edits, words = [], 0, 0.0, 0
+        total_audio = total_time = 0.0
+        for _, audio, duration, reference in fixtures:
+            start = time.perf_counter()
+            try:
+                text = backend.transcribe(audio)
+            except (sr.UnknownValueError, sr.RequestError):
+                text, errors = "", errors + 1
+            elapsed = time.perf_counter() - start
+            latencies.append(elapsed)
+            total_audio += duration
+            total_time += elapsed
+            if reference:
+                n = len(reference.split())
+                edits += word_error_rate(reference, text) * n
+                words += n
+        p = percentiles(latencies)
+        wer = f"{edits / words:.1%}" if words else "n/a"
+        print(f"{name:>8} {'yes' if backend.local else 'no':>6} {total_time / total_audio:>6.2f} "
+              f"{p[50]:>7.2f} {p[95]:>7.2f} {wer:>6} {errors:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("folder")
+    parser.add_argument("--backends", nargs="+", default=["google", "sphinx", "vosk", "whisper"])
+    args = parser.parse_args()
+    run(args.folder, args.backends)
@@ -0,0 +1,73 @@
+"""
+Throughput and tail latency with and without micro-batching.
+
+    python -m benchmarks.batching --callers 1 10 100 --requests 200 --max-wait-ms 2
+
+Each caller is a thread that classifies --requests messages back to back,
+like a Streamlit session or an API worker thread. "direct" calls
+detect_emergency per message; "batched" submits through InferenceScheduler.
+"""
+import argparse
+import threading
+import time
+
+from batching import InferenceScheduler
+from benchmarks.common import messages, percentiles
+from utils import detect_emergency, detect_emergency_batch, load_emergency_model
+
+
+def run_callers(callers, requests, classify):
+    texts = messages(requests)
+    latencies = [[] for _ in range(callers)]
+    barrier = threading.Barrier(callers + 1)
+
+    def caller(samples):
+        barrier.wait()
+        for text in texts:
+            start = time.perf_counter()
+            classify(text)
+            samples.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=caller, args=(samples,)) for samples in latencies]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return callers * requests / elapsed, [s for samples in latencies for s in samples]
+
+
+def run(caller_counts, requests, max_wait_ms, max_batch):
+    model, vectorizer = load_emergency_model()
+
+    def direct(text):
+        return detect_emergency(text, model, vectorizer)
+
+    def score(texts):
+        labels, confidences = detect_emergency_batch(texts, model, vectorizer)
+        return list(zip(labels, confidences))
+
+    print(f"{'callers':>8} {'mode':>8} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'batch':>6}")
+    for callers in caller_counts:
+        throughput, samples = run_callers(callers, requests, direct)
+        p = percentiles(samples)
+        print(f"{callers:>8} {'direct':>8} {throughput:>10,.0f} {p[50]:>8.2f} {p[99]:>8.2f} {1:>6}")
+
+        scheduler = InferenceScheduler(score, max_wait_ms=max_wait_ms, max_batch=max_batch).start()
+        throughput, samples = run_callers(callers, requests, scheduler)
+        scheduler.stop()
+        p = percentiles(samples)
+        print(f"{callers:>8} {'batched':>8} {throughput:>10,.0f} {p[50]:>8.2f} {p[99]:>8.2f} "
+              f"{scheduler.mean_batch_size:>6.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--callers", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--requests", type=int, default=200, help="classifications per caller")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+    run(args.callers, args.requests, args.max_wait_ms, args.max_batch)
@@ -0,0 +1,65 @@
+"""
+Cold-start time and per-worker memory: joblib pickles vs the mmapped bundle.
+
+    python -m benchmarks.bundle --workers 8
+
+Each measurement runs in a fresh interpreter. Memory comes from
+/proc/self/smaps_rollup (Linux): Pss splits shared pages between the
+processes mapping them, so with the bundle it should fall as workers grow.
+"""
+import argparse
+import subprocess
+import sys
+import textwrap
+
+LOADERS = {
+    "pickles": "import joblib; m = joblib.load('emergency_model.pkl'); v = joblib.load('vectorizer.pkl')",
+    "bundle": "from model_bundle import read_bundle; m, v = read_bundle('emergency_model.bundle')",
+}
+
+CHILD = textwrap.dedent("""
+    import sys, time
+    start = time.perf_counter()
+    {loader}
+    elapsed = (time.perf_counter() - start) * 1000
+    rollup = {{}}
+    try:
+        for line in open('/proc/self/smaps_rollup'):
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                rollup[parts[0].rstrip(':')] = int(parts[1])
+    except OSError:
+        pass
+    print(f"{{elapsed:.2f}} {{rollup.get('Pss', 0)}} {{rollup.get('Private_Dirty', 0)}}")
+    sys.stdout.flush()
+    sys.stdin.read()  # stay alive until every worker has loaded
+""")
+
+
+def measure(loader, workers):
+    procs = [
+        subprocess.Popen([sys.executable, "-c", CHILD.format(loader=loader)],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    rows = [tuple(float(x) for x in p.stdout.readline().split()) for p in procs]
+    for p in procs:
+        p.stdin.close()
+        p.wait()
+    return rows
+
+
+def run(workers):
+    print(f"{'format':>8} {'load ms (min/max)':>20} {'Pss kB/worker':>14} {'private dirty kB':>17}")
+    for name, loader in LOADERS.items():
+        rows = measure(loader, workers)
+        loads = [r[0] for r in rows]
+        pss = sum(r[1] for r in rows) / len(rows)
+        dirty = sum(r[2] for r in rows) / len(rows)
+        print(f"{name:>8} {min(loads):>9.2f}/{max(loads):<10.2f} {pss:>14,.0f} {dirty:>17,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    run(parser.parse_args().workers)
@@ -0,0 +1,57 @@
+"""
+Rules-then-model cascade vs the model alone on mixed SOS traffic.
+
+    python -m benchmarks.cascade --n 20000
+
+Traffic is SAMPLE_MESSAGES (mostly unambiguous) mixed with vaguer texts that
+should fall through to the model. Prints per-stage share and mean latency,
+and the overall per-text cost of each approach.
+"""
+import argparse
+import itertools
+import time
+
+from benchmarks.common import SAMPLE_MESSAGES, percentiles
+from rules import Cascade
+from utils import detect_emergency_batch, load_emergency_model
+
+VAGUE = [
+    "Please come quickly, something is wrong",
+    "My neighbour is shouting and I am scared",
+    "Need help at the market near the temple",
+    "There is no fire but the alarm keeps beeping",
+]
+
+
+def run(n):
+    model, vectorizer = load_emergency_model()
+
+    def model_stage(text):
+        labels, confidences = detect_emergency_batch([text], model, vectorizer)
+        return labels[0], confidences[0]
+
+    texts = list(itertools.islice(itertools.cycle(SAMPLE_MESSAGES + VAGUE), n))
+    cascade = Cascade(model_stage)
+
+    for name, classify in (("model only", model_stage), ("cascade", cascade)):
+        samples = []
+        for text in texts:
+            start = time.perf_counter()
+            classify(text)
+            samples.append((time.perf_counter() - start) * 1e6)
+        p = percentiles(samples)
+        print(f"{name:>10}: mean {sum(samples) / len(samples):8.1f} us  p50 {p[50]:8.1f} us  p99 {p[99]:8.1f} us")
+
+    stats = cascade.stats()
+    print()
+    for stage in ("rules", "model"):
+        s = stats[stage]
+        print(f"{stage:>10}: {s['share']:6.1%} of texts, mean {s['mean_us']:8.1f} us")
+    print(f"{'rule check':>10}: mean {stats['rule_check_mean_us']:8.1f} us on every text")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=20_000)
+    args = parser.parse_args()
+    run(args.n)
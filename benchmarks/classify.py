@@ -0,0 +1,27 @@
+"""
+Messages per second for per-message detect_emergency vs detect_emergency_batch.
+
+    python -m benchmarks.classify
+"""
+import argparse
+
+from utils import load_emergency_model, detect_emergency, detect_emergency_batch
+from benchmarks.common import messages, timed
+
+
+def run(batch_sizes, repeat):
+    model, vectorizer = load_emergency_model()
+    print(f"{'batch':>6} {'loop msg/s':>14} {'batch msg/s':>14} {'speedup':>8}")
+    for size in batch_sizes:
+        texts = messages(size)
+        loop = timed(lambda: [detect_emergency(t, model, vectorizer) for t in texts], repeat=repeat)
+        batch = timed(detect_emergency_batch, texts, model, vectorizer, repeat=repeat)
+        print(f"{size:>6} {size / loop:>14,.0f} {size / batch:>14,.0f} {loop / batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 64, 4096])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
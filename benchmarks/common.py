@@ -0,0 +1,40 @@
+import itertools
+import statistics
+import time
+
+SAMPLE_MESSAGES = [
+    "My house is on fire, please send help",
+    "There is thick smoke coming from the kitchen",
+    "Someone fainted at the bus stop",
+    "I need an ambulance, my father is having a heart attack",
+    "I hear gunshots near the market",
+    "A man broke into my house and is threatening us",
+    "There is a car accident on the highway",
+    "Fire alarm ringing in the hostel, people are trapped",
+    "Police chase happening nearby, someone is injured",
+    "My friend is bleeding badly after a fall",
+]
+
+
+def messages(n):
+    """Return n synthetic SOS messages cycled from SAMPLE_MESSAGES."""
+    return [f"{m} #{i}" for i, m in zip(range(n), itertools.cycle(SAMPLE_MESSAGES))]
+
+
+def timed(fn, *args, repeat=5, **kwargs):
+    """Run fn repeat times and return the best wall-clock time in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    """Return {p: value} for the given percentiles of samples."""
+    if len(samples) < 2:
+        value = samples[0] if samples else 0.0
+        return {p: value for p in points}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {p: cuts[p - 1] for p in points}
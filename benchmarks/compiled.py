@@ -0,0 +1,71 @@
+"""
+Parity and single-message latency of the compiled model vs sklearn.
+
+    python -m benchmarks.compiled
+
+Exits non-zero if any label differs or probabilities drift beyond --atol.
+The default tolerance follows the model's dtype: bundles store float32
+weights, which the compiled path sums in float64, so they agree to about
+1e-6 rather than to float64 rounding.
+"""
+import argparse
+import sys
+import time
+
+from compiled_model import CompiledEmergencyModel
+from utils import load_emergency_model
+from benchmarks.common import SAMPLE_MESSAGES, messages, percentiles
+
+FLOAT32_ATOL = 1e-5
+FLOAT64_ATOL = 1e-9
+EDGE_CASES = ["", "!!!", "FIRE FIRE FIRE", "unknownword another", "help help help heart attack"]
+
+
+def check_parity(compiled, model, vectorizer, texts, atol):
+    X = vectorizer.transform(texts)
+    expected_labels = model.predict(X).tolist()
+    expected_proba = model.predict_proba(X).tolist()
+    failures = 0
+    for text, label, proba in zip(texts, expected_labels, expected_proba):
+        got = compiled.predict_proba(text)
+        if compiled.predict(text) != label or max(abs(a - b) for a, b in zip(got, proba)) > atol:
+            failures += 1
+            print(f"MISMATCH {text!r}: sklearn={label} {proba} compiled={compiled.predict(text)} {got}")
+    return failures
+
+
+def latency_us(fn, texts):
+    samples = []
+    for text in texts:
+        start = time.perf_counter()
+        fn(text)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return percentiles(samples)
+
+
+def default_atol(model):
+    return FLOAT32_ATOL if str(getattr(model.feature_log_prob_, "dtype", "")) == "float32" else FLOAT64_ATOL
+
+
+def run(n, atol=None):
+    model, vectorizer = load_emergency_model()
+    atol = default_atol(model) if atol is None else atol
+    compiled = CompiledEmergencyModel.from_sklearn(model, vectorizer)
+    texts = messages(n)
+
+    failures = check_parity(compiled, model, vectorizer, SAMPLE_MESSAGES + EDGE_CASES + texts, atol)
+    print(f"parity: {failures} mismatches (atol {atol:g})")
+
+    sk = latency_us(lambda t: model.predict(vectorizer.transform([t]))[0], texts)
+    fast = latency_us(compiled.predict, texts)
+    for name, p in (("sklearn", sk), ("compiled", fast)):
+        print(f"{name:>9}: p50 {p[50]:8.1f} us  p95 {p[95]:8.1f} us  p99 {p[99]:8.1f} us")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=2000)
+    parser.add_argument("--atol", type=float, default=None, help="default: by the model's dtype")
+    args = parser.parse_args()
+    sys.exit(1 if run(args.n, args.atol) else 0)
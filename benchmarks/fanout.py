@@ -0,0 +1,93 @@
+"""
+Selecting and alerting 10k contacts against local email/WhatsApp stand-ins.
+
+    pip install aiosmtpd
+    python -m benchmarks.fanout --contacts 10000
+
+Contacts are scattered around a campus; the geofence covers all of them so
+every contact is notified on both channels. The fan-out is queued on an
+AlertQueue as it is in the app, so the numbers include enqueueing the rows
+and the queue workers delivering them.
+"""
+import argparse
+import os
+import random
+import socket
+import tempfile
+import time
+
+from aiosmtpd.controller import Controller
+
+from alert_queue import AlertQueue
+from contacts import Contact, ContactDirectory, FanOut
+from fakes import FakeTwilio
+from messaging import TwilioMessagingClient, failed_recipients
+from smtp_pool import SMTPPool
+
+CENTER = (31.63, 74.87)
+
+
+class Sink:
+    async def handle_DATA(self, server, session, envelope):
+        return "250 OK"
+
+
+def directory(n, rng):
+    return ContactDirectory(
+        Contact(f"Contact {i}", rng.choice(("staff", "student", "security")), f"block-{i % 20}",
+                f"c{i}@example.com", f"whatsapp:+91{7000000000 + i}",
+                CENTER[0] + rng.uniform(-0.02, 0.02), CENTER[1] + rng.uniform(-0.02, 0.02))
+        for i in range(n)
+    )
+
+
+def run(n, workers):
+    rng = random.Random(3)
+    contacts = directory(n, rng)
+    start = time.perf_counter()
+    recipients = contacts.select(*CENTER, radius_km=5)
+    print(f"select: {sum(map(len, recipients.values())):,} addresses in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        host, port = probe.getsockname()
+    controller = Controller(Sink(), hostname=host, port=port)
+    controller.start()
+    try:
+        with FakeTwilio(rate=10_000) as fake, tempfile.TemporaryDirectory() as tmp:
+            pool = SMTPPool(host, port, size=workers, starttls=False)
+            client = TwilioMessagingClient("ACtest", "token", "whatsapp:+10000000000", base_url=fake.url,
+                                           rate=5_000, burst=100, pool_size=workers * 4)
+            handlers = {
+                "email": lambda subject, body, to_email, timeout: not pool.send_alert(
+                    subject, body, to_email, sender="alerts@example.com", timeout=timeout),
+                "whatsapp": lambda message, to, timeout: not failed_recipients(
+                    client.send_many([to] if isinstance(to, str) else to, message, timeout=timeout)),
+            }
+            queue = AlertQueue(os.path.join(tmp, "alerts.sqlite3"), handlers, workers=workers).start()
+
+            start = time.perf_counter()
+            alerts = FanOut(queue).enqueue("Campus alert", "Evacuate block C", recipients, key="bench")
+            queued = time.perf_counter() - start
+            print(f"enqueue: {sum(map(len, alerts.values())):,} rows in {queued * 1e3:.0f} ms")
+
+            ids = [alert_id for channel_ids in alerts.values() for alert_id in channel_ids]
+            outcomes = {}
+            for _, status, _, _ in queue.watch(ids, timeout=600):
+                outcomes[status] = outcomes.get(status, 0) + 1
+            elapsed = time.perf_counter() - start
+            queue.stop()
+            pool.close()
+            print(f"delivered in {elapsed:.2f}s: {outcomes}")
+            for channel, counts in queue.group_status("bench").items():
+                print(f"{channel:>8}: {counts}")
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--contacts", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    run(args.contacts, args.workers)
@@ -0,0 +1,68 @@
+"""
+Cost of language routing, and lazy loading / eviction of per-language models.
+
+    python -m benchmarks.language --n 20000
+
+1. detect_language latency for English, Hindi and Punjabi texts.
+2. The English path: detect_emergency with an explicit model vs routed by
+   language (the default). The two should be within noise of each other.
+3. First-use load time and LRU eviction, using throwaway hi/pa/ur bundles
+   in a temp dir with a budget that fits only two of them.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.common import messages
+from language import detect_language
+from model_bundle import write_bundle
+from model_registry import LanguageModels
+from train_model import train
+from utils import detect_emergency, get_model_registry, load_emergency_model
+
+SAMPLES = {
+    "en": "My house is on fire, please send help",
+    "hi": "मेरे घर में आग लगी है, मदद भेजिए",
+    "pa": "ਮੇਰੇ ਘਰ ਨੂੰ ਅੱਗ ਲੱਗੀ ਹੈ, ਮਦਦ ਭੇਜੋ",
+}
+
+
+def per_call_us(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def run(n):
+    for language, text in SAMPLES.items():
+        print(f"detect_language {language}: {per_call_us(detect_language, [text] * n):6.2f} us")
+
+    texts = messages(n)
+    model, vectorizer = get_model_registry().current()[:2]
+    explicit = per_call_us(lambda t: detect_emergency(t, model, vectorizer), texts)
+    routed = per_call_us(detect_emergency, texts)
+    print(f"\nEnglish classify, explicit model: {explicit:8.1f} us")
+    print(f"English classify, routed:         {routed:8.1f} us")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trained, vec, _ = train()
+        pattern = os.path.join(tmp, "model.{lang}.bundle")
+        for language in ("hi", "pa", "ur"):
+            write_bundle(pattern.format(lang=language), trained, vec)
+        size = os.path.getsize(pattern.format(lang="hi"))
+        models = LanguageModels(lambda lang: pattern.format(lang=lang),
+                                lambda path: load_emergency_model(bundle_path=path), budget_bytes=2 * size)
+        print(f"\nbundle size {size / 2**20:.1f} MiB, budget {2 * size / 2**20:.1f} MiB")
+        for language in ("hi", "pa", "hi", "ur", "pa"):
+            start = time.perf_counter()
+            models.get(language)
+            print(f"get({language}): {(time.perf_counter() - start) * 1000:7.2f} ms  resident {models.languages}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=20_000)
+    args = parser.parse_args()
+    run(args.n)
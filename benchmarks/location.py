@@ -0,0 +1,48 @@
+"""
+get_current_location latency against local ip-api stand-ins.
+
+    python -m benchmarks.location
+
+Measures cold lookups, cache hits, and failover when the first upstream
+hangs past its read timeout.
+"""
+import argparse
+import time
+
+from fakes import FakeIpApi
+from location import LocationProvider, Upstream, _parse_ip_api
+from benchmarks.common import percentiles
+
+
+def upstream(fake, name):
+    return Upstream(name, lambda ip: f"{fake.url}/json/{ip}", _parse_ip_api)
+
+
+def measure(provider, ips):
+    samples = []
+    for ip in ips:
+        start = time.perf_counter()
+        provider.locate(ip)
+        samples.append((time.perf_counter() - start) * 1e3)
+    return percentiles(samples)
+
+
+def report(label, p):
+    print(f"{label:>22}: p50 {p[50]:8.3f} ms  p95 {p[95]:8.3f} ms  p99 {p[99]:8.3f} ms")
+
+
+def run(clients):
+    ips = [f"8.8.{i // 256}.{i % 256}" for i in range(clients)]
+    with FakeIpApi() as fast, FakeIpApi(delay=5.0) as hung:
+        provider = LocationProvider([upstream(fast, "fast")])
+        report("cold (keep-alive)", measure(provider, ips))
+        report("cached", measure(provider, ips))
+
+        provider = LocationProvider([upstream(hung, "hung"), upstream(fast, "fast")], read_timeout=0.2)
+        report("failover (0.2s read)", measure(provider, ips[:20]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=500)
+    run(parser.parse_args().clients)
@@ -0,0 +1,77 @@
+"""
+Overlay build time and HTML payload size as the number of points grows.
+
+    python -m benchmarks.map_layer --sizes 100 1000 10000 100000
+
+For each size the overlay is built three ways: one marker per point (the old
+approach), FastMarkerCluster and server-side grid aggregation. Payload is the
+length of the rendered overlay HTML/JS, which is what the browser receives.
+Also reports the cost of a base-map cache hit and of adding a small delta.
+"""
+import argparse
+import random
+import time
+from collections import OrderedDict
+
+from map_layer import MapOverlay, base_map
+from benchmarks.nearby import LAT_RANGE, LON_RANGE
+
+MODES = {
+    # (marker_limit, cluster_limit) forcing each representation
+    "markers": (float("inf"), float("inf")),
+    "cluster": (0, float("inf")),
+    "aggregate": (0, 0),
+}
+
+
+def synthetic_points(n, rng):
+    return [
+        {"display_name": f"Facility {i}", "contact:phone": "N/A", "lat": rng.uniform(*LAT_RANGE), "lon": rng.uniform(*LON_RANGE)}
+        for i in range(n)
+    ]
+
+
+def render_size(overlay):
+    import folium # type: ignore
+    m = folium.Map(location=[20.0, 80.0], zoom_start=5)
+    overlay.feature_group().add_to(m)
+    return len(m.get_root().render())
+
+
+def run(sizes, delta):
+    rng = random.Random(42)
+    print(f"{'points':>9} {'mode':>10} {'build ms':>9} {'payload KB':>11}")
+    for n in sizes:
+        points = synthetic_points(n, rng)
+        for mode, (marker_limit, cluster_limit) in MODES.items():
+            if mode == "markers" and n > 20_000:
+                continue # minutes to render; the point is made at smaller sizes
+            overlay = MapOverlay("Facilities", marker_limit=marker_limit, cluster_limit=cluster_limit)
+            start = time.perf_counter()
+            overlay.add(points)
+            overlay.feature_group()
+            build = (time.perf_counter() - start) * 1000
+            print(f"{n:>9,} {mode:>10} {build:>9.1f} {render_size(overlay) / 1024:>11.1f}")
+
+    cache = OrderedDict()
+    base_map(cache, 31.63, 74.87, 15)
+    start = time.perf_counter()
+    base_map(cache, 31.6301, 74.8702, 15)
+    print(f"\nbase map cache hit: {(time.perf_counter() - start) * 1e6:.1f} us")
+
+    overlay = MapOverlay("Incidents")
+    overlay.add(synthetic_points(100, rng))
+    overlay.feature_group()
+    new = synthetic_points(delta, rng)
+    start = time.perf_counter()
+    overlay.add(new + list(overlay.points.values())) # repeats are ignored
+    overlay.feature_group()
+    print(f"add {delta} new incidents to 100 markers: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000])
+    parser.add_argument("--delta", type=int, default=10)
+    args = parser.parse_args()
+    run(args.sizes, args.delta)
@@ -0,0 +1,53 @@
+"""
+k-nearest facility query latency as the dataset grows.
+
+    python -m benchmarks.nearby --sizes 1000 10000 100000 1000000
+
+Facilities are scattered uniformly over India's bounding box; query points
+are random incidents in the same box. Latency should stay flat with size.
+"""
+import argparse
+import random
+import time
+
+from facilities import FacilityIndex
+from benchmarks.common import percentiles
+
+LAT_RANGE = (8.0, 35.0)
+LON_RANGE = (68.0, 97.0)
+TYPES = ("hospital", "police", "fire_station")
+
+
+def synthetic_records(n, rng):
+    return [
+        {"type": TYPES[i % 3], "name": f"Facility {i}", "lat": rng.uniform(*LAT_RANGE), "lon": rng.uniform(*LON_RANGE)}
+        for i in range(n)
+    ]
+
+
+def run(sizes, queries, k, radius_km):
+    rng = random.Random(42)
+    points = [(rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)) for _ in range(queries)]
+    print(f"{'facilities':>11} {'build s':>8} {'p50 us':>8} {'p95 us':>8} {'p99 us':>8}")
+    for n in sizes:
+        start = time.perf_counter()
+        index = FacilityIndex(synthetic_records(n, rng))
+        build = time.perf_counter() - start
+
+        samples = []
+        for lat, lon in points:
+            start = time.perf_counter()
+            index.nearest(lat, lon, "hospital", k=k, radius_km=radius_km)
+            samples.append((time.perf_counter() - start) * 1e6)
+        p = percentiles(samples)
+        print(f"{n:>11,} {build:>8.2f} {p[50]:>8.1f} {p[95]:>8.1f} {p[99]:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--radius-km", type=float, default=None)
+    args = parser.parse_args()
+    run(args.sizes, args.queries, args.k, args.radius_km)
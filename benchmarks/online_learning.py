@@ -0,0 +1,92 @@
+"""
+Classification latency while online updates are being published.
+
+    python -m benchmarks.online_learning --seconds 20 --interval 0.5
+
+Trains a small hashed bundle in a temp directory, then classifies in a tight
+loop. First it runs with the trainer idle, then while another thread records
+corrections that the trainer learns and publishes every --interval seconds.
+p99 should barely move, and RSS should plateau rather than grow with the
+number of publishes.
+"""
+import argparse
+import os
+import resource
+import tempfile
+import threading
+import time
+
+from benchmarks.common import SAMPLE_MESSAGES, messages, percentiles
+from model_bundle import write_bundle
+from model_registry import ModelRegistry
+from online_learning import FeedbackStore, OnlineTrainer
+from train_model import train
+from utils import detect_emergency_batch, load_emergency_model
+
+CORRECTIONS = {
+    "fire": "gas leak smell near the stove",
+    "medical": "grandma collapsed and is not responding",
+    "police": "a man is following me with a knife",
+}
+
+
+def classify_for(seconds, registry):
+    samples = []
+    texts = SAMPLE_MESSAGES
+    deadline = time.monotonic() + seconds
+    i = 0
+    while time.monotonic() < deadline:
+        model, vectorizer = registry.current()[:2]
+        start = time.perf_counter()
+        detect_emergency_batch([texts[i % len(texts)]], model, vectorizer)
+        samples.append((time.perf_counter() - start) * 1e6)
+        i += 1
+    return samples
+
+
+def run(seconds, interval):
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle = os.path.join(tmp, "model.bundle")
+        model, vectorizer, _ = train()
+        write_bundle(bundle, model, vectorizer)
+        store = FeedbackStore(os.path.join(tmp, "feedback.sqlite3"), max_rows=1000)
+        publishes = []
+        registry = ModelRegistry([bundle], lambda: load_emergency_model(bundle_path=bundle),
+                                 on_swap=lambda version: publishes.append(version))
+        trainer = OnlineTrainer(store, registry, bundle, interval=interval).start()
+
+        print(f"{'phase':>10} {'calls':>8} {'p50 us':>8} {'p95 us':>8} {'p99 us':>8} {'max us':>9}")
+
+        def report(phase, samples):
+            p = percentiles(samples)
+            print(f"{phase:>10} {len(samples):>8,} {p[50]:>8.1f} {p[95]:>8.1f} {p[99]:>8.1f} {max(samples):>9.1f}")
+
+        report("idle", classify_for(seconds / 2, registry))
+
+        stop = threading.Event()
+
+        def feed():
+            for text in messages(10 ** 9):
+                if stop.is_set():
+                    return
+                for label, correction in CORRECTIONS.items():
+                    store.record(f"{correction} {text}", label)
+                time.sleep(0.005)
+
+        feeder = threading.Thread(target=feed, daemon=True)
+        feeder.start()
+        publishes.clear()
+        report("updating", classify_for(seconds / 2, registry))
+        stop.set()
+        feeder.join()
+        trainer.stop()
+        print(f"\n{len(publishes)} models published, "
+              f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--interval", type=float, default=0.5)
+    args = parser.parse_args()
+    run(args.seconds, args.interval)
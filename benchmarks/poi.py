@@ -0,0 +1,39 @@
+"""
+Cold vs cached POI lookup latency against a local Nominatim stand-in.
+
+    python -m benchmarks.poi
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from fakes import FakeNominatim
+from poi_cache import POICache
+from benchmarks.common import percentiles
+
+
+def run(lookups, spread_deg):
+    rng = random.Random(7)
+    points = [(31.63 + rng.uniform(-spread_deg, spread_deg), 74.87 + rng.uniform(-spread_deg, spread_deg))
+              for _ in range(lookups)]
+    with tempfile.TemporaryDirectory() as tmp, FakeNominatim() as fake:
+        cache = POICache(os.path.join(tmp, "poi.sqlite3"), base_url=fake.url, min_interval=0)
+        for label in ("cold", "warm"):
+            samples = []
+            for lat, lon in points:
+                start = time.perf_counter()
+                cache.lookup(lat, lon, "hospital")
+                samples.append((time.perf_counter() - start) * 1e6)
+            p = percentiles(samples)
+            print(f"{label}: p50 {p[50]:9.1f} us  p95 {p[95]:9.1f} us  p99 {p[99]:9.1f} us")
+        print(f"upstream requests: {fake.requests.get('/search', 0)} for {2 * lookups} lookups")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--spread-deg", type=float, default=0.2)
+    args = parser.parse_args()
+    run(args.lookups, args.spread_deg)
@@ -0,0 +1,71 @@
+"""
+Load test for service.py: requests per second and tail latency.
+
+    uvicorn service:app --workers 4 --port 8000 &
+    python -m benchmarks.service_load --url http://127.0.0.1:8000 --concurrency 64 --seconds 20
+
+Each client thread holds one keep-alive connection and sends back-to-back
+requests, cycling through the sample SOS messages.
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+from benchmarks.common import SAMPLE_MESSAGES, percentiles
+
+ENDPOINTS = {
+    "classify": lambda i: ("POST", "/classify", {"text": SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)]}),
+    "classify-batch": lambda i: ("POST", "/classify", {"texts": SAMPLE_MESSAGES * 10}),
+    "nearby": lambda i: ("GET", f"/nearby?lat={31.6 + (i % 100) / 1000}&lon=74.87&type=hospital&k=5", None),
+}
+
+
+def client(url, endpoint, stop_at, latencies, errors):
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=10)
+    i = 0
+    while time.perf_counter() < stop_at:
+        method, path, body = ENDPOINTS[endpoint](i)
+        payload = json.dumps(body) if body is not None else None
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=10)
+            continue
+        latencies.append((time.perf_counter() - start) * 1e3)
+        i += 1
+    conn.close()
+
+
+def run(url, endpoint, concurrency, seconds):
+    url = urlparse(url)
+    latencies, errors = [], []
+    stop_at = time.perf_counter() + seconds
+    threads = [threading.Thread(target=client, args=(url, endpoint, stop_at, latencies, errors))
+               for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    p = percentiles(latencies)
+    print(f"{endpoint}: {len(latencies) / seconds:,.0f} req/s with {concurrency} clients, {len(errors)} errors")
+    print(f"latency ms: p50 {p[50]:.2f}  p95 {p[95]:.2f}  p99 {p[99]:.2f}  max {max(latencies, default=0):.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="classify")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+    run(args.url, args.endpoint, args.concurrency, args.seconds)
@@ -0,0 +1,77 @@
+"""
+Messages per second: one SMTP connection per email vs SMTPPool.
+
+    pip install aiosmtpd
+    python -m benchmarks.smtp --messages 500 --recipients 50
+
+Runs against a local aiosmtpd sink (no TLS or auth, so the pool's real-world
+advantage over Gmail is larger than shown here).
+"""
+import argparse
+import smtplib
+import socket
+import time
+
+from aiosmtpd.controller import Controller
+
+from smtp_pool import SMTPPool
+
+SENDER = "alerts@example.com"
+
+
+class Sink:
+    def __init__(self):
+        self.messages = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 OK"
+
+
+def per_message(host, port, recipient):
+    # What send_email used to do for every alert
+    server = smtplib.SMTP(host, port, timeout=10)
+    server.sendmail(SENDER, recipient, "Subject: alert\r\n\r\nhelp")
+    server.quit()
+
+
+def run(messages, recipients, workers):
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        host, port = probe.getsockname()
+    sink = Sink()
+    controller = Controller(sink, hostname=host, port=port)
+    controller.start()
+    to = [f"contact{i}@example.com" for i in range(recipients)]
+    try:
+        start = time.perf_counter()
+        for _ in range(messages):
+            per_message(host, port, to[0])
+        baseline = messages / (time.perf_counter() - start)
+
+        pool = SMTPPool(host, port, size=workers, starttls=False)
+        start = time.perf_counter()
+        for _ in range(messages):
+            pool.send_alert("alert", "help", to[0], sender=SENDER)
+        pooled = messages / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(messages):
+            pool.send_alert("alert", "help", to, sender=SENDER)
+        fanout = messages * recipients / (time.perf_counter() - start)
+        pool.close()
+    finally:
+        controller.stop()
+
+    print(f"connection per message: {baseline:10,.0f} msg/s")
+    print(f"pooled session:         {pooled:10,.0f} msg/s ({pooled / baseline:.1f}x)")
+    print(f"pooled, {recipients} rcpt/message: {fanout:10,.0f} recipient deliveries/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--recipients", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    run(args.messages, args.recipients, args.workers)
@@ -0,0 +1,99 @@
+"""
+Startup-time budget for `import utils` and the Streamlit entry point.
+
+    python -m benchmarks.startup --budget-ms 150
+
+Prints the slowest imports from `python -X importtime -c "import utils"`,
+then the median wall-clock of a fresh `import utils`. Exits non-zero if the
+median exceeds the budget, if importing utils loads any heavy dependency, or
+if app_1.py imports one at module level.
+"""
+import argparse
+import ast
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY = {
+    "joblib", "numpy", "scipy", "sklearn", "requests", "twilio", "smtplib", "email.mime",
+    "geocoder", "speech_recognition", "pyttsx3", "folium", "streamlit_folium",
+}
+
+
+def importtime_report(module, top):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), int(own), name.strip()))
+    rows.sort(reverse=True)
+    print(f"{'cumulative us':>14} {'self us':>9}  module")
+    for cumulative, own, name in rows[:top]:
+        print(f"{cumulative:>14,} {own:>9,}  {name}")
+
+
+def wall_clock_ms(module, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    baseline = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        baseline.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples) - statistics.median(baseline)
+
+
+def heavy_loaded_by(module):
+    code = f"import sys, {module}; print('\\n'.join(sys.modules))"
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return sorted(HEAVY & set(loaded.stdout.split()))
+
+
+def heavy_top_level_imports(path):
+    found = []
+    for node in ast.parse(open(path, encoding="utf-8").read()).body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            names = [node.module or ""]
+        else:
+            continue
+        found.extend(n for n in names if n in HEAVY or n.split(".")[0] in HEAVY)
+    return found
+
+
+def run(budget_ms, runs, top):
+    importtime_report("utils", top)
+    failures = []
+
+    elapsed = wall_clock_ms("utils", runs)
+    print(f"\nimport utils: {elapsed:.1f} ms over interpreter startup (budget {budget_ms} ms)")
+    if elapsed > budget_ms:
+        failures.append(f"import utils took {elapsed:.1f} ms")
+
+    heavy = heavy_loaded_by("utils")
+    if heavy:
+        failures.append(f"import utils loads {', '.join(heavy)}")
+    eager = heavy_top_level_imports("app_1.py")
+    if eager:
+        failures.append(f"app_1.py imports {', '.join(eager)} at module level")
+
+    for failure in failures:
+        print("FAIL:", failure)
+    return not failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget-ms", type=float, default=150)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.budget_ms, args.runs, args.top) else 1)
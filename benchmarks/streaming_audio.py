@@ -0,0 +1,73 @@
+"""
+Time to first provisional classification vs end-of-utterance, from WAV files.
+
+    python -m benchmarks.streaming_audio fixtures/*.wav
+
+Frames are paced in real time (--no-realtime to run flat out) so the numbers
+match what a caller at a live microphone would experience. The real-time
+source behaves like a microphone: frames arrive on the wall clock into a
+device buffer of --buffer-ms, and any the pipeline doesn't read in time are
+lost. The dropped count shows whether a slow recognizer is costing audio.
+"""
+import argparse
+import time
+
+from audio_stream import FRAME_MS, StreamingPipeline, make_transcriber, wav_frames
+
+
+class LiveSource:
+    """
+    Replays frames like a live microphone. Frame i becomes readable (i + 1) * frame_ms
+    after the first read, and the device holds at most buffer_frames unread frames.
+    When the reader falls behind, the oldest frames are lost (as with PyAudio's
+    exception_on_overflow=False) and counted in dropped.
+    """
+
+    def __init__(self, frames, frame_ms=FRAME_MS, buffer_frames=8):
+        self.frames = list(frames)
+        self.frame_s = frame_ms / 1000
+        self.buffer_frames = buffer_frames
+        self.dropped = 0
+
+    def __iter__(self):
+        self.dropped = 0
+        start = time.perf_counter()
+        i = 0
+        while i < len(self.frames):
+            arrived = min(len(self.frames), int((time.perf_counter() - start) / self.frame_s))
+            if arrived <= i:
+                time.sleep(max(0.0, (i + 1) * self.frame_s - (time.perf_counter() - start)))
+                continue
+            if arrived - i > self.buffer_frames:
+                lost = arrived - i - self.buffer_frames
+                self.dropped += lost
+                i += lost
+            yield self.frames[i]
+            i += 1
+
+
+def run(paths, realtime, buffer_ms):
+    from utils import load_emergency_model, detect_emergency
+
+    model, vectorizer = load_emergency_model()
+    classify = lambda text: detect_emergency(text, model, vectorizer)
+    pipeline = StreamingPipeline(make_transcriber(), classify)
+    for path in paths:
+        frames = wav_frames(path)
+        source = LiveSource(frames, buffer_frames=max(1, buffer_ms // FRAME_MS)) if realtime else frames
+        result = pipeline.run(source)
+        first = result.provisional[0] if result.provisional else None
+        dropped = f", {source.dropped} frames dropped" if realtime else ""
+        print(f"{path}: final {result.category} after {result.elapsed:.2f}s{dropped}: {result.text!r}")
+        if first:
+            print(f"  provisional {first.category} on {first.keyword!r} after {first.elapsed:.2f}s "
+                  f"({result.elapsed - first.elapsed:.2f}s earlier)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--no-realtime", dest="realtime", action="store_false")
+    parser.add_argument("--buffer-ms", type=int, default=200, help="device buffer of the simulated microphone")
+    args = parser.parse_args()
+    run(args.paths, args.realtime, args.buffer_ms)
@@ -0,0 +1,69 @@
+"""
+Streaming training throughput and peak memory on a synthetic labelled corpus.
+
+    python -m benchmarks.training --documents 1000000 --workers 1 4 8
+
+Writes a JSONL corpus of synthetic SOS transcripts to a temp directory, then
+trains on it with each worker count. Peak RSS is ru_maxrss for the training
+process and, separately, its largest feature-extraction worker; both should
+stay flat as --documents grows. ru_maxrss never decreases, so run one worker
+count per invocation for exact per-run peaks.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+
+from train_model import train
+
+VOCAB = {
+    "fire": "fire smoke flames burning alarm building kitchen trapped blaze gas cylinder",
+    "medical": "ambulance fainted bleeding heart attack unconscious breathing injured fever pregnant",
+    "police": "gunshots robbery theft broke threatening knife fight chase stolen harassment",
+}
+FILLER = "please help now there is someone my the near road house quickly we need urgent".split()
+
+
+def write_corpus(path, n, seed=7):
+    rng = random.Random(seed)
+    words = {label: text.split() for label, text in VOCAB.items()}
+    labels = list(words)
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(n):
+            label = rng.choice(labels)
+            tokens = rng.choices(words[label], k=rng.randint(2, 5)) + rng.choices(FILLER, k=rng.randint(3, 12))
+            rng.shuffle(tokens)
+            f.write(json.dumps({"text": " ".join(tokens), "label": label}) + "\n")
+
+
+def peak_rss_mb(who):
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def run(documents, worker_counts, chunk_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, "corpus.jsonl")
+        start = time.perf_counter()
+        write_corpus(corpus, documents)
+        print(f"wrote {documents:,} documents ({os.path.getsize(corpus) / 2**20:.0f} MiB) "
+              f"in {time.perf_counter() - start:.1f}s\n")
+
+        print(f"{'workers':>8} {'seconds':>8} {'docs/s':>10} {'main MiB':>9} {'worker MiB':>11}")
+        for workers in worker_counts:
+            model, vectorizer, stats = train([corpus], workers=workers, chunk_size=chunk_size)
+            rate = stats["documents"] / stats["seconds"]
+            print(f"{workers:>8} {stats['seconds']:>8.1f} {rate:>10,.0f} "
+                  f"{peak_rss_mb(resource.RUSAGE_SELF):>9.0f} {peak_rss_mb(resource.RUSAGE_CHILDREN):>11.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    args = parser.parse_args()
+    run(args.documents, args.workers, args.chunk_size)
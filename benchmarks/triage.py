@@ -0,0 +1,42 @@
+"""
+Bulk-triage throughput and memory on a synthetic SOS log.
+
+    python -m benchmarks.triage --lines 10000000 --workers 1 4 8
+
+Writes a plain-text log of --lines messages to a temp directory and triages it
+to CSV with each worker count. Peak RSS of the parent should not grow with
+--lines, because only 2 x workers chunks are in flight at any time.
+"""
+import argparse
+import os
+import resource
+import tempfile
+
+from benchmarks.common import SAMPLE_MESSAGES
+from triage import triage
+
+
+def write_log(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(lines):
+            f.write(f"{SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)]} #{i}\n")
+
+
+def run(lines, worker_counts, chunk_size):
+    with tempfile.TemporaryDirectory() as tmp:
+        src, dst = os.path.join(tmp, "sos.txt"), os.path.join(tmp, "triaged.csv")
+        write_log(src, lines)
+        print(f"{'workers':>8} {'seconds':>8} {'lines/s':>10} {'parent MiB':>11}")
+        for workers in worker_counts:
+            done, seconds = triage(src, dst, workers=workers, chunk_size=chunk_size)
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(f"{workers:>8} {seconds:>8.1f} {done / seconds:>10,.0f} {peak:>11.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--chunk-size", type=int, default=5_000)
+    args = parser.parse_args()
+    run(args.lines, args.workers, args.chunk_size)
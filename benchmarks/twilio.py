@@ -0,0 +1,40 @@
+"""
+Throughput and backpressure of TwilioMessagingClient against a local fake.
+
+    python -m benchmarks.twilio --messages 300 --server-rate 100 --client-rate 90
+
+With the client's token bucket under the fake's per-second limit there are
+no 429s; set --client-rate above --server-rate to watch Retry-After handling,
+and --wait small to see RateLimited backpressure.
+"""
+import argparse
+import time
+
+from fakes import FakeTwilio
+from messaging import RateLimited, TwilioMessagingClient
+
+
+def run(messages, server_rate, client_rate, burst, wait):
+    with FakeTwilio(rate=server_rate) as fake:
+        client = TwilioMessagingClient("ACtest", "token", "whatsapp:+10000000000", base_url=fake.url,
+                                       rate=client_rate, burst=burst)
+        recipients = [f"whatsapp:+91{7000000000 + i}" for i in range(messages)]
+        start = time.perf_counter()
+        results = client.send_many(recipients, "🚨 EMERGENCY ALERT 🚨", wait=wait)
+        elapsed = time.perf_counter() - start
+
+    sent = sum(1 for r in results.values() if isinstance(r, str))
+    throttled = sum(1 for r in results.values() if isinstance(r, RateLimited))
+    print(f"sent {sent}/{messages} in {elapsed:.2f}s = {sent / elapsed:,.1f} msg/s")
+    print(f"server 429s: {fake.rejected}, client-side RateLimited: {throttled}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--server-rate", type=float, default=100)
+    parser.add_argument("--client-rate", type=float, default=90)
+    parser.add_argument("--burst", type=float, default=10)
+    parser.add_argument("--wait", type=float, default=30.0)
+    args = parser.parse_args()
+    run(args.messages, args.server_rate, args.client_rate, args.burst, args.wait)
@@ -0,0 +1,144 @@
+import math
+import re
+from collections import Counter
+
+from hashing import feature_index
+
+# Settings of TfidfVectorizer that change how text becomes features, and the
+# values they must have: the compiled path only reproduces plain word unigrams.
+_REQUIRED = {
+    "analyzer": "word",
+    "ngram_range": (1, 1),
+    "preprocessor": None,
+    "tokenizer": None,
+    "strip_accents": None,
+}
+
+
+class CompiledEmergencyModel:
+    """
+    TF-IDF + MultinomialNB flattened into a token -> per-class log-weight table.
+
+    Scoring a message is a regex tokenization plus a few dictionary lookups,
+    and gives the same labels and probabilities as the sklearn pipeline.
+
+    With vocabulary=None and n_features set (a hashed model), the table is
+    filled lazily: a token's column is found by MurmurHash3 the first time
+    it is seen and its weights are cached, up to HASHED_TABLE_LIMIT tokens.
+    """
+
+    HASHED_TABLE_LIMIT = 1 << 16
+
+    def __init__(self, vocabulary, idf, classes, class_log_prior, feature_log_prob,
+                 token_pattern=r"(?u)\b\w\w+\b", lowercase=True, binary=False,
+                 sublinear_tf=False, norm="l2", n_features=None):
+        if norm not in ("l1", "l2", None):
+            raise ValueError(f"Unsupported norm: {norm!r}")
+        if vocabulary is None and not n_features:
+            raise ValueError("Need a vocabulary or n_features for a hashed model")
+        self.classes = list(_as_list(classes))
+        self.class_log_prior = list(_as_list(class_log_prior))
+        self.n_features = n_features
+        if vocabulary is None:
+            self._idf = idf
+            self._feature_log_prob = feature_log_prob
+            self.table = {}
+        else:
+            idf = _as_list(idf) if idf is not None else None
+            columns = list(zip(*_as_list(feature_log_prob)))
+            self.table = {
+                token: (idf[i] if idf is not None else 1.0, columns[i])
+                for token, i in vocabulary.items()
+            }
+        self.tokenize = re.compile(token_pattern).findall
+        self.lowercase = lowercase
+        self.binary = binary
+        self.sublinear_tf = sublinear_tf
+        self.norm = norm
+
+    @classmethod
+    def from_sklearn(cls, model, vectorizer):
+        for name, expected in _REQUIRED.items():
+            if getattr(vectorizer, name, expected) != expected:
+                raise ValueError(f"Cannot compile vectorizer with {name}={getattr(vectorizer, name)!r}")
+        hashing = getattr(vectorizer, "hashing", None) is True or (
+            not hasattr(vectorizer, "vocabulary_") and hasattr(vectorizer, "n_features")
+        )
+        if hashing and getattr(vectorizer, "alternate_sign", False):
+            raise ValueError("Cannot compile HashingVectorizer with alternate_sign=True")
+        use_idf = not hashing and getattr(vectorizer, "use_idf", True)
+        return cls(
+            None if hashing else vectorizer.vocabulary_,
+            vectorizer.idf_ if use_idf else None,
+            model.classes_,
+            model.class_log_prior_,
+            model.feature_log_prob_,
+            token_pattern=vectorizer.token_pattern,
+            lowercase=vectorizer.lowercase,
+            binary=vectorizer.binary,
+            sublinear_tf=getattr(vectorizer, "sublinear_tf", False),
+            norm=getattr(vectorizer, "norm", "l2"),
+            n_features=vectorizer.n_features if hashing else None,
+        )
+
+    def _hashed_entry(self, token):
+        table = self.table
+        if len(table) >= self.HASHED_TABLE_LIMIT:
+            table.clear()
+        i = feature_index(token, self.n_features)
+        idf = float(self._idf[i]) if self._idf is not None else 1.0
+        entry = table[token] = (idf, tuple(float(row[i]) for row in self._feature_log_prob))
+        return entry
+
+    def joint_log_likelihood(self, text):
+        if self.lowercase:
+            text = text.lower()
+        table = self.table
+        if self.n_features:
+            counts = Counter(self.tokenize(text))
+        else:
+            counts = Counter(token for token in self.tokenize(text) if token in table)
+
+        terms = []
+        for token, count in counts.items():
+            entry = table.get(token)
+            idf, weights = entry if entry is not None else self._hashed_entry(token)
+            tf = 1.0 if self.binary else float(count)
+            if self.sublinear_tf:
+                tf = math.log(tf) + 1.0
+            terms.append((tf * idf, weights))
+
+        scores = list(self.class_log_prior)
+        if not terms:
+            return scores
+        if self.norm == "l2":
+            scale = math.sqrt(sum(v * v for v, _ in terms))
+        elif self.norm == "l1":
+            scale = sum(abs(v) for v, _ in terms)
+        else:
+            scale = 1.0
+        for v, weights in terms:
+            v /= scale
+            for k, w in enumerate(weights):
+                scores[k] += v * w
+        return scores
+
+    def predict(self, text):
+        scores = self.joint_log_likelihood(text)
+        return self.classes[scores.index(max(scores))]
+
+    def predict_proba(self, text):
+        scores = self.joint_log_likelihood(text)
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    def predict_with_confidence(self, text):
+        proba = self.predict_proba(text)
+        best = proba.index(max(proba))
+        return self.classes[best], proba[best]
+
+
+def _as_list(values):
+    return values.tolist() if hasattr(values, "tolist") else list(values)
@@ -0,0 +1,139 @@
+"""
+Contact directory and grouped fan-out for institution-wide alerts.
+
+ContactDirectory indexes registered contacts by (zone, channel) and by a
+coarse lat/lon grid, so selecting everyone with a given role inside a
+geofence only checks nearby grid cells before an exact distance filter.
+FanOut puts the selected recipients on the durable AlertQueue instead of
+sending them inline: one row per batch of email addresses (one BCC message
+per SMTP transaction) and one row per WhatsApp number. The queue workers
+deliver them with retries, so a large zone neither blocks the caller for the
+minutes Twilio's rate limit needs nor loses recipients to a rerun or restart.
+Row keys derive from the fan-out's key, so queueing the same alert twice (a
+second click, a retried request) returns the existing rows, and
+AlertQueue.group_status(key) reports progress.
+"""
+import csv
+import math
+from collections import defaultdict, namedtuple
+
+from geo import haversine_matrix
+
+Contact = namedtuple("Contact", "name role zone email whatsapp lat lon")
+CHANNELS = ("email", "whatsapp")
+KM_PER_DEG_LAT = 111.32
+
+
+class ContactDirectory:
+    def __init__(self, contacts=(), cell_deg=0.01):
+        self.cell_deg = cell_deg
+        self.contacts = []
+        self.by_zone_channel = defaultdict(list)
+        self.by_cell = defaultdict(list)
+        for contact in contacts:
+            self.add(contact)
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        """Columns: name, role, zone, email, whatsapp, lat, lon (blank values allowed)."""
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        return cls((_contact_from_row(row) for row in rows), **kwargs)
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def add(self, contact):
+        i = len(self.contacts)
+        self.contacts.append(contact)
+        for channel in CHANNELS:
+            if getattr(contact, channel):
+                self.by_zone_channel[(contact.zone, channel)].append(i)
+        if contact.lat is not None and contact.lon is not None:
+            self.by_cell[self._cell(contact.lat, contact.lon)].append(i)
+
+    def _within(self, lat, lon, radius_km):
+        dlat = radius_km / KM_PER_DEG_LAT
+        dlon = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        (y0, x0), (y1, x1) = self._cell(lat - dlat, lon - dlon), self._cell(lat + dlat, lon + dlon)
+        candidates = [i for y in range(y0, y1 + 1) for x in range(x0, x1 + 1) for i in self.by_cell.get((y, x), ())]
+        if not candidates:
+            return set()
+        lats = [self.contacts[i].lat for i in candidates]
+        lons = [self.contacts[i].lon for i in candidates]
+        distances = haversine_matrix([lat], [lon], lats, lons)[0]
+        return {i for i, d in zip(candidates, distances) if d <= radius_km}
+
+    def select(self, lat=None, lon=None, radius_km=None, zones=None, roles=None, channels=CHANNELS):
+        """
+        Recipients by channel for contacts inside the geofence (lat, lon, radius_km)
+        and/or in any of zones, optionally restricted to roles.
+        Returns {channel: [address, ...]} with duplicates removed.
+        """
+        ids = None
+        if zones is not None:
+            ids = {i for zone in zones for channel in channels for i in self.by_zone_channel.get((zone, channel), ())}
+        if radius_km is not None:
+            inside = self._within(lat, lon, radius_km)
+            ids = inside if ids is None else ids | inside
+        if ids is None:
+            ids = range(len(self.contacts))
+        roles = set(roles) if roles is not None else None
+
+        recipients = {channel: {} for channel in channels}
+        for i in sorted(ids):
+            contact = self.contacts[i]
+            if roles is not None and contact.role not in roles:
+                continue
+            for channel in channels:
+                address = getattr(contact, channel)
+                if address:
+                    recipients[channel][address] = None
+        return {channel: list(addresses) for channel, addresses in recipients.items()}
+
+
+def _contact_from_row(row):
+    def number(value):
+        return float(value) if value not in (None, "") else None
+
+    return Contact(
+        name=row.get("name", ""),
+        role=row.get("role") or None,
+        zone=row.get("zone") or None,
+        email=row.get("email") or None,
+        whatsapp=row.get("whatsapp") or None,
+        lat=number(row.get("lat")),
+        lon=number(row.get("lon")),
+    )
+
+
+class FanOut:
+    """
+    queue: an AlertQueue with "email" and "whatsapp" handlers (see utils.get_alert_queue).
+    batch_sizes caps the addresses per queued row for each channel.
+    """
+
+    def __init__(self, queue, batch_sizes=None):
+        self.queue = queue
+        self.batch_sizes = {"email": 100, "whatsapp": 1, **(batch_sizes or {})}
+
+    def rows(self, subject, body, recipients_by_channel, key):
+        """(channel, payload, row key) for every batch of recipients."""
+        for channel, recipients in recipients_by_channel.items():
+            size = self.batch_sizes.get(channel, 1)
+            for i in range(0, len(recipients), size):
+                batch = recipients[i:i + size]
+                if channel == "email":
+                    payload = {"subject": subject, "body": body, "to_email": batch}
+                else:
+                    payload = {"message": body, "to": batch[0] if len(batch) == 1 else batch}
+                yield channel, payload, f"{key}:{channel}:{batch[0]}"
+
+    def enqueue(self, subject, body, recipients_by_channel, key):
+        """Queue every recipient under key; returns {channel: [alert_id, ...]}."""
+        rows = list(self.rows(subject, body, recipients_by_channel, key))
+        ids = self.queue.enqueue_many(rows)
+        alerts = {channel: [] for channel in recipients_by_channel}
+        for (channel, _, _), alert_id in zip(rows, ids):
+            alerts[channel].append(alert_id)
+        return alerts
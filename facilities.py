@@ -0,0 +1,142 @@
+"""
+Nearest-facility lookup over hospital / police / fire-station datasets.
+
+Facilities are loaded from a CSV (columns: type or amenity, name, lat, lon and
+optional phone, address) or a GeoJSON FeatureCollection of Points (same keys in
+properties). Each place type gets its own KD-tree over unit-sphere xyz
+coordinates, where straight-line (chord) distance is monotonic in great-circle
+distance, so k-nearest and radius queries are exact and O(log n).
+"""
+import csv
+import json
+import math
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from geo import EARTH_RADIUS_KM
+
+# Dataset spellings -> the place_type values used by find_nearby
+PLACE_TYPES = {
+    "hospital": "hospital", "clinic": "hospital",
+    "police": "police", "police_station": "police",
+    "fire": "fire_station", "fire_station": "fire_station",
+}
+
+
+def to_unit_xyz(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord, 2.0) / 2)
+
+
+def km_to_chord(km):
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+class _TypeIndex:
+    def __init__(self, lats, lons, names, phones, addresses):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.names = names
+        self.phones = phones
+        self.addresses = addresses
+        self.tree = cKDTree(to_unit_xyz(self.lats, self.lons))
+
+    def __len__(self):
+        return len(self.names)
+
+
+class FacilityIndex:
+    def __init__(self, records):
+        columns = {}
+        for r in records:
+            place_type = PLACE_TYPES.get(str(r.get("type", "")).strip().lower())
+            if place_type is None:
+                continue
+            try:
+                lat, lon = float(r["lat"]), float(r["lon"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            cols = columns.setdefault(place_type, ([], [], [], [], []))
+            cols[0].append(lat)
+            cols[1].append(lon)
+            cols[2].append(r.get("name") or "Unknown")
+            cols[3].append(r.get("phone") or "N/A")
+            cols[4].append(r.get("address") or "")
+        self.types = {t: _TypeIndex(*cols) for t, cols in columns.items()}
+
+    def __len__(self):
+        return sum(len(t) for t in self.types.values())
+
+    def nearest(self, lat, lon, place_type="hospital", k=5, radius_km=None):
+        """Return up to k facilities of place_type sorted by distance (within radius_km if given)."""
+        index = self.types.get(PLACE_TYPES.get(place_type, place_type))
+        if index is None or k <= 0:
+            return []
+        k = min(k, len(index))
+        bound = km_to_chord(radius_km) if radius_km is not None else np.inf
+        # distance_upper_bound is exclusive (and compared squared); pad it, then keep the
+        # boundary inclusive like within()'s query_ball_point
+        chords, ids = index.tree.query(to_unit_xyz(lat, lon), k=k, distance_upper_bound=bound + 1e-9)
+        chords, ids = np.atleast_1d(chords), np.atleast_1d(ids)
+        found = (ids < len(index)) & (chords <= bound)
+        return [_result(index, i, km) for i, km in zip(ids[found], chord_to_km(chords[found]))]
+
+    def within(self, lat, lon, place_type="hospital", radius_km=10.0):
+        """Return every facility of place_type within radius_km, closest first (for map overlays)."""
+        index = self.types.get(PLACE_TYPES.get(place_type, place_type))
+        if index is None:
+            return []
+        centre = to_unit_xyz(lat, lon)
+        ids = np.asarray(index.tree.query_ball_point(centre, km_to_chord(radius_km)), dtype=np.intp)
+        if not len(ids):
+            return []
+        km = chord_to_km(np.linalg.norm(index.tree.data[ids] - centre, axis=1))
+        order = np.argsort(km)
+        return [_result(index, i, d) for i, d in zip(ids[order], km[order])]
+
+
+def _result(index, i, km):
+    return {
+        "display_name": index.names[i],
+        "contact:phone": index.phones[i],
+        "lat": float(index.lats[i]),
+        "lon": float(index.lons[i]),
+        "address": index.addresses[i],
+        "distance_km": round(float(km), 2),
+    }
+
+
+def load_facilities(path):
+    """Read facility records from a .csv or .geojson/.json file."""
+    if path.endswith((".geojson", ".json")):
+        with open(path, encoding="utf-8") as f:
+            features = json.load(f).get("features", [])
+        records = []
+        for feature in features:
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") != "Point":
+                continue
+            props = feature.get("properties") or {}
+            lon, lat = geometry["coordinates"][:2]
+            records.append(_normalise(props, lat, lon))
+        return records
+    with open(path, newline="", encoding="utf-8") as f:
+        return [_normalise(row, row.get("lat"), row.get("lon")) for row in csv.DictReader(f)]
+
+
+def _normalise(row, lat, lon):
+    return {
+        "type": row.get("type") or row.get("amenity"),
+        "name": row.get("name") or row.get("display_name"),
+        "phone": row.get("phone") or row.get("contact:phone"),
+        "address": row.get("address") or row.get("addr:full"),
+        "lat": lat,
+        "lon": lon,
+    }
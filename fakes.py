@@ -0,0 +1,172 @@
+"""
+Local stand-ins for the external HTTP services the app talks to.
+
+Each fake runs a ThreadingHTTPServer on 127.0.0.1 in a daemon thread and is
+used as a context manager:
+
+    with FakeNominatim() as fake:
+        cache = POICache(":memory:", base_url=fake.url)
+
+They exist for benchmarks and offline development, not production.
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real services
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.fake.count(url.path)
+        self.send_json(*self.server.fake.handle_get(url.path, parse_qs(url.query), self.headers))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        self.server.fake.count(url.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+        self.send_json(*self.server.fake.handle_post(url.path, parse_qs(body), self.headers))
+
+
+class FakeServer:
+    handler = _Handler
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), self.handler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, path):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def handle_get(self, path, query, headers):
+        """Return (status, json_payload) or (status, json_payload, extra_headers)."""
+        return 404, {"error": "not found"}
+
+    def handle_post(self, path, form, headers):
+        return 404, {"error": "not found"}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeNominatim(FakeServer):
+    """Answers /search with deterministic pseudo-POIs inside the requested viewbox."""
+
+    def __init__(self, per_query=10, **kwargs):
+        super().__init__(**kwargs)
+        self.per_query = per_query
+
+    def handle_get(self, path, query, headers):
+        if path != "/search":
+            return super().handle_get(path, query, headers)
+        place = query.get("q", ["place"])[0]
+        left, top, right, bottom = (float(v) for v in query["viewbox"][0].split(","))
+        seed = hashlib.sha256(f"{place}{left}{top}".encode()).digest()
+        results = []
+        for i in range(min(self.per_query, int(query.get("limit", [self.per_query])[0]))):
+            fx, fy = seed[i % 32] / 255, seed[(i + 7) % 32] / 255
+            results.append({
+                "place_id": int.from_bytes(seed[:4], "big") + i,
+                "display_name": f"{place.title()} {i}, Test City",
+                "lat": str(bottom + (top - bottom) * fy),
+                "lon": str(left + (right - left) * fx),
+                "type": place,
+            })
+        return 200, results
+
+
+class FakeIpApi(FakeServer):
+    """ip-api.com compatible /json/<ip> endpoint with an optional artificial delay."""
+
+    def __init__(self, delay=0.0, fail=False, **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.fail = fail
+
+    def handle_get(self, path, query, headers):
+        if not path.startswith("/json"):
+            return super().handle_get(path, query, headers)
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            return 503, {"status": "fail", "message": "unavailable"}
+        ip = path[len("/json/"):] or "203.0.113.1"
+        seed = hashlib.sha256(ip.encode()).digest()
+        return 200, {
+            "status": "success",
+            "query": ip,
+            "lat": 8.0 + seed[0] / 255 * 27,
+            "lon": 68.0 + seed[1] / 255 * 29,
+            "city": f"City {seed[2]}",
+        }
+
+
+class FakeTwilio(FakeServer):
+    """
+    Twilio Messages endpoint (POST /2010-04-01/Accounts/<sid>/Messages.json).
+    Accepts at most `rate` messages per second and answers 429 with Retry-After
+    beyond that, like the real API; accepted messages are kept in .messages.
+    """
+
+    def __init__(self, rate=100.0, latency=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.rate = rate
+        self.latency = latency
+        self.messages = []
+        self.rejected = 0
+        self._window = (0, 0)  # (second, count)
+
+    def handle_post(self, path, form, headers):
+        if not (path.startswith("/2010-04-01/Accounts/") and path.endswith("/Messages.json")):
+            return super().handle_post(path, form, headers)
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            second = int(time.monotonic())
+            count = self._window[1] + 1 if self._window[0] == second else 1
+            if count > self.rate:
+                self.rejected += 1
+                return 429, {"code": 20429, "message": "Too Many Requests"}, {"Retry-After": "1"}
+            self._window = (second, count)
+            sid = f"SM{len(self.messages):032x}"
+            self.messages.append({"sid": sid, "to": form["To"][0], "from": form["From"][0], "body": form["Body"][0]})
+        return 201, {"sid": sid, "status": "queued", "to": form["To"][0]}
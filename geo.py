@@ -0,0 +1,145 @@
+"""
+Great-circle distance helpers shared by the app, find_nearby and dispatch.
+
+haversine() is the scalar version for a single pair. haversine_matrix()
+takes arrays and returns an incidents x facilities float32 matrix; pass
+chunk_rows (and optionally an out= np.memmap) when the full float64
+intermediate would not fit in memory.
+"""
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+NEAREST_CANDIDATES = 8  # closest units sorted per incident before widening
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Calculate the distance in kilometers between two latitude/longitude points using the Haversine formula.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return round(EARTH_RADIUS_KM * c, 2)
+
+
+def _haversine_block(phi1, lam1, cos1, phi2, lam2, cos2):
+    # Rows come from the first point set, columns from the second
+    a = np.sin((phi2 - phi1[:, None]) / 2) ** 2
+    a += cos1[:, None] * cos2 * np.sin((lam2 - lam1[:, None]) / 2) ** 2
+    np.clip(a, 0.0, 1.0, out=a)
+    return (2 * EARTH_RADIUS_KM) * np.arcsin(np.sqrt(a))
+
+
+def _prepare(lats, lons):
+    phi = np.radians(np.atleast_1d(np.asarray(lats, dtype=np.float64)))
+    lam = np.radians(np.atleast_1d(np.asarray(lons, dtype=np.float64)))
+    if phi.shape != lam.shape or phi.ndim != 1:
+        raise ValueError("latitudes and longitudes must be 1-D arrays of equal length")
+    return phi, lam, np.cos(phi)
+
+
+def iter_haversine_chunks(lat1, lon1, lat2, lon2, chunk_rows=1024):
+    """Yield (row_start, float32 block) covering the distance matrix chunk_rows rows at a time."""
+    phi1, lam1, cos1 = _prepare(lat1, lon1)
+    phi2, lam2, cos2 = _prepare(lat2, lon2)
+    for start in range(0, len(phi1), chunk_rows):
+        stop = start + chunk_rows
+        block = _haversine_block(phi1[start:stop], lam1[start:stop], cos1[start:stop], phi2, lam2, cos2)
+        yield start, block.astype(np.float32)
+
+
+def haversine_matrix(lat1, lon1, lat2, lon2, chunk_rows=None, out=None):
+    """
+    Distances in km from every (lat1, lon1) point to every (lat2, lon2) point.
+    Returns a float32 array of shape (len(lat1), len(lat2)), written into out if given.
+    """
+    n, m = np.size(lat1), np.size(lat2)
+    if out is None:
+        out = np.empty((n, m), dtype=np.float32)
+    elif out.shape != (n, m):
+        raise ValueError(f"out has shape {out.shape}, expected {(n, m)}")
+    for start, block in iter_haversine_chunks(lat1, lon1, lat2, lon2, chunk_rows or max(n, 1)):
+        out[start:start + len(block)] = block
+    return out
+
+
+def assign_nearest_units(incident_lats, incident_lons, unit_lats, unit_lons,
+                         available=None, max_km=None, chunk_rows=1024, k=NEAREST_CANDIDATES):
+    """
+    Greedily pair incidents with the nearest available unit, closest pairs first.
+
+    Each unit is used at most once. Returns (unit_index, distance_km) arrays with
+    one entry per incident; unassigned incidents get -1 and inf.
+
+    Only each incident's k closest units are sorted. If an incident loses all
+    of them to closer pairs, the assignments that sort before its k-th
+    distance are kept (the full greedy pass would make the same ones), and the
+    incidents still open are rerun against the unused units with k doubled.
+    """
+    n = np.size(incident_lats)
+    unit_ids = np.arange(np.size(unit_lats))
+    if available is not None:
+        unit_ids = unit_ids[np.asarray(available, dtype=bool)]
+    assigned = np.full(n, -1, dtype=np.int64)
+    distances = np.full(n, np.inf, dtype=np.float32)
+    incident_lats, incident_lons = np.asarray(incident_lats), np.asarray(incident_lons)
+    unit_lats, unit_lons = np.asarray(unit_lats), np.asarray(unit_lons)
+    open_ids = np.arange(n)
+
+    while len(open_ids) and len(unit_ids):
+        k = min(k, len(unit_ids))
+        rows, cols, dists, kth = [], [], [], []
+        for start, block in iter_haversine_chunks(incident_lats[open_ids], incident_lons[open_ids],
+                                                  unit_lats[unit_ids], unit_lons[unit_ids], chunk_rows):
+            if k < block.shape[1]:
+                top = np.argpartition(block, k - 1, axis=1)[:, :k]
+            else:
+                top = np.tile(np.arange(k), (len(block), 1))
+            top_dists = np.take_along_axis(block, top, axis=1)
+            rows.append(np.repeat(np.arange(start, start + len(block)), k))
+            cols.append(top.ravel())
+            dists.append(top_dists.ravel())
+            kth.append(top_dists.max(axis=1))
+        rows, cols, dists, kth = np.concatenate(rows), np.concatenate(cols), np.concatenate(dists), np.concatenate(kth)
+        if max_km is not None:
+            keep = dists <= max_km
+            rows, cols, dists = rows[keep], cols[keep], dists[keep]
+
+        picked = np.full(len(open_ids), -1, dtype=np.int64)
+        used = np.zeros(len(unit_ids), dtype=bool)
+        picks = []  # (row, col, distance) in increasing distance
+        for i in np.argsort(dists, kind="stable"):
+            r, c = rows[i], cols[i]
+            if picked[r] >= 0 or used[c]:
+                continue
+            picked[r], used[c] = c, True
+            picks.append((r, c, dists[i]))
+            if len(picks) == len(open_ids):
+                break
+
+        # Incidents left without a pick although units beyond their k closest might still fit
+        exhausted = picked < 0
+        if k == len(unit_ids):
+            exhausted[:] = False
+        elif max_km is not None:
+            exhausted &= kth <= max_km
+        frontier = kth[exhausted].min() if exhausted.any() else np.inf
+        done_rows, done_cols = [], []
+        for r, c, d in picks:
+            if d >= frontier:
+                break
+            assigned[open_ids[r]], distances[open_ids[r]] = unit_ids[c], d
+            done_rows.append(r)
+            done_cols.append(c)
+        if not exhausted.any():
+            break
+        open_ids = np.delete(open_ids, done_rows)
+        unit_ids = np.delete(unit_ids, done_cols)
+        k *= 2
+    return assigned, distances
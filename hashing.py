@@ -0,0 +1,48 @@
+"""
+Pure-Python MurmurHash3 (x86, 32-bit) matching sklearn's HashingVectorizer.
+
+Lets the bundle and compiled classifiers map tokens to hashed feature columns
+without importing sklearn at serving time.
+"""
+
+_C1 = 0xCC9E2D51
+_C2 = 0x1B873593
+_MASK = 0xFFFFFFFF
+
+
+def murmurhash3_32(key, seed=0):
+    """Signed 32-bit MurmurHash3 of key (str is hashed as UTF-8), like sklearn.utils.murmurhash3_32."""
+    data = key.encode("utf-8") if isinstance(key, str) else bytes(key)
+    length = len(data)
+    h = seed & _MASK
+    end = length & ~3
+
+    for i in range(0, end, 4):
+        k = int.from_bytes(data[i:i + 4], "little")
+        k = (k * _C1) & _MASK
+        k = ((k << 15) | (k >> 17)) & _MASK
+        k = (k * _C2) & _MASK
+        h ^= k
+        h = ((h << 13) | (h >> 19)) & _MASK
+        h = (h * 5 + 0xE6546B64) & _MASK
+
+    tail = length & 3
+    if tail:
+        k = int.from_bytes(data[end:], "little")
+        k = (k * _C1) & _MASK
+        k = ((k << 15) | (k >> 17)) & _MASK
+        k = (k * _C2) & _MASK
+        h ^= k
+
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & _MASK
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & _MASK
+    h ^= h >> 16
+    return h - 0x100000000 if h & 0x80000000 else h
+
+
+def feature_index(token, n_features):
+    """Column HashingVectorizer(alternate_sign=False) puts token in."""
+    return abs(murmurhash3_32(token)) % n_features
@@ -0,0 +1,35 @@
+"""
+Fast language identification for SOS texts by Unicode script.
+
+Pure-ASCII text (the common case) is English after a single str.isascii()
+call, with no per-character Python loop. Other texts are labelled by the
+script most of their letters belong to: Latin is English, Devanagari is
+Hindi and Gurmukhi is Punjabi. So "fire आग" stays English while a Hindi
+sentence with one English word is Hindi. Romanised Hindi/Punjabi is ASCII
+and so goes to the English model.
+"""
+
+DEFAULT_LANGUAGE = "en"
+
+# (language, first code point, last code point)
+SCRIPTS = (
+    ("hi", 0x0900, 0x097F),  # Devanagari
+    ("pa", 0x0A00, 0x0A7F),  # Gurmukhi
+)
+
+
+def detect_language(text, default=DEFAULT_LANGUAGE):
+    if text.isascii():
+        return default
+    counts = {}
+    for ch in text:
+        code = ord(ch)
+        if code < 0x0900:
+            if ch.isalpha():  # Latin (and any other alphabet below Devanagari)
+                counts[default] = counts.get(default, 0) + 1
+            continue
+        for language, first, last in SCRIPTS:
+            if first <= code <= last:
+                counts[language] = counts.get(language, 0) + 1
+                break
+    return max(counts, key=counts.get) if counts else default
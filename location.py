@@ -0,0 +1,128 @@
+"""
+IP geolocation with pooled connections, strict deadlines and a per-IP cache.
+
+LocationProvider tries each upstream in order until one answers within its
+connect/read timeouts. Each call's timeouts are cut to the time left before
+the deadline, so the whole lookup stays within it. Results are cached per
+client IP (LRU with TTL), so every Streamlit session or API caller gets its
+own location instead of the server's, and repeat lookups are served from
+memory. Concurrent misses for the same IP share one lookup: the first caller
+queries the upstreams and the others wait for its answer.
+"""
+import ipaddress
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class Upstream:
+    def __init__(self, name, url_for, parse):
+        self.name = name
+        self.url_for = url_for
+        self.parse = parse
+
+
+def _parse_ip_api(data):
+    if data.get("status") == "fail":
+        raise ValueError(data.get("message", "lookup failed"))
+    return data["lat"], data["lon"], data.get("city")
+
+
+def _parse_ipapi_co(data):
+    if data.get("error"):
+        raise ValueError(data.get("reason", "lookup failed"))
+    return data["latitude"], data["longitude"], data.get("city")
+
+
+def _parse_ipinfo(data):
+    lat, lon = data["loc"].split(",")
+    return float(lat), float(lon), data.get("city")
+
+
+DEFAULT_UPSTREAMS = [
+    Upstream("ip-api", lambda ip: f"http://ip-api.com/json/{ip}", _parse_ip_api),
+    Upstream("ipapi.co", lambda ip: f"https://ipapi.co/{ip + '/' if ip else ''}json/", _parse_ipapi_co),
+    Upstream("ipinfo", lambda ip: f"https://ipinfo.io/{ip + '/' if ip else ''}json", _parse_ipinfo),
+]
+
+
+def public_ip(ip):
+    """Return ip if it is a routable address an upstream can locate, else '' (use the server's own)."""
+    try:
+        return ip if ip and ipaddress.ip_address(ip).is_global else ""
+    except ValueError:
+        return ""
+
+
+class LocationProvider:
+    def __init__(self, upstreams=None, connect_timeout=1.0, read_timeout=2.0, deadline=4.0,
+                 cache_size=4096, ttl=300, pool_size=16):
+        self.upstreams = list(upstreams or DEFAULT_UPSTREAMS)
+        self.timeout = (connect_timeout, read_timeout)
+        self.deadline = deadline
+        self.cache_size = cache_size
+        self.ttl = ttl
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.upstreams), pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._cache = OrderedDict()
+        self._inflight = {}  # ip -> Event set when the lookup in progress finishes
+        self._lock = threading.Lock()
+
+    def _cached(self, ip):
+        """Cached location for ip, or None; call with self._lock held."""
+        hit = self._cache.get(ip)
+        if hit and hit[0] > time.monotonic():
+            self._cache.move_to_end(ip)
+            return hit[1]
+        return None
+
+    def locate(self, client_ip=None):
+        """Return (lat, lon, city) for client_ip (or this server), or (None, None, None)."""
+        ip = public_ip(client_ip)
+        with self._lock:
+            location = self._cached(ip)
+            if location is not None:
+                return location
+            done = self._inflight.get(ip)
+            leader = done is None
+            if leader:
+                done = self._inflight[ip] = threading.Event()
+        if not leader:
+            done.wait(self.deadline)
+            with self._lock:
+                return self._cached(ip) or (None, None, None)
+        try:
+            return self._lookup(ip)
+        finally:
+            with self._lock:
+                del self._inflight[ip]
+            done.set()
+
+    def _lookup(self, ip):
+        started = time.monotonic()
+        connect_timeout, read_timeout = self.timeout
+        for upstream in self.upstreams:
+            remaining = self.deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            try:
+                response = self.session.get(
+                    upstream.url_for(ip), timeout=(min(connect_timeout, remaining), min(read_timeout, remaining))
+                )
+                response.raise_for_status()
+                location = upstream.parse(response.json())
+            except (requests.RequestException, ValueError, KeyError) as e:
+                print(f"Location lookup via {upstream.name} failed: {e}")
+                continue
+            with self._lock:
+                self._cache[ip] = (time.monotonic() + self.ttl, location)
+                self._cache.move_to_end(ip)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            return location
+        return None, None, None
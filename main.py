@@ -1,10 +1,3 @@
-import os
-from twilio.rest import Client
-
-account_sid = os.environ.get("TWILIO_ACCOUNT_SID")
-auth_token = os.environ.get("TWILIO_AUTH_TOKEN")
-client = Client(account_sid, auth_token)
-
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -0,0 +1,180 @@
+"""
+Map rendering for the location tab.
+
+The base map (tiles plus the "you are here" marker) only depends on where the
+user is and the zoom level, so it is built once per rounded position and
+reused on every rerun. The cache belongs to the caller (the app keeps one per
+Streamlit session), so sessions never share a folium.Map. Facilities and incidents go on separate overlays that
+st_folium ships through feature_group_to_add, so adding points never resends
+the base map.
+
+Each overlay picks a representation by size:
+  - up to MARKER_LIMIT points: one marker per point, with a popup
+  - up to CLUSTER_LIMIT points: FastMarkerCluster, which sends the points as
+    a compact array and clusters them in the browser
+  - beyond that: points are binned into grid cells on the server and each
+    non-empty cell is drawn as one circle labelled with its count
+"""
+import math
+from collections import OrderedDict
+
+MARKER_LIMIT = 200
+CLUSTER_LIMIT = 20_000
+BASE_MAP_CACHE_SIZE = 4
+
+# Rounding base-map centres to 3 decimals (~100 m) keeps GPS jitter from rebuilding the map
+COORD_PRECISION = 3
+
+
+def view_key(lat, lon, zoom, precision=COORD_PRECISION):
+    return round(float(lat), precision), round(float(lon), precision), int(zoom)
+
+
+def base_map(cache, lat, lon, zoom=15, label=None, precision=COORD_PRECISION):
+    """
+    Return the folium.Map for this rounded position and zoom from cache (an OrderedDict
+    owned by one session), building it on first use.
+    """
+    key = view_key(lat, lon, zoom, precision) + (label,)
+    cached = cache.get(key)
+    if cached is not None:
+        cache.move_to_end(key)
+        return cached
+
+    import folium # type: ignore
+    m = folium.Map(location=key[:2], zoom_start=key[2])
+    folium.Marker(key[:2], tooltip="You are here", popup=label).add_to(m)
+
+    cache[key] = m
+    while len(cache) > BASE_MAP_CACHE_SIZE:
+        cache.popitem(last=False)
+    return m
+
+
+def point_key(point):
+    return point["lat"], point["lon"], point.get("display_name")
+
+
+def aggregate(points, cell_deg):
+    """Bin points into cell_deg x cell_deg cells; return [(lat, lon, count)] at each cell's centroid."""
+    cells = {}
+    for p in points:
+        lat, lon = float(p["lat"]), float(p["lon"])
+        cell = (math.floor(lat / cell_deg), math.floor(lon / cell_deg))
+        acc = cells.get(cell)
+        if acc is None:
+            cells[cell] = [lat, lon, 1]
+        else:
+            acc[0] += lat
+            acc[1] += lon
+            acc[2] += 1
+    return [(s_lat / n, s_lon / n, n) for s_lat, s_lon, n in cells.values()]
+
+
+class MapOverlay:
+    """
+    A named set of points (e.g. hospitals) drawn as one FeatureGroup.
+    add() keeps only points it hasn't seen, and the FeatureGroup is rebuilt
+    only when that delta is non-empty. While the overlay stays in plain-marker
+    mode, new points are appended to the existing group instead.
+    """
+
+    def __init__(self, name, color="red", icon="plus", marker_limit=MARKER_LIMIT,
+                 cluster_limit=CLUSTER_LIMIT, cell_deg=0.05, key=point_key):
+        self.name = name
+        self.color = color
+        self.icon = icon
+        self.marker_limit = marker_limit
+        self.cluster_limit = cluster_limit
+        self.cell_deg = cell_deg
+        self.key = key
+        self.points = OrderedDict()
+        self._group = None
+        self._mode = None
+
+    def __len__(self):
+        return len(self.points)
+
+    @property
+    def mode(self):
+        n = len(self.points)
+        if n <= self.marker_limit:
+            return "markers"
+        if n <= self.cluster_limit:
+            return "cluster"
+        return "aggregate"
+
+    def add(self, points):
+        """Add points, returning the ones that were new (the delta)."""
+        delta = []
+        for p in points:
+            k = self.key(p)
+            if k not in self.points:
+                self.points[k] = p
+                delta.append(p)
+        if delta and self._group is not None:
+            if self._mode == "markers" and self.mode == "markers":
+                self._add_markers(self._group, delta)
+            else:
+                self._group = None
+        return delta
+
+    def clear(self):
+        self.points.clear()
+        self._group = None
+
+    def feature_group(self):
+        if self._group is None:
+            self._group, self._mode = self._build(), self.mode
+        return self._group
+
+    def _build(self):
+        import folium # type: ignore
+        group = folium.FeatureGroup(name=f"{self.name} ({len(self.points)})")
+        mode = self.mode
+        if mode == "markers":
+            self._add_markers(group, self.points.values())
+        elif mode == "cluster":
+            from folium.plugins import FastMarkerCluster # type: ignore
+            data = [[p["lat"], p["lon"], _popup_text(p)] for p in self.points.values()]
+            FastMarkerCluster(data, callback=_CLUSTER_CALLBACK).add_to(group)
+        else:
+            for lat, lon, count in aggregate(self.points.values(), self.cell_deg):
+                folium.CircleMarker(
+                    [lat, lon],
+                    radius=4 + 3 * math.log10(count + 1),
+                    color=self.color,
+                    fill=True,
+                    fill_opacity=0.6,
+                    tooltip=f"{count} {self.name.lower()}",
+                ).add_to(group)
+        return group
+
+    def _add_markers(self, group, points):
+        import folium # type: ignore
+        for p in points:
+            folium.Marker(
+                [p["lat"], p["lon"]],
+                tooltip=p.get("display_name"),
+                popup=_popup_text(p),
+                icon=folium.Icon(color=self.color, icon=self.icon),
+            ).add_to(group)
+
+
+def _popup_text(p):
+    parts = [str(p.get("display_name") or "")]
+    if p.get("contact:phone"):
+        parts.append(f"📞 {p['contact:phone']}")
+    if p.get("distance_km") is not None:
+        parts.append(f"📏 {p['distance_km']} km")
+    return " · ".join(part for part in parts if part)
+
+
+# Runs in the browser for each point of a FastMarkerCluster: [lat, lon, popup]
+_CLUSTER_CALLBACK = """
+function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.bindPopup(row[2]);
+    return marker;
+};
+"""
@@ -0,0 +1,142 @@
+"""
+Long-lived WhatsApp/SMS client for the Twilio Messages API.
+
+One TwilioMessagingClient per process reuses a pooled keep-alive session
+instead of building a twilio.rest.Client (and a new TLS connection) per
+alert. Sends pass through a token bucket so bursts stay under the account's
+per-second limit: callers block until a token is free or their timeout
+expires (backpressure) and 429 responses are retried after Retry-After.
+
+send_many() reports each recipient separately, so a caller can retry just
+the ones that failed. By default every send in a fan-out may wait for its
+turn in the bucket: at the default TWILIO_RATE_PER_SEC=1, 100 numbers take
+about 100 s, rather than raising RateLimited after a fixed 30 s wait.
+A timeout bounds a send or a whole fan-out instead: the token wait, the
+HTTP timeouts and any Retry-After pause all fit in the time left.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TWILIO_API_URL = "https://api.twilio.com"
+SEND_WAIT = 30.0  # seconds one send may wait for a token, on top of its place in a fan-out
+
+
+class TwilioError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class RateLimited(TwilioError):
+    def __init__(self, message="rate limit: no send token available in time"):
+        super().__init__(429, message)
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1.0, timeout=None):
+        """Take tokens, waiting up to timeout seconds (forever if None). Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class TwilioMessagingClient:
+    def __init__(self, account_sid, auth_token, from_, base_url=TWILIO_API_URL, rate=1.0, burst=None,
+                 pool_size=8, timeout=(3.05, 10), max_retries=3):
+        self.from_ = from_
+        self.url = f"{base_url.rstrip('/')}/2010-04-01/Accounts/{account_sid}/Messages.json"
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate, burst)
+        self.session = requests.Session()
+        self.session.auth = (account_sid, auth_token)
+        self.session.mount(base_url, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self._pool_size = pool_size
+
+    def send(self, to, body, wait=SEND_WAIT, deadline=None):
+        """
+        Send one message and return its sid. Raises RateLimited if no token frees up within wait.
+        deadline (time.monotonic()) bounds the whole send, retries included.
+        """
+        for attempt in range(self.max_retries + 1):
+            if not self.bucket.acquire(timeout=_capped(wait, deadline)):
+                raise RateLimited()
+            response = self.session.post(
+                self.url, data={"From": self.from_, "To": to, "Body": body},
+                timeout=tuple(_capped(t, deadline) for t in self.timeout),
+            )
+            if response.status_code == 429 and attempt < self.max_retries:
+                retry_after = float(response.headers.get("Retry-After", 1))
+                if deadline is not None and time.monotonic() + retry_after >= deadline:
+                    raise RateLimited("rate limit: throttled past the send deadline")
+                time.sleep(retry_after)
+                continue
+            if response.status_code >= 400:
+                try:
+                    message = response.json().get("message", response.text)
+                except ValueError:
+                    message = response.text
+                raise TwilioError(response.status_code, message)
+            return response.json()["sid"]
+        raise RateLimited("rate limit: still throttled after retries")
+
+    def send_many(self, recipients, body, wait=None, timeout=None):
+        """
+        Send body to every recipient concurrently; returns {recipient: sid or exception}.
+        wait=None allows SEND_WAIT plus the time the bucket needs to pace the whole list.
+        timeout bounds the whole fan-out; sends still unfinished then fail.
+        """
+        recipients = list(recipients)
+        if wait is None:
+            wait = SEND_WAIT + len(recipients) / self.bucket.rate
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def one(to):
+            try:
+                return self.send(to, body, wait=wait, deadline=deadline)
+            except (TwilioError, requests.RequestException) as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=min(self._pool_size, max(1, len(recipients)))) as executor:
+            return dict(zip(recipients, executor.map(one, recipients)))
+
+
+def _capped(seconds, deadline):
+    """seconds, or less if deadline (time.monotonic()) comes sooner; raises once it has passed."""
+    if deadline is None:
+        return seconds
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise RateLimited("send deadline passed")
+    return min(seconds, remaining)
+
+
+def failed_recipients(results):
+    """The recipients of a send_many() result whose send raised."""
+    return [to for to, result in results.items() if isinstance(result, Exception)]
@@ -0,0 +1,287 @@
+"""
+Single-file, memory-mappable model bundle.
+
+Layout (little endian):
+
+    header   64 bytes: magic, format version, metadata length,
+             payload offset, payload length, sha256 of everything after the header
+    metadata UTF-8 JSON: classes, vectorizer settings and a section table
+    payload  64-byte aligned sections: the vocabulary (newline separated terms
+             in feature order) and float32 arrays idf, class_log_prior and
+             feature_log_prob (n_classes x n_features, row major)
+
+Version 2 adds hashed features: metadata["vectorizer"]["kind"] is "hashing"
+and there is no vocabulary section; tokens map to columns by MurmurHash3, the
+same as sklearn's HashingVectorizer(alternate_sign=False). Version 1 bundles
+(always vocabulary based) still load. Version 2 bundles may also carry the
+model's float64 feature_count and class_count (plus alpha in the metadata),
+which is what online updates continue partial_fit from.
+
+Arrays are served straight from the page cache via mmap, so every worker on a
+host shares one copy and loading is a header parse rather than an unpickle.
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+
+import numpy as np
+
+from hashing import feature_index
+
+MAGIC = b"EMRBNDL\0"
+FORMAT_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+HEADER = struct.Struct("<8sII QQ 32s")
+ALIGN = 64
+
+_VECTORIZER_SETTINGS = ("token_pattern", "lowercase", "binary", "sublinear_tf", "norm", "use_idf")
+
+
+class BundleError(ValueError):
+    pass
+
+
+class BundleVectorizer:
+    """Read-only TfidfVectorizer (or HashingVectorizer) stand-in backed by bundle arrays."""
+
+    analyzer = "word"
+    ngram_range = (1, 1)
+    preprocessor = None
+    tokenizer = None
+    strip_accents = None
+
+    def __init__(self, terms, idf, settings, n_features=None):
+        self._terms = terms
+        self._vocabulary = None
+        self._columns = {}
+        self.hashing = terms is None
+        self.n_features = len(terms) if terms is not None else n_features
+        self.idf_ = idf
+        for name in _VECTORIZER_SETTINGS:
+            setattr(self, name, settings[name])
+        self._tokenize = re.compile(self.token_pattern).findall
+
+    @property
+    def vocabulary_(self):
+        if self.hashing:
+            raise AttributeError("hashed bundles have no vocabulary_")
+        if self._vocabulary is None:
+            self._vocabulary = {term: i for i, term in enumerate(self._terms)}
+        return self._vocabulary
+
+    def _column(self, token):
+        # Memoised hash; bounded so unusual input can't grow it without limit
+        columns = self._columns
+        if len(columns) > 1 << 16:
+            columns.clear()
+        j = columns[token] = feature_index(token, self.n_features)
+        return j
+
+    def transform(self, texts):
+        from scipy.sparse import csr_matrix
+
+        if self.hashing:
+            lookup = self._columns.get
+            column = self._column
+        else:
+            lookup = self.vocabulary_.get
+            column = None
+        indptr, indices, data = [0], [], []
+        for text in texts:
+            if self.lowercase:
+                text = text.lower()
+            counts = {}
+            for token in self._tokenize(text):
+                j = lookup(token)
+                if j is None and column is not None:
+                    j = column(token)
+                if j is not None:
+                    counts[j] = counts.get(j, 0) + 1
+            indices.extend(counts)
+            data.extend(counts.values())
+            indptr.append(len(indices))
+
+        X = csr_matrix((np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), indptr),
+                       shape=(len(indptr) - 1, self.n_features))
+        if self.binary:
+            X.data[:] = 1.0
+        if self.sublinear_tf:
+            np.log(X.data, X.data)
+            X.data += 1.0
+        if self.use_idf:
+            X.data *= self.idf_[X.indices]
+        if self.norm:
+            if self.norm == "l2":
+                row_norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+            else:
+                row_norms = np.asarray(abs(X).sum(axis=1)).ravel()
+            row_norms[row_norms == 0] = 1.0
+            X.data /= np.repeat(row_norms, np.diff(X.indptr))
+        return X
+
+
+class BundleModel:
+    """Read-only MultinomialNB stand-in backed by bundle arrays."""
+
+    def __init__(self, classes, class_log_prior, feature_log_prob, feature_count=None, class_count=None, alpha=1.0):
+        self.classes_ = np.asarray(classes, dtype=object)
+        self.class_log_prior_ = class_log_prior
+        self.feature_log_prob_ = feature_log_prob
+        self.feature_count_ = feature_count
+        self.class_count_ = class_count
+        self.alpha = alpha
+
+    def _joint_log_likelihood(self, X):
+        return np.asarray(X @ self.feature_log_prob_.T, dtype=np.float64) + self.class_log_prior_
+
+    def predict(self, X):
+        return self.classes_[self._joint_log_likelihood(X).argmax(axis=1)]
+
+    def predict_proba(self, X):
+        jll = self._joint_log_likelihood(X)
+        jll -= jll.max(axis=1, keepdims=True)
+        np.exp(jll, jll)
+        jll /= jll.sum(axis=1, keepdims=True)
+        return jll
+
+
+def is_hashing(vectorizer):
+    """True for HashingVectorizer and hashed BundleVectorizers."""
+    return getattr(vectorizer, "hashing", None) is True or (
+        not hasattr(vectorizer, "vocabulary_") and hasattr(vectorizer, "n_features")
+    )
+
+
+def write_bundle(path, model, vectorizer):
+    """Write model + vectorizer to path atomically (readers keep their old mapping)."""
+    hashing = is_hashing(vectorizer)
+    if hashing:
+        if getattr(vectorizer, "alternate_sign", False):
+            raise BundleError("Hashed bundles need HashingVectorizer(alternate_sign=False)")
+        terms = None
+        n_features = int(vectorizer.n_features)
+    else:
+        vocabulary = vectorizer.vocabulary_
+        terms = sorted(vocabulary, key=vocabulary.get)
+        if any("\n" in term for term in terms):
+            raise BundleError("Vocabulary terms may not contain newlines")
+        n_features = len(terms)
+    feature_log_prob = np.asarray(model.feature_log_prob_, dtype="<f4")
+    if feature_log_prob.shape[1] != n_features:
+        raise BundleError(
+            f"Model has {feature_log_prob.shape[1]} features but vectorizer has {n_features}"
+        )
+
+    use_idf = not hashing and getattr(vectorizer, "use_idf", True)
+    sections = {}
+    if terms is not None:
+        sections["vocabulary"] = "\n".join(terms).encode("utf-8")
+    if use_idf:
+        sections["idf"] = np.asarray(vectorizer.idf_, dtype="<f4")
+    sections["class_log_prior"] = np.asarray(model.class_log_prior_, dtype="<f4")
+    sections["feature_log_prob"] = feature_log_prob
+    if getattr(model, "feature_count_", None) is not None and getattr(model, "class_count_", None) is not None:
+        sections["feature_count"] = np.asarray(model.feature_count_, dtype="<f8")
+        sections["class_count"] = np.asarray(model.class_count_, dtype="<f8")
+    settings = {name: getattr(vectorizer, name, None) for name in _VECTORIZER_SETTINGS}
+    settings["use_idf"] = use_idf
+    settings["kind"] = "hashing" if hashing else "vocabulary"
+
+    payload = bytearray()
+    table = {}
+    for name, value in sections.items():
+        payload.extend(b"\0" * (-len(payload) % ALIGN))
+        if isinstance(value, bytes):
+            table[name] = {"offset": len(payload), "dtype": "bytes", "shape": [len(value)]}
+            payload.extend(value)
+        else:
+            value = np.ascontiguousarray(value)
+            table[name] = {"offset": len(payload), "dtype": value.dtype.str, "shape": list(value.shape)}
+            payload.extend(value.tobytes())
+
+    metadata = json.dumps({
+        "classes": [str(c) for c in model.classes_],
+        "n_features": n_features,
+        "alpha": float(getattr(model, "alpha", 1.0)),
+        "vectorizer": settings,
+        "sections": table,
+    }).encode("utf-8")
+    payload_offset = HEADER.size + len(metadata)
+    payload_offset += -payload_offset % ALIGN
+    body = metadata + b"\0" * (payload_offset - HEADER.size - len(metadata)) + payload
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(metadata), payload_offset, len(payload),
+                         hashlib.sha256(body).digest())
+
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_bundle(path, verify=True):
+    """Memory-map a bundle and return (model, vectorizer)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            raise BundleError(f"{path}: truncated header")
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, meta_len, payload_offset, payload_len, checksum = HEADER.unpack_from(buf)
+    if magic != MAGIC:
+        raise BundleError(f"{path}: not a model bundle")
+    if version not in SUPPORTED_VERSIONS:
+        raise BundleError(f"{path}: unsupported bundle version {version} (expected one of {SUPPORTED_VERSIONS})")
+    if len(buf) != payload_offset + payload_len:
+        raise BundleError(f"{path}: size does not match header")
+    if verify and hashlib.sha256(memoryview(buf)[HEADER.size:]).digest() != checksum:
+        raise BundleError(f"{path}: checksum mismatch")
+
+    metadata = json.loads(bytes(buf[HEADER.size:HEADER.size + meta_len]))
+
+    def section(name):
+        spec = metadata["sections"][name]
+        start = payload_offset + spec["offset"]
+        if spec["dtype"] == "bytes":
+            return buf[start:start + spec["shape"][0]]
+        count = int(np.prod(spec["shape"]))
+        return np.frombuffer(buf, dtype=spec["dtype"], count=count, offset=start).reshape(spec["shape"])
+
+    settings = metadata["vectorizer"]
+    n_features = metadata["n_features"]
+    if settings.get("kind", "vocabulary") == "hashing":
+        terms = None
+    else:
+        terms = section("vocabulary").decode("utf-8").split("\n") if n_features else []
+        if len(terms) != n_features:
+            raise BundleError(f"{path}: vocabulary has {len(terms)} terms, expected {n_features}")
+    idf = section("idf") if "idf" in metadata["sections"] else None
+    vectorizer = BundleVectorizer(terms, idf, settings, n_features=n_features)
+    counts = [section(name) if name in metadata["sections"] else None for name in ("feature_count", "class_count")]
+    model = BundleModel(metadata["classes"], section("class_log_prior"), section("feature_log_prob"),
+                        *counts, alpha=metadata.get("alpha", 1.0))
+    if model.feature_log_prob_.shape != (len(model.classes_), n_features):
+        raise BundleError(f"{path}: model and vocabulary shapes disagree")
+    if model.feature_count_ is not None and model.feature_count_.shape != model.feature_log_prob_.shape:
+        raise BundleError(f"{path}: feature counts and log probabilities disagree")
+    return model, vectorizer
+
+
+def convert_pickles(model_path, vectorizer_path, path):
+    """Write the bundle for a legacy joblib model/vectorizer pair."""
+    import joblib
+
+    write_bundle(path, joblib.load(model_path), joblib.load(vectorizer_path))
+
+
+if __name__ == "__main__":
+    # Convert legacy pickles: python model_bundle.py emergency_model.pkl vectorizer.pkl emergency_model.bundle
+    if len(sys.argv) != 4:
+        sys.exit("usage: python model_bundle.py MODEL.pkl VECTORIZER.pkl OUT.bundle")
+    convert_pickles(*sys.argv[1:])
+    print(f"Wrote {sys.argv[3]}")
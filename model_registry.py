@@ -0,0 +1,253 @@
+"""
+Process-wide holder for the current classifier that follows the files on disk.
+
+A watcher thread stats the model artifacts every poll_interval seconds. When
+a stamp changes (and has been stable for `settle` seconds, so a half-written
+pair of pickles isn't read), it fingerprints the content. For a bundle that
+is the sha256 already stored in its header; for pickles it is a hash of the
+files. If the content really changed, the new version is loaded, checked and
+warmed on the watcher thread. It is then published with one reference
+assignment. Callers that already hold the previous ModelVersion finish with
+it untouched, so a reload never blocks or disturbs a classification in flight.
+
+A new version is rejected, and the old one keeps serving, when:
+  - the model and vectorizer disagree on the number of features
+  - the classes are missing
+  - the bundle's format version is unsupported
+
+LanguageModels holds the extra per-language models, each in its own
+ModelRegistry. A model is loaded the first time a text in that language
+arrives. The least recently used ones are dropped once their bundles add up
+to more than the memory budget. A bundle that fails to load is remembered,
+and callers fall back to the main model, until the file changes.
+
+The budget counts bundle file sizes, i.e. the mmapped arrays. It does not
+count the Python objects built beside them: the vocabulary dict of a TF-IDF
+bundle (roughly 100 bytes per term) or the token -> column memo of a hashed
+one (capped at 65,536 entries, a few MB). Leave headroom for those.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import partial
+
+ModelVersion = namedtuple("ModelVersion", "model vectorizer fingerprint loaded_at")
+
+
+class ModelMismatchError(ValueError):
+    pass
+
+
+def _stamp(paths):
+    stamps = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            stamps.append(None)
+            continue
+        stamps.append((st.st_ino, st.st_size, st.st_mtime_ns))
+    return tuple(stamps)
+
+
+def fingerprint(paths):
+    """Content hash of the artifacts that exist among paths."""
+    from model_bundle import HEADER, MAGIC
+
+    digest = hashlib.sha256()
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        digest.update(path.encode("utf-8"))
+        with open(path, "rb") as f:
+            head = f.read(HEADER.size)
+            if len(head) == HEADER.size and head.startswith(MAGIC):
+                digest.update(HEADER.unpack(head)[-1])  # bundle: payload checksum
+                continue
+            digest.update(head)
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def n_features(vectorizer):
+    if hasattr(vectorizer, "vocabulary_"):
+        return len(vectorizer.vocabulary_)
+    return int(vectorizer.n_features)
+
+
+def check_compatible(model, vectorizer):
+    """Raise ModelMismatchError unless model and vectorizer were trained together."""
+    classes = getattr(model, "classes_", None)
+    if classes is None or not len(classes):
+        raise ModelMismatchError("model has no classes")
+    expected = n_features(vectorizer)
+    if hasattr(model, "feature_log_prob_"):
+        got = model.feature_log_prob_.shape[1]
+    else:
+        got = getattr(model, "n_features_in_", expected)
+    if got != expected:
+        raise ModelMismatchError(f"model expects {got} features but vectorizer produces {expected}")
+
+
+class ModelRegistry:
+    def __init__(self, paths, loader, poll_interval=2.0, settle=1.0, on_swap=None):
+        """
+        paths: artifact files to watch. loader(): returns (model, vectorizer).
+        on_swap(version) is called after each successful reload.
+        """
+        self.paths = tuple(paths)
+        self.loader = loader
+        self.poll_interval = poll_interval
+        self.settle = settle
+        self.on_swap = on_swap
+        self.last_error = None
+        self._lock = threading.Lock()  # one loader at a time; readers never take it
+        self._stop = threading.Event()
+        self._thread = None
+        self._stamp = _stamp(self.paths)
+        self._current = self._load(fingerprint(self.paths))
+
+    def current(self):
+        """The live ModelVersion; hold on to it for the duration of one classification."""
+        return self._current
+
+    def _load(self, fp):
+        model, vectorizer = self.loader()
+        check_compatible(model, vectorizer)
+        # Fault in pages / build lazy tables here rather than on a user's request
+        from utils import detect_emergency
+        detect_emergency("warm up", model, vectorizer)
+        return ModelVersion(model, vectorizer, fp, time.time())
+
+    def check(self, force=False):
+        """
+        Reload if the artifacts changed; returns True when a new version was published.
+        force skips the settle delay, for writers that replaced the files atomically.
+        """
+        stamp = _stamp(self.paths)
+        if stamp == self._stamp:
+            return False
+        newest = max((s[2] for s in stamp if s), default=0)
+        if not force and time.time_ns() - newest < self.settle * 1e9:
+            return False  # still being written; look again next poll
+        with self._lock:
+            if stamp == self._stamp:
+                return False
+            fp = fingerprint(self.paths)
+            if fp == self._current.fingerprint:
+                self._stamp = stamp
+                return False
+            try:
+                version = self._load(fp)
+            except Exception as e:
+                # Keep serving the old version and don't retry until the files change again
+                self._stamp = stamp
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"Rejected new model: {self.last_error}")
+                return False
+            self._current, self._stamp, self.last_error = version, stamp, None
+        if self.on_swap:
+            self.on_swap(version)
+        return True
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Model registry check failed: {e}")
+
+
+class LanguageModels:
+    def __init__(self, path_for, loader, budget_bytes, poll_interval=None):
+        """
+        path_for(language): artifact path. loader(path): returns (model, vectorizer).
+        poll_interval: when set, each loaded model follows its file like the main registry.
+        """
+        self.path_for = path_for
+        self.loader = loader
+        self.budget_bytes = budget_bytes
+        self.poll_interval = poll_interval
+        self.last_errors = {}
+        self._models = OrderedDict()  # language -> (ModelRegistry, bundle size in bytes)
+        self._failed = {}  # language -> stamp of the file that failed to load
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    @property
+    def languages(self):
+        return list(self._models)
+
+    @property
+    def resident_bytes(self):
+        return sum(size for _, size in self._models.values())
+
+    def _cached(self, language):
+        with self._lock:
+            entry = self._models.get(language)
+            if entry is None:
+                return None
+            self._models.move_to_end(language)
+            return entry[0]
+
+    def registry(self, language):
+        """The ModelRegistry for language, loading it on first use; None if there is no usable model for it."""
+        registry = self._cached(language)
+        if registry is not None:
+            return registry
+        path = self.path_for(language)
+        stamp = _stamp([path])
+        if stamp == (None,) or self._failed.get(language) == stamp:
+            return None
+        with self._lock:
+            loading = self._loading.setdefault(language, threading.Lock())
+        with loading:  # one load per language; other languages aren't held up
+            registry = self._cached(language)
+            if registry is not None:
+                return registry
+            if self._failed.get(language) == stamp:
+                return None
+            try:
+                registry = ModelRegistry([path], partial(self.loader, path), poll_interval=self.poll_interval or 2.0)
+            except Exception as e:
+                # Don't retry on every text; a new file gets a new attempt
+                self._failed[language] = stamp
+                self.last_errors[language] = f"{type(e).__name__}: {e}"
+                print(f"Could not load the {language!r} model, using the default one: {self.last_errors[language]}")
+                return None
+            self._failed.pop(language, None)
+            self.last_errors.pop(language, None)
+            if self.poll_interval:
+                registry.start()
+            evicted = []
+            with self._lock:
+                self._models[language] = (registry, os.path.getsize(path))
+                # Evict least recently used, always keeping the one just loaded.
+                # Callers still holding an evicted version finish with it; its
+                # mapping is released when the last reference goes.
+                while len(self._models) > 1 and self.resident_bytes > self.budget_bytes:
+                    evicted.append(self._models.popitem(last=False)[1][0])
+            for old in evicted:
+                old.stop()
+        return registry
+
+    def get(self, language):
+        """The current ModelVersion for language; None if there is no usable model for it."""
+        registry = self.registry(language)
+        return registry.current() if registry is not None else None
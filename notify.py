@@ -0,0 +1,63 @@
+"""
+Send an alert on every channel at once and report each as it finishes.
+
+dispatch_alert() runs each channel's send function on a shared thread pool
+and yields a ChannelResult per channel in completion order. A channel that
+has not finished by its deadline is reported as timed out and no longer
+delays the others, so total latency is bounded by the slowest deadline
+rather than the sum of all channels.
+
+With deadline=None nothing is given up on: every channel is reported when its
+send returns, and keepalive(names) is called every keepalive_interval seconds
+for the channels still running. AlertQueue workers send each claimed batch
+this way on their own executor, renewing the leases of rows still in flight.
+"""
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+ChannelResult = namedtuple("ChannelResult", "channel ok elapsed error")
+
+# Shared across reruns/sessions; a hung send only ties up its own worker.
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="notify")
+
+
+def _timed(send):
+    start = time.perf_counter()
+    try:
+        return bool(send()), time.perf_counter() - start, None
+    except Exception as e:
+        return False, time.perf_counter() - start, e
+
+
+def dispatch_alert(channels, deadline=15.0, deadlines=None, executor=None, keepalive=None, keepalive_interval=10.0):
+    """
+    channels: {name: zero-argument callable returning True on success}; any hashable name works.
+    deadline: seconds each channel may take (None: no limit); deadlines overrides it per channel.
+    executor: pool to run the sends on (default: the shared one).
+    keepalive: called with the names still running every keepalive_interval seconds.
+    Yields ChannelResult(channel, ok, elapsed, error) as channels complete.
+    """
+    deadlines = deadlines or {}
+    start = time.perf_counter()
+    pending = {(executor or _executor).submit(_timed, send): name for name, send in channels.items()}
+    expires = {f: start + deadlines.get(name, deadline) for f, name in pending.items()
+               if deadlines.get(name, deadline) is not None}
+    kept_alive = start
+
+    while pending:
+        due = [expires[f] for f in pending if f in expires]
+        if keepalive is not None:
+            due.append(kept_alive + keepalive_interval)
+        timeout = max(0.0, min(due) - time.perf_counter()) if due else None
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            ok, elapsed, error = future.result()
+            yield ChannelResult(pending.pop(future), ok, elapsed, error)
+        now = time.perf_counter()
+        if keepalive is not None and pending and now - kept_alive >= keepalive_interval:
+            keepalive(list(pending.values()))
+            kept_alive = now
+        for future in [f for f in pending if f in expires and expires[f] <= now]:
+            name = pending.pop(future)
+            yield ChannelResult(name, False, now - start, TimeoutError(f"{name} did not finish in time"))
@@ -0,0 +1,245 @@
+"""
+Online learning from dispatcher corrections.
+
+FeedbackStore.record() saves a corrected label in SQLite (WAL mode) and
+returns at once. OnlineTrainer runs on a background thread in each serving
+process. Every few seconds it folds pending corrections into the classifier
+with MultinomialNB.partial_fit, continuing from the feature counts stored in
+the bundle, and publishes the result with write_bundle's atomic rename.
+
+Only one process trains at a time: a trainer first takes a lease row in
+the feedback database, so bundle writers across processes are serialized.
+The other processes pick up the new bundle through their ModelRegistry.
+Write transactions stay short: taking and releasing the lease, and marking
+the batch applied once the bundle is published. Training and the bundle
+write happen with no transaction open, so record() never waits behind a
+training step.
+
+Serving never waits on training. The registry loads and warms the new model
+on a background thread, then swaps it in with a single reference assignment.
+Memory stays bounded:
+  - each update holds at most batch_size texts
+  - the counts are a fixed n_classes x n_features array
+  - applied feedback beyond max_rows is pruned
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from language import DEFAULT_LANGUAGE
+from model_bundle import BundleError, write_bundle
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    label TEXT NOT NULL,
+    predicted TEXT,
+    created_at REAL NOT NULL,
+    applied_at REAL,
+    language TEXT NOT NULL DEFAULT 'en'
+);
+CREATE INDEX IF NOT EXISTS feedback_pending ON feedback (applied_at, id);
+CREATE TABLE IF NOT EXISTS trainer_lease (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    owner TEXT,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class FeedbackStore:
+    def __init__(self, path="feedback.sqlite3", max_rows=100_000):
+        self.path = path
+        self.max_rows = max_rows
+        self._local = threading.local()
+        db = self._db()
+        db.executescript(SCHEMA)
+        columns = {row[1] for row in db.execute("PRAGMA table_info(feedback)")}
+        if "language" not in columns:  # stores created before per-language models
+            db.execute(f"ALTER TABLE feedback ADD COLUMN language TEXT NOT NULL DEFAULT '{DEFAULT_LANGUAGE}'")
+
+    def _db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def transaction(self):
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def record(self, text, label, predicted=None, language=DEFAULT_LANGUAGE):
+        """
+        Store a correction and return its id; the same (text, label) is only learned once.
+        language names the model that should learn it (see utils.model_language).
+        """
+        key = hashlib.sha256(f"{label}\0{text}".encode("utf-8")).hexdigest()
+        with self.transaction() as db:
+            db.execute(
+                "INSERT OR IGNORE INTO feedback (key, text, label, predicted, created_at, language) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, text, label, predicted, time.time(), language),
+            )
+            return db.execute("SELECT id FROM feedback WHERE key = ?", (key,)).fetchone()[0]
+
+    def pending_count(self):
+        return self._db().execute("SELECT COUNT(*) FROM feedback WHERE applied_at IS NULL").fetchone()[0]
+
+    def pending(self, limit):
+        """Oldest unapplied corrections as (id, text, label, language)."""
+        return self._db().execute(
+            "SELECT id, text, label, language FROM feedback WHERE applied_at IS NULL ORDER BY id LIMIT ?", (limit,)
+        ).fetchall()
+
+    def acquire_lease(self, owner, seconds):
+        """Become the only trainer for `seconds`; False while another owner's lease is live."""
+        now = time.time()
+        with self.transaction() as db:
+            db.execute("INSERT OR IGNORE INTO trainer_lease (id, owner, expires_at) VALUES (1, NULL, 0)")
+            cursor = db.execute(
+                "UPDATE trainer_lease SET owner = ?, expires_at = ? WHERE id = 1 AND (owner = ? OR expires_at < ?)",
+                (owner, now + seconds, owner, now),
+            )
+        return cursor.rowcount == 1
+
+    def release_lease(self, owner):
+        with self.transaction() as db:
+            db.execute("UPDATE trainer_lease SET owner = NULL, expires_at = 0 WHERE id = 1 AND owner = ?", (owner,))
+
+    def prune(self, db):
+        """Drop the oldest applied rows beyond max_rows (pending rows are never dropped)."""
+        db.execute(
+            "DELETE FROM feedback WHERE applied_at IS NOT NULL AND id NOT IN "
+            "(SELECT id FROM feedback ORDER BY id DESC LIMIT ?)",
+            (self.max_rows,),
+        )
+
+
+def trainable(model):
+    """A MultinomialNB that partial_fit can continue, rebuilt from a bundle model's counts."""
+    import numpy as np
+    from sklearn.naive_bayes import MultinomialNB
+
+    if model.feature_count_ is None:
+        raise BundleError("Bundle has no feature counts; retrain it with train_model.py to enable online updates")
+    nb = MultinomialNB(alpha=model.alpha)
+    nb.classes_ = np.asarray([str(c) for c in model.classes_])
+    # Copies: the bundle arrays are read-only views of the mmap
+    nb.feature_count_ = np.array(model.feature_count_, dtype=np.float64)
+    nb.class_count_ = np.array(model.class_count_, dtype=np.float64)
+    nb.n_features_in_ = nb.feature_count_.shape[1]
+    nb._update_feature_log_prob(nb.alpha)
+    nb._update_class_log_prior()
+    return nb
+
+
+class OnlineTrainer:
+    def __init__(self, store, registry, bundle_path, interval=10.0, batch_size=1000, lease=600.0, languages=None):
+        """
+        registry/bundle_path: the main model, which learns English corrections.
+        languages(language): (registry, bundle_path) of another language's model, or None
+        when it has none, in which case its corrections go to the main model.
+        """
+        self.store = store
+        self.registry = registry
+        self.bundle_path = bundle_path
+        self.interval = interval
+        self.batch_size = batch_size
+        self.lease = lease  # longest a crashed trainer can block the others
+        self.languages = languages
+        self._owner = uuid.uuid4().hex
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def classes(self):
+        return [str(c) for c in self.registry.current().model.classes_]
+
+    def _target(self, language):
+        if language != DEFAULT_LANGUAGE and self.languages is not None:
+            target = self.languages(language)
+            if target is not None:
+                return target
+        return self.registry, self.bundle_path
+
+    def _learn(self, registry, bundle_path, rows):
+        registry.check(force=True)  # another process may have published before we got the lease
+        model, vectorizer = registry.current()[:2]
+        known = {str(c) for c in model.classes_}
+        learn = [(text, label) for _, text, label, _ in rows if label in known]
+        if learn:
+            nb = trainable(model)
+            nb.partial_fit(vectorizer.transform([t for t, _ in learn]), [l for _, l in learn])
+            write_bundle(bundle_path, nb, vectorizer)
+        return len(learn)
+
+    def step(self):
+        """Apply one batch of pending feedback; returns how many corrections were learned."""
+        if not self.store.pending_count():
+            return 0
+        if not self.store.acquire_lease(self._owner, self.lease):
+            return 0  # another process is training
+        learned, published = 0, []
+        try:
+            rows = self.store.pending(self.batch_size)
+            if not rows:
+                return 0
+            groups = {}
+            for row in rows:
+                groups.setdefault(self._target(row[3]), []).append(row)
+            for (registry, bundle_path), group in groups.items():
+                try:
+                    count = self._learn(registry, bundle_path, group)
+                except BundleError as e:
+                    # e.g. a bundle without counts; one model can't hold up the others
+                    print(f"Online update skipped for {bundle_path}: {e}")
+                    continue
+                if count:
+                    learned += count
+                    published.append(registry)
+            now = time.time()
+            with self.store.transaction() as db:
+                db.executemany("UPDATE feedback SET applied_at = ? WHERE id = ?", [(now, row[0]) for row in rows])
+                self.store.prune(db)
+        finally:
+            self.store.release_lease(self._owner)
+        for registry in published:
+            registry.check(force=True)
+        return learned
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="online-trainer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                learned = self.step()
+                if learned:
+                    print(f"Online update: learned {learned} corrections")
+            except Exception as e:
+                print(f"Online update failed: {e}")
@@ -0,0 +1,31 @@
+"""
+Helpers for streaming large inputs through a multiprocessing pool.
+
+train_model.py vectorizes corpus chunks and triage.py scores message chunks
+this way: the input is cut into chunks, and bounded_imap keeps only a few of
+them in flight so memory stays flat however long the input is.
+"""
+from collections import deque
+
+
+def chunked(items, size):
+    """Yield lists of up to size consecutive items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def bounded_imap(pool, fn, items, window):
+    """Ordered pool.imap with at most window tasks in flight (Pool.imap reads its input eagerly)."""
+    pending = deque()
+    for item in items:
+        pending.append(pool.apply_async(fn, (item,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
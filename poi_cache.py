@@ -0,0 +1,178 @@
+"""
+Disk-cached POI lookups against Nominatim (or any compatible server).
+
+Results are fetched one geotile at a time (tile_deg x tile_deg degrees) and
+stored in SQLite keyed by (place_type, tile). Repeat lookups in the same area
+never touch the network until the entry's TTL expires. Outgoing requests
+share one keep-alive session, carry a timeout and are spaced at least
+min_interval seconds apart, as Nominatim's usage policy requires.
+
+A lookup merges every tile within radius_km of the point, so a query near a
+tile edge still sees the facilities just across it. Neighbouring tiles are
+warmed by one background worker. Tiles already queued or being fetched are
+not queued again. A failed prefetch is kept in last_error, and the tile is
+fetched in the foreground when a lookup needs it. Expired rows are deleted
+at most once per evict_interval, when new tiles are written.
+"""
+import json
+import math
+import queue
+import sqlite3
+import threading
+import time
+
+import requests
+
+from geo import haversine
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org"
+USER_AGENT = "EmergencyApp/1.0"
+KM_PER_DEG_LAT = 111.32
+
+
+class POICache:
+    def __init__(self, path="poi_cache.sqlite3", base_url=NOMINATIM_URL, ttl=7 * 24 * 3600,
+                 tile_deg=0.05, min_interval=1.0, timeout=(3.05, 10), limit=50, radius_km=2.0,
+                 evict_interval=3600.0):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.tile_deg = tile_deg
+        self.radius_km = radius_km
+        self.evict_interval = evict_interval
+        self.last_error = None
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.limit = limit
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS poi_tiles ("
+            " place_type TEXT, ty INTEGER, tx INTEGER, fetched_at REAL, payload TEXT,"
+            " PRIMARY KEY (place_type, ty, tx))"
+        )
+        self._db_lock = threading.Lock()
+        self._rate_lock = threading.Lock()
+        self._last_request = 0.0
+        self._last_evict = 0.0
+        self._prefetch_queue = queue.Queue()
+        self._inflight = set()  # (place_type, ty, tx) queued or being fetched in the background
+        self._inflight_lock = threading.Lock()
+        self._worker = None
+
+    def tile(self, lat, lon):
+        return math.floor(lat / self.tile_deg), math.floor(lon / self.tile_deg)
+
+    def tiles_within(self, lat, lon, radius_km):
+        """Every tile that overlaps the box of radius_km around (lat, lon)."""
+        dlat = radius_km / KM_PER_DEG_LAT
+        dlon = radius_km / (KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        (y0, x0), (y1, x1) = self.tile(lat - dlat, lon - dlon), self.tile(lat + dlat, lon + dlon)
+        return [(ty, tx) for ty in range(y0, y1 + 1) for tx in range(x0, x1 + 1)]
+
+    def lookup(self, lat, lon, place_type="hospital", prefetch=False, radius_km=None):
+        """
+        Return POIs of place_type from every tile within radius_km (default self.radius_km)
+        of (lat, lon), nearest first, with distance_km.
+        """
+        seen = {}
+        for ty, tx in self.tiles_within(lat, lon, self.radius_km if radius_km is None else radius_km):
+            results = self._cached(place_type, ty, tx)
+            if results is None:
+                results = self._fetch(place_type, ty, tx)
+            for r in results:
+                # Viewboxes share their edges, so a POI can come back for two tiles
+                seen.setdefault(r.get("place_id") or (r.get("lat"), r.get("lon"), r.get("display_name")), r)
+        if prefetch:
+            self.prefetch(lat, lon, place_type)
+        nearby = []
+        for r in seen.values():
+            try:
+                dist = haversine(lat, lon, float(r["lat"]), float(r["lon"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+            nearby.append({**r, "distance_km": dist})
+        nearby.sort(key=lambda r: r["distance_km"])
+        return nearby
+
+    def prefetch(self, lat, lon, place_type="hospital", rings=1, background=True):
+        """Warm the tiles surrounding (lat, lon) that are missing or expired; returns the tiles queued."""
+        ty, tx = self.tile(lat, lon)
+        missing = [
+            (ty + dy, tx + dx)
+            for dy in range(-rings, rings + 1)
+            for dx in range(-rings, rings + 1)
+            if self._cached(place_type, ty + dy, tx + dx) is None
+        ]
+        if not background:
+            for tile in missing:
+                self._fetch(place_type, *tile)
+            return missing
+        queued = []
+        with self._inflight_lock:
+            for tile in missing:
+                key = (place_type,) + tile
+                if key not in self._inflight:
+                    self._inflight.add(key)
+                    self._prefetch_queue.put(key)
+                    queued.append(tile)
+            if queued and self._worker is None:
+                self._worker = threading.Thread(target=self._prefetch_worker, name="poi-prefetch", daemon=True)
+                self._worker.start()
+        return queued
+
+    def _prefetch_worker(self):
+        while True:
+            key = self._prefetch_queue.get()
+            try:
+                if self._cached(*key) is None:  # a foreground lookup may have fetched it meanwhile
+                    self._fetch(*key)
+            except (requests.RequestException, ValueError) as e:
+                self.last_error = f"prefetch {key}: {type(e).__name__}: {e}"
+            finally:
+                with self._inflight_lock:
+                    self._inflight.discard(key)
+
+    def evict_expired(self):
+        with self._db_lock, self._db:
+            return self._db.execute(
+                "DELETE FROM poi_tiles WHERE fetched_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+
+    def _cached(self, place_type, ty, tx):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT fetched_at, payload FROM poi_tiles WHERE place_type = ? AND ty = ? AND tx = ?",
+                (place_type, ty, tx),
+            ).fetchone()
+        if row is None or time.time() - row[0] > self.ttl:
+            return None
+        return json.loads(row[1])
+
+    def _fetch(self, place_type, ty, tx):
+        south, west = ty * self.tile_deg, tx * self.tile_deg
+        north, east = south + self.tile_deg, west + self.tile_deg
+        params = {
+            "format": "json",
+            "q": place_type,
+            "limit": self.limit,
+            "bounded": 1,
+            "viewbox": f"{west},{north},{east},{south}",
+        }
+        with self._rate_lock:
+            wait = self._last_request + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_request = time.monotonic()
+        response = self.session.get(f"{self.base_url}/search", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        results = response.json()
+        with self._db_lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO poi_tiles VALUES (?, ?, ?, ?, ?)",
+                (place_type, ty, tx, time.time(), json.dumps(results)),
+            )
+        if time.monotonic() - self._last_evict >= self.evict_interval:
+            self._last_evict = time.monotonic()
+            self.evict_expired()
+        return results
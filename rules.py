@@ -0,0 +1,205 @@
+"""
+Keyword rules that settle unambiguous SOS texts before the ML model runs.
+
+RuleMatcher compiles every phrase into one Aho–Corasick automaton over word
+tokens. The text is tokenized once with a regex, then a single pass over the
+tokens finds every phrase occurrence, however many rules there are. Matching
+on tokens means "fire" never fires inside "ceasefire", and multi-word phrases
+like "heart attack" need no extra work.
+
+Rule categories are finer than the model's classes: the rules report
+"accident" and "violence", which is what EMERGENCY_GUIDE and alert routing
+key on, while the model only knows fire/medical/police. MODEL_CLASSES maps
+each category to the class the model would give the same incident (a road
+accident is "medical", violence is "police"). Use model_class() wherever a
+label is compared with the model's classes, e.g. feedback and training data.
+
+Phrases nested in a longer match ("accident" inside "car accident", "fire"
+inside "on fire") are not counted again; only the longest match starting at
+a position scores.
+
+Cascade runs the rules first. If one category clearly wins, the answer comes
+back in microseconds. Otherwise (no match, a tie between categories, or a
+negated phrase such as "no fire") the text falls through to the model stage.
+Per-stage counts and latencies are kept for stats().
+"""
+import re
+import threading
+import time
+from collections import deque
+
+# phrase -> weight; 1.0 settles a text on its own, weaker phrases need support
+RULES = {
+    "fire": {
+        "fire": 1.0, "on fire": 1.0, "smoke": 0.6, "flames": 1.0, "burning": 0.6, "blaze": 1.0,
+        "fire alarm": 1.0, "gas leak": 1.0, "explosion": 0.6, "short circuit": 0.6,
+    },
+    "medical": {
+        "heart attack": 1.0, "ambulance": 1.0, "fainted": 1.0, "unconscious": 1.0, "not breathing": 1.0,
+        "bleeding": 0.6, "seizure": 1.0, "stroke": 0.6, "overdose": 1.0, "chest pain": 1.0,
+        "collapsed": 0.6, "pregnant": 0.6, "labour pain": 1.0,
+    },
+    "accident": {
+        "accident": 1.0, "car accident": 1.0, "road accident": 1.0, "crash": 1.0, "collision": 1.0,
+        "hit by a car": 1.0, "hit by a truck": 1.0, "overturned": 0.6, "pile up": 0.6,
+    },
+    "violence": {
+        "gunshots": 1.0, "gunshot": 1.0, "shooting": 1.0, "shot": 0.6, "stabbed": 1.0, "robbery": 1.0,
+        "broke into": 1.0, "break in": 1.0, "assault": 1.0, "attacked": 0.6, "kidnapped": 1.0,
+        "knife": 0.6, "gun": 0.6, "threatening": 0.6, "harassing": 0.6, "thief": 1.0,
+    },
+}
+
+# Rule category -> model class (train_model.CLASSES)
+MODEL_CLASSES = {"fire": "fire", "medical": "medical", "accident": "medical", "violence": "police"}
+
+
+def model_class(label):
+    """The model class for a rule category (or a label that already is one)."""
+    return MODEL_CLASSES.get(label, label)
+
+
+# A match directly preceded by one of these words doesn't count ("no fire", "not bleeding")
+NEGATIONS = frozenset({"no", "not", "without", "never", "false"})
+
+_TOKEN = re.compile(r"[a-z]+")
+
+
+class RuleMatcher:
+    def __init__(self, rules=RULES, classes=None):
+        """classes maps rule categories to the labels reported (e.g. MODEL_CLASSES); None keeps the categories."""
+        # State 0 is the root; each state has word transitions, a fail link and outputs
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for category, phrases in rules.items():
+            label = classes.get(category, category) if classes is not None else category
+            for phrase, weight in phrases.items():
+                self._add(phrase.split(), (label, weight))
+        self._link()
+
+    def _add(self, words, output):
+        state = 0
+        for word in words:
+            nxt = self.goto[state].get(word)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][word] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append(output + (len(words),))
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and word not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(word, 0) if self.goto[f].get(word) != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def matches(self, text):
+        """Yield (category, weight, negated) for each phrase occurrence not inside a longer one."""
+        tokens = _TOKEN.findall(text.lower())
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        found = []
+        for i, token in enumerate(tokens):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for category, weight, length in out[state]:
+                found.append((i - length + 1, i, category, weight))
+        # Longest first at each start; anything ending inside the last kept span is nested in it
+        found.sort(key=lambda m: (m[0], -m[1]))
+        end = -1
+        for start, stop, category, weight in found:
+            if stop <= end:
+                continue
+            end = stop
+            yield category, weight, start > 0 and tokens[start - 1] in NEGATIONS
+
+    def scores(self, text):
+        """Return ({category: score}, negated) summed over matches."""
+        scores = {}
+        negated = False
+        for category, weight, neg in self.matches(text):
+            if neg:
+                negated = True
+                continue
+            scores[category] = scores.get(category, 0.0) + weight
+        return scores, negated
+
+    def classify(self, text, min_score=1.0, min_share=0.75):
+        """(category, confidence) when the rules are sure, else None."""
+        scores, negated = self.scores(text)
+        if negated or not scores:
+            return None
+        category = max(scores, key=scores.get)
+        top = scores[category]
+        share = top / sum(scores.values())
+        if top < min_score or share < min_share:
+            return None
+        return category, round(share, 4)
+
+
+class Cascade:
+    """rules -> model; model_stage(text) returns (label, confidence)."""
+
+    def __init__(self, model_stage, matcher=None, min_score=1.0, min_share=0.75):
+        self.model_stage = model_stage
+        self.matcher = matcher or RuleMatcher()
+        self.min_score = min_score
+        self.min_share = min_share
+        self._lock = threading.Lock()
+        self._stats = {"rules": [0, 0.0], "model": [0, 0.0]}
+        self._rule_checks = [0, 0.0]
+
+    def record(self, stage, seconds, count=1):
+        with self._lock:
+            entry = self._stats[stage]
+            entry[0] += count
+            entry[1] += seconds
+
+    def rules_stage(self, text):
+        """Try the rules alone; returns (label, confidence) or None and records the time either way."""
+        start = time.perf_counter()
+        result = self.matcher.classify(text, self.min_score, self.min_share)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._rule_checks[0] += 1
+            self._rule_checks[1] += elapsed
+        if result is not None:
+            self.record("rules", elapsed)
+        return result
+
+    def __call__(self, text):
+        """Return (label, confidence, stage)."""
+        result = self.rules_stage(text)
+        if result is not None:
+            return result + ("rules",)
+        start = time.perf_counter()
+        label, confidence = self.model_stage(text)
+        self.record("model", time.perf_counter() - start)
+        return label, confidence, "model"
+
+    def stats(self):
+        """{stage: {"count", "share", "mean_us"}} plus the mean cost of a rule check on any text."""
+        with self._lock:
+            total = sum(count for count, _ in self._stats.values())
+            report = {
+                stage: {
+                    "count": count,
+                    "share": round(count / total, 4) if total else 0.0,
+                    "mean_us": round(seconds / count * 1e6, 1) if count else 0.0,
+                }
+                for stage, (count, seconds) in self._stats.items()
+            }
+            checks, seconds = self._rule_checks
+            report["rule_check_mean_us"] = round(seconds / checks * 1e6, 1) if checks else 0.0
+        return report
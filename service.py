@@ -0,0 +1,326 @@
+"""
+Headless JSON API for SMS gateways, IoT panic buttons and other integrations.
+
+    uvicorn service:app --workers 4          # or: python service.py --workers 4
+    # behind a reverse proxy, trust its X-Forwarded-For (and only its):
+    uvicorn service:app --proxy-headers --forwarded-allow-ips 10.0.0.5
+
+Endpoints:
+    POST /classify        {"text": "..."} or {"texts": ["...", ...]}
+                          label is a rule category (fire/medical/accident/violence) when
+                          stage is "rules", else a model class (fire/medical/police)
+    GET  /location        the caller's location (?ip= may only name the caller's own address)
+    GET  /nearby          ?lat=&lon=&type=hospital&k=5&radius_km=
+    POST /notify          {"message": "...", "channels": ["email", "whatsapp"], "key": optional}
+                          -> {"alerts": {"email": id, "whatsapp": [id per WHATSAPP_TO number]}}
+    GET  /notify/{id}     delivery status of a queued alert
+    POST /notify/contacts {"message": "...", "lat": , "lon": , "radius_km": , "zones": [...], "roles": [...],
+                           "key": optional}
+                          queues an alert to the registered contacts that match, on every channel
+                          they have -> {"key": ..., "alerts": {"email": [ids], "whatsapp": [ids]}}
+    GET  /notify/contacts/{key}  delivery counts per channel and status for that fan-out
+    POST /feedback        {"text": "...", "label": "fire", "predicted": optional}
+                          label may be a model class or a rule category (see rules.MODEL_CLASSES)
+    GET  /cascade         share of traffic and latency of the rules and model stages
+    GET  /healthz
+
+Each worker process loads the model at startup and reloads it in the
+background when the artifacts change (see model_registry). Everything that blocks
+(model scoring of large batches, geolocation, SQLite) runs in the thread
+pool so the event loop keeps accepting requests.
+
+Dispatcher corrections posted to /feedback are learned in the background
+(see online_learning), and every worker picks up the updated bundle through
+its registry. Set ONLINE_LEARNING=0 to disable.
+"""
+import argparse
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from rules import model_class
+from utils import (
+    BUNDLE_PATH,
+    classify_batch,
+    ensure_bundle,
+    find_nearby,
+    get_alert_queue,
+    get_cascade,
+    get_current_location,
+    get_feedback_store,
+    get_inference_scheduler,
+    get_language_models,
+    get_model_registry,
+    language_bundle_path,
+    model_language,
+    model_registry_for,
+    notify_contacts,
+    whatsapp_recipients,
+)
+
+MAX_BATCH = 4096
+DEFAULT_SUBJECT = "URGENT: EMERGENCY ALERT"
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # The trainer writes bundles; a tree with only the legacy pickles is converted first
+    has_bundle = ensure_bundle(BUNDLE_PATH)
+    app.state.registry = get_model_registry()
+    # Deliver alerts left pending or leased by the previous run right away
+    app.state.alert_queue = get_alert_queue()
+    app.state.trainer = None
+    if os.getenv("ONLINE_LEARNING", "1") != "0" and has_bundle:
+        from online_learning import OnlineTrainer
+        app.state.trainer = OnlineTrainer(get_feedback_store(), app.state.registry, BUNDLE_PATH,
+                                          languages=language_target).start()
+    yield
+    if app.state.trainer:
+        app.state.trainer.stop()
+    app.state.alert_queue.stop()
+
+
+def language_target(language):
+    """(registry, bundle path) of language's own model for the online trainer, or None."""
+    registry = get_language_models().registry(language)
+    return (registry, language_bundle_path(language)) if registry is not None else None
+
+
+def error(message, status=400):
+    return JSONResponse({"error": message}, status_code=status)
+
+
+async def classify(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        return error("body must be JSON")
+    texts = body.get("texts") if isinstance(body, dict) else None
+    single = isinstance(body, dict) and isinstance(body.get("text"), str)
+    if single:
+        texts = [body["text"]]
+    if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+        return error('expected {"text": str} or {"texts": [str, ...]}')
+    if len(texts) > MAX_BATCH:
+        return error(f"at most {MAX_BATCH} texts per request", 413)
+
+    # Keyword rules settle the obvious texts; only the rest reach the model
+    cascade = get_cascade()
+    scored = [cascade.rules_stage(t) for t in texts]
+    stages = ["rules" if r else "model" for r in scored]
+    pending = [i for i, r in enumerate(scored) if r is None]
+    start = time.perf_counter()
+    if len(pending) <= 8:
+        # Small requests from concurrent clients are scored together by the micro-batcher
+        scheduler = get_inference_scheduler()
+        found = await asyncio.gather(*(asyncio.wrap_future(scheduler.submit(texts[i])) for i in pending))
+    else:
+        # Grouped by language; one model version per language for the whole request
+        found = await run_in_threadpool(classify_batch, [texts[i] for i in pending])
+    for i, result in zip(pending, found):
+        scored[i] = result
+    if pending:
+        # Every pending text waited for the whole model call
+        cascade.record("model", (time.perf_counter() - start) * len(pending), len(pending))
+    results = [{"label": l, "confidence": c, "stage": s} for (l, c), s in zip(scored, stages)]
+    return JSONResponse(results[0] if single else {"results": results})
+
+
+def valid_point(lat, lon):
+    # NaN fails every comparison, so it is rejected along with out-of-range values
+    return -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def client_ip(request):
+    # X-Forwarded-For is set by the client, so it is not read here. Behind a proxy, run
+    # uvicorn with --proxy-headers --forwarded-allow-ips=<proxy>; it then rewrites
+    # request.client from the header only for connections from that proxy.
+    return request.client.host if request.client else None
+
+
+def valid_subject(body):
+    subject = body.get("subject", DEFAULT_SUBJECT)
+    return subject if isinstance(subject, str) and subject.strip() else None
+
+
+async def location(request):
+    ip = client_ip(request)
+    if request.query_params.get("ip") not in (None, "", ip):
+        return error("ip may only be the caller's own address", 403)
+    lat, lon, city = await run_in_threadpool(get_current_location, ip)
+    if lat is None:
+        return error("location unavailable", 503)
+    return JSONResponse({"lat": lat, "lon": lon, "city": city})
+
+
+async def nearby(request):
+    params = request.query_params
+    try:
+        lat, lon = float(params["lat"]), float(params["lon"])
+        k = int(params.get("k", 5))
+        radius_km = float(params["radius_km"]) if params.get("radius_km") else None
+    except (KeyError, ValueError):
+        return error("lat and lon are required numbers; k and radius_km must be numeric")
+    if not valid_point(lat, lon):
+        return error("lat must be within [-90, 90] and lon within [-180, 180]")
+    if k < 1 or (radius_km is not None and not radius_km >= 0):
+        return error("k must be positive and radius_km a non-negative number")
+    results = await run_in_threadpool(find_nearby, lat, lon, params.get("type", "hospital"), k, radius_km)
+    return JSONResponse({"results": results})
+
+
+async def notify(request):
+    try:
+        body = await request.json()
+        message = body["message"]
+    except (ValueError, KeyError, TypeError):
+        return error('expected {"message": str, "channels": [...]}')
+    if not isinstance(message, str) or not message.strip():
+        return error("message must be a non-empty string")
+    channels = body.get("channels") or ["email", "whatsapp"]
+    if not isinstance(channels, list):
+        return error("channels must be a list")
+    unknown = [c for c in channels if c not in ("email", "whatsapp")]
+    if unknown:
+        return error(f"unknown channels: {', '.join(map(str, unknown))}")
+    subject = valid_subject(body)
+    if subject is None:
+        return error("subject must be a non-empty string")
+    email = {"subject": subject, "body": message}
+    if "whatsapp" in channels and not whatsapp_recipients():
+        return error("no WhatsApp recipients configured (WHATSAPP_TO)")
+
+    def enqueue():
+        queue = get_alert_queue()
+        key = body.get("key")
+        alerts = {}
+        if "email" in channels:
+            alerts["email"] = queue.enqueue("email", email, key=f"{key}:email" if key else None)
+        if "whatsapp" in channels:
+            # One row per number, so a retry only resends to the numbers that failed
+            alerts["whatsapp"] = [
+                queue.enqueue("whatsapp", {"message": message, "to": number},
+                              key=f"{key}:whatsapp:{number}" if key else None)
+                for number in whatsapp_recipients()
+            ]
+        return alerts
+
+    return JSONResponse({"alerts": await run_in_threadpool(enqueue)}, status_code=202)
+
+
+async def notify_contacts_route(request):
+    try:
+        body = await request.json()
+        message = body["message"]
+        lat, lon = body.get("lat"), body.get("lon")
+        radius_km = body.get("radius_km")
+        zones, roles = body.get("zones"), body.get("roles")
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return error('expected {"message": str, "lat", "lon", "radius_km", "zones", "roles"}')
+    if not isinstance(message, str) or not message.strip():
+        return error("message must be a non-empty string")
+    if radius_km is not None and not all(isinstance(v, (int, float)) for v in (lat, lon, radius_km)):
+        return error("a geofence needs numeric lat, lon and radius_km")
+    if radius_km is not None and not (valid_point(lat, lon) and radius_km >= 0):
+        return error("lat must be within [-90, 90], lon within [-180, 180] and radius_km non-negative")
+    if zones is None and radius_km is None:
+        return error("give a geofence (lat, lon, radius_km) and/or zones")
+    if any(v is not None and not isinstance(v, list) for v in (zones, roles)):
+        return error("zones and roles must be lists")
+    subject = valid_subject(body)
+    if subject is None:
+        return error("subject must be a non-empty string")
+    key = body.get("key")
+    if key is not None and (not isinstance(key, str) or not key):
+        return error("key must be a non-empty string")
+    # Queued, not sent: a large zone takes minutes at Twilio's rate limit
+    key, alerts = await run_in_threadpool(
+        notify_contacts, subject, message, lat, lon, radius_km, zones, roles, key
+    )
+    return JSONResponse({"key": key, "alerts": alerts}, status_code=202)
+
+
+async def notify_contacts_status(request):
+    key = request.path_params["key"]
+    channels = await run_in_threadpool(get_alert_queue().group_status, key)
+    if not channels:
+        return error("unknown contact alert", 404)
+    return JSONResponse({
+        "key": key,
+        "channels": {channel: {"total": sum(counts.values()), **counts} for channel, counts in channels.items()},
+    })
+
+
+async def notify_status(request):
+    alert_id = request.path_params["alert_id"]
+    status = await run_in_threadpool(lambda: get_alert_queue().status([alert_id]))
+    if alert_id not in status:
+        return error("unknown alert", 404)
+    state, attempts, last_error = status[alert_id]
+    return JSONResponse({"id": alert_id, "status": state, "attempts": attempts, "last_error": last_error})
+
+
+async def feedback(request):
+    try:
+        body = await request.json()
+        text, label = body["text"], body["label"]
+    except (ValueError, KeyError, TypeError):
+        return error('expected {"text": str, "label": str, "predicted": optional str}')
+    if not isinstance(text, str) or not text.strip() or not isinstance(label, str):
+        return error("text and label must be non-empty strings")
+    label = model_class(label)  # rule categories such as "violence" are stored as the model's class
+    if request.app.state.trainer is None:
+        return error("online learning is disabled", 503)
+    # The correction goes to the model that scored the text
+    language = await run_in_threadpool(model_language, text)
+    classes = [str(c) for c in model_registry_for(language).current().model.classes_]
+    if label not in classes:
+        return error(f"unknown label {label!r}; expected one of {', '.join(classes)}")
+    feedback_id = await run_in_threadpool(get_feedback_store().record, text, label, body.get("predicted"), language)
+    return JSONResponse({"id": feedback_id, "status": "queued"}, status_code=202)
+
+
+async def cascade_stats(request):
+    return JSONResponse(get_cascade().stats())
+
+
+async def healthz(request):
+    return JSONResponse({"ok": True})
+
+
+app = Starlette(
+    routes=[
+        Route("/classify", classify, methods=["POST"]),
+        Route("/location", location),
+        Route("/nearby", nearby),
+        Route("/notify", notify, methods=["POST"]),
+        Route("/notify/contacts", notify_contacts_route, methods=["POST"]),
+        Route("/notify/contacts/{key}", notify_contacts_status),
+        Route("/notify/{alert_id:int}", notify_status),
+        Route("/feedback", feedback, methods=["POST"]),
+        Route("/cascade", cascade_stats),
+        Route("/healthz", healthz),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the emergency API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--forwarded-allow-ips", default=None,
+                        help="reverse proxies trusted to set X-Forwarded-For (default: none)")
+    args = parser.parse_args()
+    uvicorn.run("service:app", host=args.host, port=args.port, workers=args.workers, log_level="warning",
+                proxy_headers=args.forwarded_allow_ips is not None,
+                forwarded_allow_ips=args.forwarded_allow_ips)
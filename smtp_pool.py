@@ -0,0 +1,134 @@
+"""
+Pool of authenticated SMTP sessions reused across alerts.
+
+Each session pays connect + EHLO + STARTTLS + login once. Sessions idle for
+longer than max_idle are probed with NOOP before use, and a send that hits a
+dropped connection is retried once on a fresh session. send_alert delivers
+one message to many recipients in a single SMTP transaction. Its timeout
+bounds the whole send: the wait for a free session, and every socket
+operation, which gets at most the time left.
+"""
+import smtplib
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+_STALE = (smtplib.SMTPServerDisconnected, smtplib.SMTPHeloError, ConnectionError, TimeoutError)
+
+
+class SMTPPool:
+    def __init__(self, host, port, username=None, password=None, size=4, starttls=True,
+                 timeout=10, max_idle=30, debug=False):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.debug = debug
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._ssl_context = ssl.create_default_context() if starttls else None
+
+    def _connect(self, timeout=None):
+        server = smtplib.SMTP(self.host, self.port, timeout=timeout or self.timeout)
+        if self.debug:
+            server.set_debuglevel(1)
+        if self.starttls:
+            server.starttls(context=self._ssl_context)
+        if self.username:
+            server.login(self.username, self.password)
+        return server
+
+    def _checkout(self, timeout=None):
+        with self._lock:
+            server, last_used = self._idle.pop() if self._idle else (None, 0.0)
+        if server is not None and timeout is not None and server.sock is not None:
+            server.sock.settimeout(timeout)
+        if server is not None and time.monotonic() - last_used > self.max_idle:
+            try:
+                if server.noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected("NOOP failed")
+            except (smtplib.SMTPException, OSError):
+                _close(server)
+                server = None
+        return server or self._connect(timeout)
+
+    @contextmanager
+    def connection(self, deadline=None):
+        """
+        Borrow a live session; it goes back to the pool unless the caller raised.
+        deadline (time.monotonic()) caps the wait for a session and its socket timeout.
+        """
+        if not self._slots.acquire(timeout=_remaining(deadline)):
+            raise TimeoutError("no SMTP session became free in time")
+        try:
+            timeout = None if deadline is None else min(self.timeout, _remaining(deadline))
+            server = self._checkout(timeout)
+            try:
+                yield server
+            except BaseException:
+                _close(server)
+                raise
+            if timeout is not None and server.sock is not None:
+                server.sock.settimeout(self.timeout)
+            with self._lock:
+                self._idle.append((server, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def sendmail(self, from_addr, to_addrs, message, timeout=None):
+        """sendmail on a pooled session, reconnecting once if the session went stale; timeout bounds both tries."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for attempt in (1, 2):
+            try:
+                with self.connection(deadline) as server:
+                    return server.sendmail(from_addr, to_addrs, message)
+            except _STALE:
+                if attempt == 2:
+                    raise
+                # The server likely dropped every idle session, not just this one
+                self.close()
+
+    def send_alert(self, subject, body, recipients, sender=None, bcc=True, timeout=None):
+        """
+        Send one message to every recipient over a single session, within timeout seconds if given.
+        With bcc=True recipients only appear in the envelope, not the headers.
+        Returns the dict of refused recipients reported by the server.
+        """
+        sender = sender or self.username
+        recipients = [recipients] if isinstance(recipients, str) else list(recipients)
+        msg = MIMEMultipart()
+        msg["Subject"] = subject
+        msg["From"] = sender
+        msg["To"] = sender if bcc and len(recipients) > 1 else ", ".join(recipients)
+        msg.attach(MIMEText(body, "plain"))
+        return self.sendmail(sender, recipients, msg.as_string(), timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            _close(server)
+
+
+def _remaining(deadline):
+    """Seconds until deadline (None: no limit); raises once it has passed."""
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("SMTP send deadline passed")
+    return remaining
+
+
+def _close(server):
+    try:
+        server.quit()
+    except (smtplib.SMTPException, OSError):
+        server.close()
@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+from alert_queue import FAILED, PENDING, SENDING, SENT, AlertQueue, idempotency_key
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "alerts.sqlite3")
+
+
+def wait_final(queue, alert_ids, timeout=5.0):
+    return {alert_id: (status, attempts) for alert_id, status, attempts, _ in queue.watch(alert_ids, timeout)}
+
+
+def test_enqueue_is_idempotent(path):
+    queue = AlertQueue(path, {"email": lambda **_: True})
+    payload = {"subject": "s", "body": "b"}
+    key = idempotency_key("email", payload, scope=1)
+    assert queue.enqueue("email", payload, key=key) == queue.enqueue("email", payload, key=key)
+    assert queue.enqueue("email", payload, key=idempotency_key("email", payload, scope=2)) != queue.enqueue(
+        "email", payload, key=key)
+
+
+def test_unknown_channel_is_rejected(path):
+    with pytest.raises(ValueError):
+        AlertQueue(path, {"email": lambda **_: True}).enqueue("sms", {})
+
+
+def test_failures_are_retried_until_sent(path):
+    calls = []
+
+    def flaky(message, timeout):
+        calls.append(message)
+        if len(calls) < 3:
+            raise ConnectionError("try again")
+        return True
+
+    queue = AlertQueue(path, {"whatsapp": flaky}, workers=1, base_delay=0.01, poll_interval=0.01).start()
+    try:
+        alert_id = queue.enqueue("whatsapp", {"message": "help"})
+        assert wait_final(queue, [alert_id]) == {alert_id: (SENT, 3)}
+    finally:
+        queue.stop()
+    assert len(calls) == 3
+
+
+def test_gives_up_after_max_attempts(path):
+    queue = AlertQueue(path, {"email": lambda **_: False}, workers=1, max_attempts=2, base_delay=0.01,
+                       poll_interval=0.01).start()
+    try:
+        alert_id = queue.enqueue("email", {"subject": "s", "body": "b"})
+        assert wait_final(queue, [alert_id]) == {alert_id: (FAILED, 2)}
+        assert queue.status([alert_id])[alert_id][2] == "email handler reported failure"
+    finally:
+        queue.stop()
+
+
+def test_channels_of_a_batch_are_sent_in_parallel(path):
+    barrier = threading.Barrier(2, timeout=2)
+
+    def send(**_):
+        barrier.wait()  # only returns if both channels are in flight together
+        return True
+
+    queue = AlertQueue(path, {"email": send, "whatsapp": send}, workers=1, poll_interval=0.01)
+    ids = [queue.enqueue("email", {"subject": "s", "body": "b"}), queue.enqueue("whatsapp", {"message": "m"})]
+    queue.start()
+    try:
+        assert {status for status, _ in wait_final(queue, ids).values()} == {SENT}
+    finally:
+        queue.stop()
+
+
+def test_claimed_rows_are_not_claimed_twice(path):
+    queue = AlertQueue(path, {"email": lambda **_: True})
+    alert_id = queue.enqueue("email", {"subject": "s", "body": "b"})
+    token, rows = queue._claim()
+    assert [row[0] for row in rows] == [alert_id]
+    assert queue._claim()[1] == []
+    assert queue.status([alert_id])[alert_id][0] == SENDING
+
+
+def test_expired_lease_is_reclaimed_and_stale_worker_cannot_finish(path):
+    queue = AlertQueue(path, {"email": lambda **_: True}, lease=0.05)
+    alert_id = queue.enqueue("email", {"subject": "s", "body": "b"})
+    stale, _ = queue._claim()
+    time.sleep(0.1)
+    fresh, rows = queue._claim()
+    assert [row[0] for row in rows] == [alert_id] and rows[0][1] == 2
+
+    # The first worker lost the row: it may neither send nor record an outcome
+    assert not queue._renew(alert_id, stale)
+    queue._finish(alert_id, stale, 1, "late failure")
+    assert queue.status([alert_id])[alert_id] == (SENDING, 2, None)
+
+    assert queue._renew(alert_id, fresh)
+    queue._finish(alert_id, fresh, 2, None)
+    assert queue.status([alert_id])[alert_id] == (SENT, 2, None)
+
+
+def test_failed_attempt_is_scheduled_with_backoff(path):
+    queue = AlertQueue(path, {"email": lambda **_: True}, base_delay=60)
+    alert_id = queue.enqueue("email", {"subject": "s", "body": "b"})
+    token, _ = queue._claim()
+    queue._finish(alert_id, token, 1, "boom")
+    assert queue.status([alert_id])[alert_id] == (PENDING, 1, "boom")
+    assert queue._claim()[1] == []  # not due for about a minute
+
+
+def test_slow_send_is_not_retried_while_running(path):
+    calls = []
+
+    def slow(timeout, **_):
+        calls.append(timeout)
+        time.sleep(0.5)
+        return True
+
+    # The handler outlives both send_timeout and the lease; the worker keeps renewing it
+    queue = AlertQueue(path, {"email": slow}, workers=2, lease=0.2, send_timeout=0.2, poll_interval=0.01).start()
+    try:
+        alert_id = queue.enqueue("email", {"subject": "s", "body": "b"})
+        assert wait_final(queue, [alert_id]) == {alert_id: (SENT, 1)}
+    finally:
+        queue.stop()
+    assert calls == [0.2]
@@ -0,0 +1,34 @@
+import time
+from array import array
+
+from audio_stream import ChunkedTranscriber, StreamingPipeline
+from benchmarks.streaming_audio import LiveSource
+
+FRAME_MS = 10
+SILENCE = array("h", [0] * 160).tobytes()
+SPEECH = array("h", [3000, -3000] * 80).tobytes()
+
+
+def slow_recognize(pcm, sample_rate):
+    time.sleep(0.15)  # an HTTP recognizer, several frames long
+    return "fire " * (len(pcm) // 16000 + 1)
+
+
+def test_slow_transcriber_does_not_drop_live_frames():
+    frames = [SILENCE] * 10 + [SPEECH] * 150 + [SILENCE] * 40
+    source = LiveSource(frames, frame_ms=FRAME_MS, buffer_frames=10)  # 100 ms, less than one recognizer call
+    transcriber = ChunkedTranscriber(slow_recognize, every_ms=200, frame_ms=FRAME_MS)
+    hits = []
+    pipeline = StreamingPipeline(transcriber, classify=lambda text: "fire", frame_ms=FRAME_MS,
+                                 end_silence_ms=300, on_provisional=hits.append)
+    result = pipeline.run(source)
+    assert source.dropped == 0
+    assert result.category == "fire" and "fire" in result.text
+    assert [hit.keyword for hit in hits] == ["fire"]
+
+
+def test_no_speech_times_out():
+    pipeline = StreamingPipeline(ChunkedTranscriber(slow_recognize), classify=lambda text: "fire",
+                                 frame_ms=FRAME_MS, start_timeout_ms=200)
+    result = pipeline.run(iter([SILENCE] * 100))
+    assert result.text == "" and result.category is None
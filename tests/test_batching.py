@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from batching import InferenceScheduler
+
+
+class Gate:
+    """predict_batch that records batches and holds the first one until released."""
+
+    def __init__(self, fn=str.upper):
+        self.fn = fn
+        self.batches = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        if len(self.batches) == 1:
+            self.entered.set()
+            self.release.wait(5)
+        return [self.fn(item) for item in items]
+
+
+@pytest.fixture
+def gate():
+    return Gate()
+
+
+def test_each_caller_gets_its_own_result_from_shared_batches(gate):
+    scheduler = InferenceScheduler(gate, max_wait_ms=50, max_batch=64).start()
+    try:
+        first = scheduler.submit("a")
+        assert gate.entered.wait(5)
+        # Queued while the first batch is busy, so they are scored together
+        futures = {text: scheduler.submit(text) for text in "bcdefg"}
+        gate.release.set()
+        assert first.result(5) == "A"
+        assert {text: f.result(5) for text, f in futures.items()} == {text: text.upper() for text in "bcdefg"}
+    finally:
+        scheduler.stop()
+    assert gate.batches == [["a"], list("bcdefg")]
+    assert scheduler.mean_batch_size == 3.5
+
+
+def test_batches_are_capped_at_max_batch(gate):
+    scheduler = InferenceScheduler(gate, max_wait_ms=50, max_batch=4).start()
+    try:
+        scheduler.submit("a")
+        assert gate.entered.wait(5)
+        futures = [scheduler.submit(str(i)) for i in range(10)]
+        gate.release.set()
+        assert [f.result(5) for f in futures] == [str(i) for i in range(10)]
+    finally:
+        scheduler.stop()
+    assert [len(batch) for batch in gate.batches] == [1, 4, 4, 2]
+
+
+def test_a_lone_caller_does_not_wait_for_the_window():
+    scheduler = InferenceScheduler(lambda items: items, max_wait_ms=1000).start()
+    try:
+        for _ in range(3):
+            start = time.monotonic()
+            assert scheduler("x", timeout=5) == "x"
+            assert time.monotonic() - start < 0.5
+    finally:
+        scheduler.stop()
+
+
+def test_a_failed_batch_fails_every_future_in_it(gate):
+    def predict(items):
+        gate(items)
+        raise RuntimeError("model unavailable")
+
+    scheduler = InferenceScheduler(predict, max_wait_ms=50).start()
+    try:
+        first = scheduler.submit("a")
+        assert gate.entered.wait(5)
+        futures = [scheduler.submit(text) for text in "bc"]
+        gate.release.set()
+        for future in [first, *futures]:
+            with pytest.raises(RuntimeError, match="model unavailable"):
+                future.result(5)
+    finally:
+        scheduler.stop()
+
+
+def test_cancelled_requests_are_not_scored(gate):
+    scheduler = InferenceScheduler(gate, max_wait_ms=50).start()
+    try:
+        scheduler.submit("a")
+        assert gate.entered.wait(5)
+        cancelled, kept = scheduler.submit("b"), scheduler.submit("c")
+        assert cancelled.cancel()
+        gate.release.set()
+        assert kept.result(5) == "C"
+    finally:
+        scheduler.stop()
+    assert gate.batches == [["a"], ["c"]]
+
+
+def test_submit_starts_the_scheduler_and_stop_ends_it():
+    scheduler = InferenceScheduler(lambda items: [len(item) for item in items])
+    assert scheduler("four", timeout=5) == 4
+    thread = scheduler._thread
+    scheduler.stop()
+    assert not thread.is_alive()
@@ -0,0 +1,65 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+from compiled_model import CompiledEmergencyModel
+from model_bundle import read_bundle, write_bundle
+from train_model import labels, texts
+
+PROBES = texts + [
+    "",
+    "!!!",
+    "FIRE FIRE FIRE",
+    "unknownword another",
+    "help help help heart attack",
+    "Smoke and fire near the ambulance bay",
+]
+FLOAT64_ATOL = 1e-9
+FLOAT32_ATOL = 1e-5  # bundles store float32 weights; the compiled path sums them in float64
+
+
+def assert_parity(compiled, model, vectorizer, atol):
+    X = vectorizer.transform(PROBES)
+    for text, label, proba in zip(PROBES, model.predict(X), model.predict_proba(X)):
+        assert compiled.predict(text) == label, text
+        assert compiled.predict_proba(text) == pytest.approx(proba.tolist(), abs=atol), text
+
+
+def fit(vectorizer):
+    X = vectorizer.fit_transform(texts) if hasattr(vectorizer, "fit_transform") else vectorizer.transform(texts)
+    return MultinomialNB().fit(X, labels)
+
+
+def test_tfidf_matches_sklearn():
+    vectorizer = TfidfVectorizer()
+    model = fit(vectorizer)
+    assert_parity(CompiledEmergencyModel.from_sklearn(model, vectorizer), model, vectorizer, FLOAT64_ATOL)
+
+
+def test_hashing_matches_sklearn():
+    vectorizer = HashingVectorizer(n_features=2 ** 12, alternate_sign=False, norm="l2")
+    model = fit(vectorizer)
+    assert_parity(CompiledEmergencyModel.from_sklearn(model, vectorizer), model, vectorizer, FLOAT64_ATOL)
+
+
+@pytest.mark.parametrize("vectorizer", [
+    TfidfVectorizer(),
+    HashingVectorizer(n_features=2 ** 12, alternate_sign=False, norm="l2"),
+])
+def test_bundle_matches_compiled_from_bundle(tmp_path, vectorizer):
+    path = str(tmp_path / "model.bundle")
+    write_bundle(path, fit(vectorizer), vectorizer)
+    model, bundle_vectorizer = read_bundle(path)
+    assert model.feature_log_prob_.dtype == np.float32
+    compiled = CompiledEmergencyModel.from_sklearn(model, bundle_vectorizer)
+    assert_parity(compiled, model, bundle_vectorizer, FLOAT32_ATOL)
+
+
+def test_rejects_features_it_cannot_reproduce():
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2))
+    model = fit(vectorizer)
+    with pytest.raises(ValueError, match="ngram_range"):
+        CompiledEmergencyModel.from_sklearn(model, vectorizer)
@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from alert_queue import AlertQueue
+from contacts import Contact, ContactDirectory, FanOut
+
+CENTER = (31.63, 74.87)
+
+
+def contact(name, lat=None, lon=None, role="staff", zone="block-a", email=True, whatsapp=True):
+    return Contact(name, role, zone, f"{name}@example.com" if email else None,
+                   f"whatsapp:+{abs(hash(name)) % 10 ** 10}" if whatsapp else None, lat, lon)
+
+
+@pytest.fixture
+def directory():
+    return ContactDirectory([
+        contact("near", CENTER[0] + 0.001, CENTER[1]),  # ~110 m
+        contact("far", CENTER[0] + 0.05, CENTER[1]),  # ~5.6 km
+        contact("guard", CENTER[0], CENTER[1] + 0.002, role="security", whatsapp=False),
+        contact("remote", role="student", zone="block-b"),  # no coordinates
+    ])
+
+
+def names(directory, recipients, channel="email"):
+    by_email = {c.email: c.name for c in directory.contacts}
+    return sorted(by_email[address] for address in recipients[channel])
+
+
+def test_geofence_filters_by_exact_distance(directory):
+    recipients = directory.select(*CENTER, radius_km=1)
+    assert names(directory, recipients) == ["guard", "near"]
+    assert len(recipients["whatsapp"]) == 1  # guard has no WhatsApp
+
+
+def test_zones_and_geofence_are_combined(directory):
+    recipients = directory.select(*CENTER, radius_km=1, zones=["block-b"])
+    assert names(directory, recipients) == ["guard", "near", "remote"]
+
+
+def test_roles_restrict_the_selection(directory):
+    assert names(directory, directory.select(*CENTER, radius_km=10, roles=["security"])) == ["guard"]
+
+
+def test_no_filter_selects_everyone_once(directory):
+    recipients = directory.select()
+    assert names(directory, recipients) == ["far", "guard", "near", "remote"]
+
+
+def test_geofence_across_cell_edges():
+    # Cells are 0.01 deg; these contacts sit on either side of a cell boundary
+    d = ContactDirectory([contact("a", 31.6099, 74.87), contact("b", 31.6101, 74.87)])
+    assert len(d.select(31.61, 74.87, radius_km=0.1)["email"]) == 2
+
+
+def test_fanout_queues_batches_once_per_key(tmp_path):
+    queue = AlertQueue(str(tmp_path / "alerts.sqlite3"), {"email": lambda **_: True, "whatsapp": lambda **_: True})
+    recipients = {"email": [f"c{i}@example.com" for i in range(5)], "whatsapp": ["+1", "+2", "+3"]}
+    fanout = FanOut(queue, batch_sizes={"email": 2})
+    alerts = fanout.enqueue("s", "b", recipients, key="evac")
+    assert len(alerts["email"]) == 3 and len(alerts["whatsapp"]) == 3
+    assert fanout.enqueue("s", "b", recipients, key="evac") == alerts  # a second click
+    assert queue.group_status("evac") == {"email": {"pending": 3}, "whatsapp": {"pending": 3}}
+    assert queue.group_status("evacuate") == {}
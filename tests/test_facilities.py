@@ -0,0 +1,94 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from facilities import FacilityIndex, load_facilities
+from geo import haversine_matrix
+
+CENTER = (31.63, 74.87)
+
+
+def records(n=50, seed=5):
+    rng = np.random.default_rng(seed)
+    lats, lons = CENTER[0] + rng.normal(0, 0.05, n), CENTER[1] + rng.normal(0, 0.05, n)
+    return [{"type": ("hospital", "clinic", "police_station")[i % 3], "name": f"F{i}", "lat": lat, "lon": lon}
+            for i, (lat, lon) in enumerate(zip(lats, lons))]
+
+
+def brute_force(rows, place_types, k=None, radius_km=None):
+    rows = [r for r in rows if r["type"] in place_types]
+    d = haversine_matrix([CENTER[0]], [CENTER[1]], [r["lat"] for r in rows], [r["lon"] for r in rows])[0]
+    order = [i for i in np.argsort(d, kind="stable") if radius_km is None or d[i] <= radius_km]
+    return [rows[i]["name"] for i in order[:k]]
+
+
+def names(results):
+    return [r["display_name"] for r in results]
+
+
+@pytest.mark.parametrize("k", [1, 5, 34])
+def test_nearest_matches_brute_force(k):
+    rows = records()
+    found = FacilityIndex(rows).nearest(*CENTER, "hospital", k=k)
+    assert names(found) == brute_force(rows, ("hospital", "clinic"), k=k)
+    assert [r["distance_km"] for r in found] == sorted(r["distance_km"] for r in found)
+
+
+def test_k_beyond_the_dataset_returns_everything():
+    rows = records()
+    found = FacilityIndex(rows).nearest(*CENTER, "police", k=1000)
+    assert names(found) == brute_force(rows, ("police_station",))
+
+
+def test_k_zero_and_unknown_type_return_nothing():
+    index = FacilityIndex(records())
+    assert index.nearest(*CENTER, "hospital", k=0) == []
+    assert index.nearest(*CENTER, "fire_station", k=5) == []
+    assert index.within(*CENTER, "fire_station", radius_km=100) == []
+
+
+@pytest.mark.parametrize("radius_km", [0.0, 2.0, 5.0, 50.0])
+def test_radius_matches_brute_force(radius_km):
+    rows = records()
+    index = FacilityIndex(rows)
+    expected = brute_force(rows, ("hospital", "clinic"), radius_km=radius_km)
+    assert names(index.nearest(*CENTER, "hospital", k=1000, radius_km=radius_km)) == expected
+    assert names(index.within(*CENTER, "hospital", radius_km=radius_km)) == expected
+    assert names(index.nearest(*CENTER, "hospital", k=2, radius_km=radius_km)) == expected[:2]
+
+
+def test_facility_at_the_centre_is_inside_a_zero_radius():
+    index = FacilityIndex([{"type": "hospital", "name": "Here", "lat": CENTER[0], "lon": CENTER[1]}])
+    assert names(index.nearest(*CENTER, radius_km=0.0)) == ["Here"]
+    assert index.nearest(*CENTER)[0]["distance_km"] == 0.0
+
+
+def test_skips_unknown_types_and_bad_coordinates(tmp_path):
+    path = tmp_path / "facilities.csv"
+    path.write_text("amenity,name,lat,lon\nhospital,A,31.6,74.8\nschool,B,31.6,74.8\nhospital,C,,74.8\n")
+    index = FacilityIndex(load_facilities(str(path)))
+    assert len(index) == 1
+    assert names(index.nearest(31.6, 74.8)) == ["A"]
+
+
+def test_find_nearby_falls_back_to_openstreetmap(tmp_path, monkeypatch):
+    utils = pytest.importorskip("utils")
+    from fakes import FakeNominatim
+    from poi_cache import POICache
+
+    monkeypatch.setattr(utils, "_facility_index", FacilityIndex(records()))
+    with FakeNominatim() as fake:
+        monkeypatch.setattr(utils, "_poi_cache", POICache(str(tmp_path / "poi.sqlite3"), base_url=fake.url,
+                                                          min_interval=0))
+        local = utils.find_nearby(*CENTER, "hospital", k=3)
+        assert fake.requests.get("/search", 0) == 0  # the dataset has hospitals
+
+        found = utils.find_nearby(*CENTER, "fire_station", k=3)
+        assert len(found) == 3 and fake.requests.get("/search", 0) > 0
+        assert set(found[0]) == set(local[0])
+        assert [r["distance_km"] for r in found] == sorted(r["distance_km"] for r in found)
+        assert all(r["distance_km"] <= 1.0 for r in utils.find_nearby(*CENTER, "fire_station", k=50, radius_km=1.0))
+
+        monkeypatch.setattr(utils, "OSM_FALLBACK", False)
+        assert utils.find_nearby(*CENTER, "fire_station") == []
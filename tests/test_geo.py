@@ -0,0 +1,42 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from geo import assign_nearest_units, haversine_matrix
+
+
+def greedy(incident_lats, incident_lons, unit_lats, unit_lons, max_km=None):
+    """Reference: sort every incident-unit pair and take the closest free ones."""
+    d = haversine_matrix(incident_lats, incident_lons, unit_lats, unit_lons)
+    assigned = [-1] * len(incident_lats)
+    used = set()
+    for flat in np.argsort(d, axis=None, kind="stable"):
+        r, c = divmod(int(flat), d.shape[1])
+        if max_km is not None and d[r, c] > max_km:
+            break
+        if assigned[r] < 0 and c not in used:
+            assigned[r] = c
+            used.add(c)
+    return assigned
+
+
+@pytest.mark.parametrize("n, m, max_km", [(40, 60, None), (60, 40, None), (50, 50, 5.0), (30, 30, None)])
+def test_matches_full_greedy(n, m, max_km):
+    rng = np.random.default_rng(n * 100 + m)
+    # A tight cluster of incidents makes them compete for the same few units
+    incident_lats, incident_lons = 30.7 + rng.normal(0, 0.01, n), 76.7 + rng.normal(0, 0.01, n)
+    unit_lats, unit_lons = 30.7 + rng.normal(0, 0.05, m), 76.7 + rng.normal(0, 0.05, m)
+    assigned, distances = assign_nearest_units(incident_lats, incident_lons, unit_lats, unit_lons,
+                                               max_km=max_km, chunk_rows=7, k=2)
+    assert assigned.tolist() == greedy(incident_lats, incident_lons, unit_lats, unit_lons, max_km)
+    assert all(math.isinf(d) for d, a in zip(distances, assigned) if a < 0)
+
+
+def test_available_mask_and_empty():
+    assigned, _ = assign_nearest_units([0.0, 0.0], [0.0, 0.1], [0.0, 0.0, 0.0], [0.0, 0.1, 0.2],
+                                       available=[False, True, True])
+    assert sorted(assigned.tolist()) == [1, 2]
+    assigned, distances = assign_nearest_units([0.0], [0.0], [], [])
+    assert assigned.tolist() == [-1] and math.isinf(distances[0])
@@ -0,0 +1,31 @@
+import pytest
+
+from hashing import feature_index, murmurhash3_32
+
+# Reference values from the MurmurHash3_x86_32 implementation (seed 0, signed)
+KNOWN = {
+    "": 0,
+    "foo": -156908512,
+    "hello": 613153351,
+    "The quick brown fox jumps over the lazy dog": 776992547,
+}
+
+
+@pytest.mark.parametrize("key,expected", KNOWN.items())
+def test_known_values(key, expected):
+    assert murmurhash3_32(key) == expected
+
+
+def test_bytes_and_str_agree():
+    assert murmurhash3_32("aag लगी") == murmurhash3_32("aag लगी".encode("utf-8"))
+
+
+def test_feature_index_in_range():
+    for token in ("fire", "ambulance", "आग", "x" * 50):
+        assert 0 <= feature_index(token, 2 ** 10) < 2 ** 10
+
+
+def test_matches_sklearn():
+    sklearn_murmur = pytest.importorskip("sklearn.utils").murmurhash3_32
+    for token in ("fire", "ambulance", "आग", "a", "abcd", "abcde"):
+        assert murmurhash3_32(token) == sklearn_murmur(token, positive=False)
@@ -0,0 +1,21 @@
+from language import DEFAULT_LANGUAGE, detect_language
+
+
+def test_ascii_is_default_language():
+    assert detect_language("my house is on fire") == DEFAULT_LANGUAGE
+    assert detect_language("ghar mein aag lagi hai") == DEFAULT_LANGUAGE  # romanised Hindi
+
+
+def test_scripts():
+    assert detect_language("मेरे घर में आग लगी है") == "hi"
+    assert detect_language("ਮੇਰੇ ਘਰ ਨੂੰ ਅੱਗ ਲੱਗੀ ਹੈ") == "pa"
+
+
+def test_majority_script_wins_with_latin_counted():
+    assert detect_language("fire आग") == DEFAULT_LANGUAGE
+    assert detect_language("मेरे घर में आग लगी है fire") == "hi"
+    assert detect_language("café on fire") == DEFAULT_LANGUAGE
+
+
+def test_no_letters_falls_back_to_default():
+    assert detect_language("!!! ✋ 112", default="xx") == "xx"
@@ -0,0 +1,98 @@
+import pytest
+
+import model_registry
+from compiled_model import CompiledEmergencyModel
+from model_registry import LanguageModels, ModelVersion
+
+
+class FakeRegistry:
+    """Stands in for ModelRegistry so loading needs no bundle reader."""
+
+    created = []
+
+    def __init__(self, paths, loader, poll_interval=2.0):
+        model, vectorizer = loader()
+        self.version = ModelVersion(model, vectorizer, paths[0], 0.0)
+        self.stopped = False
+        FakeRegistry.created.append(self)
+
+    def current(self):
+        return self.version
+
+    def start(self):
+        return self
+
+    def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def bundles(tmp_path, monkeypatch):
+    FakeRegistry.created = []
+    monkeypatch.setattr(model_registry, "ModelRegistry", FakeRegistry)
+    paths = {}
+    for language, size in (("hi", 100), ("pa", 100), ("ur", 100)):
+        paths[language] = tmp_path / f"model.{language}.bundle"
+        paths[language].write_bytes(b"x" * size)
+    return lambda language: str(paths.get(language, tmp_path / "missing.bundle"))
+
+
+def test_loads_on_first_use_and_evicts_least_recently_used(bundles):
+    models = LanguageModels(bundles, lambda path: (path, None), budget_bytes=200)
+    assert models.get("hi").model == bundles("hi")
+    models.get("pa")
+    models.get("hi")  # pa is now the least recently used
+    models.get("ur")
+    assert models.languages == ["hi", "ur"]
+    assert [r.stopped for r in FakeRegistry.created] == [False, True, False]
+    assert models.get("xx") is None
+
+
+def test_failed_load_falls_back_and_is_not_retried(bundles, tmp_path):
+    attempts = []
+
+    def loader(path):
+        attempts.append(path)
+        raise ValueError("corrupt bundle")
+
+    models = LanguageModels(bundles, loader, budget_bytes=1 << 20)
+    assert models.get("hi") is None
+    assert models.get("hi") is None
+    assert len(attempts) == 1
+    assert "corrupt bundle" in models.last_errors["hi"]
+
+    # A replaced file gets a fresh attempt
+    (tmp_path / "model.hi.bundle").write_bytes(b"y" * 101)
+    assert models.get("hi") is None
+    assert len(attempts) == 2
+
+
+def tiny_model(label):
+    """A compiled model that always answers label."""
+    classes = ["fire", "medical", "police"]
+    prior = [0.0 if c == label else -10.0 for c in classes]
+    return CompiledEmergencyModel({}, None, classes, prior, [[], [], []])
+
+
+def test_classify_batch_groups_texts_by_language():
+    utils = pytest.importorskip("utils")  # needs python-dotenv
+    models = {"en": tiny_model("fire"), "hi": tiny_model("medical")}
+    asked = []
+
+    def models_for(language):
+        asked.append(language)
+        return models.get(language, models["en"]), None
+
+    texts = ["house on fire", "मदद चाहिए", "fire आग", "ਮਦਦ"]
+    labels = [label for label, _ in utils.classify_batch(texts, models_for)]
+    assert labels == ["fire", "medical", "fire", "fire"]  # Punjabi has no model here: English one
+    assert sorted(asked) == ["en", "hi", "pa"]  # one model lookup per language, not per text
+
+
+def test_model_for_language_falls_back_to_default(bundles, monkeypatch):
+    utils = pytest.importorskip("utils")
+    monkeypatch.setattr(utils, "_language_models", LanguageModels(bundles, lambda path: (path, None), 1 << 20))
+    default = (tiny_model("fire"), None)
+    assert utils.model_for_language("hi", default=default)[0] == bundles("hi")
+    assert utils.model_for_language("xx", default=default) is default
+    assert utils.model_for_language("en", default=default) is default
@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+from messaging import RateLimited, TokenBucket, TwilioMessagingClient, failed_recipients
+
+
+def test_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=50, capacity=3)
+    start = time.monotonic()
+    assert all(bucket.acquire(timeout=0) for _ in range(3))
+    assert not bucket.acquire(timeout=0)  # burst used up
+    assert bucket.acquire(timeout=1)  # refills at 50/s
+    assert time.monotonic() - start < 0.5
+
+
+def test_bucket_times_out():
+    bucket = TokenBucket(rate=1, capacity=1)
+    assert bucket.acquire()
+    start = time.monotonic()
+    assert not bucket.acquire(timeout=0.05)
+    assert 0.04 <= time.monotonic() - start < 0.5
+
+
+def test_failed_recipients():
+    assert failed_recipients({"+1": "SM1", "+2": RateLimited()}) == ["+2"]
+
+
+def test_send_past_its_deadline_fails_without_a_request():
+    client = TwilioMessagingClient("AC", "token", "whatsapp:+1", rate=1, burst=1)
+    client.bucket.acquire()  # the next token is a second away
+
+    def post(*args, **kwargs):
+        raise AssertionError("no request should be made")
+
+    client.session.post = post
+    start = time.monotonic()
+    results = client.send_many(["whatsapp:+2"], "help", timeout=0.1)
+    assert isinstance(results["whatsapp:+2"], RateLimited)
+    assert time.monotonic() - start < 0.5
+
+
+def test_whatsapp_without_recipients_is_a_failure(monkeypatch):
+    utils = pytest.importorskip("utils")
+    monkeypatch.delenv("WHATSAPP_TO", raising=False)
+    assert utils.send_whatsapp("help") is False
+    with pytest.raises(ValueError):
+        utils.send_whatsapp_many("help")
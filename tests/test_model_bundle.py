@@ -0,0 +1,65 @@
+import struct
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+from model_bundle import HEADER, BundleError, read_bundle, write_bundle
+
+TEXTS = ["fire in the kitchen", "he collapsed and is not breathing", "a man broke in with a knife"]
+LABELS = ["fire", "medical", "violence"]
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    vectorizer = TfidfVectorizer()
+    model = MultinomialNB().fit(vectorizer.fit_transform(TEXTS), LABELS)
+    path = tmp_path / "model.bundle"
+    write_bundle(str(path), model, vectorizer)
+    return path
+
+
+def test_round_trip(bundle):
+    model, vectorizer = read_bundle(str(bundle))
+    assert list(model.predict(vectorizer.transform(["the kitchen is on fire"]))) == ["fire"]
+
+
+def test_rejects_bad_checksum(bundle):
+    data = bytearray(bundle.read_bytes())
+    data[-1] ^= 0xFF
+    bundle.write_bytes(bytes(data))
+    with pytest.raises(BundleError, match="checksum"):
+        read_bundle(str(bundle))
+    read_bundle(str(bundle), verify=False)  # only the checksum is wrong
+
+
+def test_rejects_unknown_version(bundle):
+    data = bytearray(bundle.read_bytes())
+    struct.pack_into("<I", data, 8, 99)  # version follows the 8-byte magic
+    bundle.write_bytes(bytes(data))
+    with pytest.raises(BundleError, match="unsupported bundle version 99"):
+        read_bundle(str(bundle))
+
+
+def test_rejects_truncated_file(bundle):
+    bundle.write_bytes(bundle.read_bytes()[:HEADER.size - 1])
+    with pytest.raises(BundleError, match="truncated"):
+        read_bundle(str(bundle))
+
+
+def test_legacy_pickles_are_converted_on_first_load(tmp_path, monkeypatch):
+    joblib = pytest.importorskip("joblib")
+    utils = pytest.importorskip("utils")
+    vectorizer = TfidfVectorizer()
+    model = MultinomialNB().fit(vectorizer.fit_transform(TEXTS), LABELS)
+    joblib.dump(model, tmp_path / "emergency_model.pkl")
+    joblib.dump(vectorizer, tmp_path / "vectorizer.pkl")
+    monkeypatch.chdir(tmp_path)
+
+    loaded, bundle_vectorizer = utils.load_emergency_model()
+    assert (tmp_path / utils.BUNDLE_PATH).exists()
+    assert list(loaded.classes_) == list(model.classes_)
+    assert list(loaded.predict(bundle_vectorizer.transform(TEXTS))) == LABELS
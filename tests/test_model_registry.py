@@ -0,0 +1,107 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+pytest.importorskip("dotenv")  # ModelRegistry warms new versions through utils
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+from model_bundle import read_bundle, write_bundle
+from model_registry import ModelMismatchError, ModelRegistry, check_compatible
+
+TEXTS = ["fire in the kitchen", "he collapsed and is not breathing", "a man broke in with a knife"]
+
+
+def train(labels):
+    vectorizer = TfidfVectorizer()
+    return MultinomialNB().fit(vectorizer.fit_transform(TEXTS), labels), vectorizer
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    path = str(tmp_path / "model.bundle")
+    write_bundle(path, *train(["fire", "medical", "police"]))
+    return path
+
+
+def age(path, seconds):
+    """Backdate path as if it was written seconds ago."""
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def registry(bundle, **kwargs):
+    return ModelRegistry([bundle], lambda: read_bundle(bundle), **kwargs)
+
+
+def test_reloads_a_replaced_bundle(bundle):
+    swaps = []
+    models = registry(bundle, settle=0.5, on_swap=swaps.append)
+    first = models.current()
+    assert list(first.model.classes_) == ["fire", "medical", "police"]
+
+    write_bundle(bundle, *train(["fire", "medical", "violence"]))
+    age(bundle, 5)
+    assert models.check()
+    assert list(models.current().model.classes_) == ["fire", "medical", "violence"]
+    assert swaps == [models.current()]
+    assert models.current().fingerprint != first.fingerprint
+    assert list(first.model.classes_) == ["fire", "medical", "police"]  # holders keep their version
+
+
+def test_waits_for_a_fresh_write_to_settle(bundle):
+    models = registry(bundle, settle=60)
+    write_bundle(bundle, *train(["fire", "medical", "violence"]))
+    assert not models.check()  # just written: may still be in progress
+    assert list(models.current().model.classes_) == ["fire", "medical", "police"]
+    assert models.check(force=True)  # atomic writers skip the wait
+    assert list(models.current().model.classes_) == ["fire", "medical", "violence"]
+
+
+def test_touching_without_changing_content_keeps_the_version(bundle):
+    models = registry(bundle, settle=0)
+    first = models.current()
+    age(bundle, 5)
+    assert not models.check()
+    assert models.current() is first
+
+
+def test_rejects_a_broken_bundle_until_it_changes(bundle):
+    loads = []
+    models = ModelRegistry([bundle], lambda: loads.append(1) or read_bundle(bundle), settle=0)
+    first = models.current()
+    with open(bundle, "wb") as f:
+        f.write(b"not a bundle" * 10)
+    age(bundle, 5)
+    assert not models.check()
+    assert models.current() is first
+    assert "BundleError" in models.last_error
+    assert not models.check()  # same broken file: not loaded again
+    assert len(loads) == 2
+
+    write_bundle(bundle, *train(["fire", "medical", "violence"]))
+    age(bundle, 1)
+    assert models.check()
+    assert models.last_error is None
+
+
+def test_watcher_thread_picks_up_changes(bundle):
+    models = registry(bundle, poll_interval=0.05, settle=0).start()
+    try:
+        write_bundle(bundle, *train(["fire", "medical", "violence"]))
+        deadline = time.monotonic() + 5
+        while "violence" not in models.current().model.classes_ and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert "violence" in models.current().model.classes_
+    finally:
+        models.stop()
+
+
+def test_check_compatible_catches_mismatched_artifacts():
+    model, _ = train(["fire", "medical", "police"])
+    other = TfidfVectorizer().fit(TEXTS + ["flood water rising"])
+    with pytest.raises(ModelMismatchError):
+        check_compatible(model, other)
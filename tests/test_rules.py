@@ -0,0 +1,63 @@
+from rules import MODEL_CLASSES, Cascade, RuleMatcher, model_class
+
+
+def test_phrases_match_whole_words_only():
+    matcher = RuleMatcher()
+    assert matcher.classify("the ceasefire held overnight") is None
+    assert matcher.classify("my kitchen is on fire") == ("fire", 1.0)
+
+
+def test_raw_categories_are_reported_for_guidance():
+    matcher = RuleMatcher()
+    assert matcher.classify("there was a car accident on the highway")[0] == "accident"
+    assert matcher.classify("he was stabbed outside the shop")[0] == "violence"
+
+
+def test_categories_can_be_reported_as_model_classes():
+    matcher = RuleMatcher(classes=MODEL_CLASSES)
+    assert matcher.classify("a car accident")[0] == "medical"
+    assert matcher.classify("he was stabbed outside the shop")[0] == "police"
+    assert set(MODEL_CLASSES.values()) == {"fire", "medical", "police"}
+
+
+def test_nested_phrase_counts_once():
+    matcher = RuleMatcher()
+    assert matcher.scores("car accident")[0] == {"accident": 1.0}
+    assert matcher.scores("the fire alarm is ringing")[0] == {"fire": 1.0}
+    # Separate occurrences still add up
+    assert matcher.scores("fire here and fire there")[0] == {"fire": 2.0}
+
+
+def test_weak_phrase_alone_does_not_settle():
+    assert RuleMatcher().classify("i smell smoke") is None
+
+
+def test_negation_falls_through():
+    scores, negated = RuleMatcher().scores("there is no fire")
+    assert negated
+    assert RuleMatcher().classify("there is no fire") is None
+
+
+def test_ambiguous_text_falls_through():
+    # fire 1.0 vs medical 1.0: neither has the required share
+    assert RuleMatcher().classify("fire and someone fainted") is None
+
+
+def test_model_class_passes_model_labels_through():
+    assert model_class("violence") == "police"
+    assert model_class("police") == "police"
+
+
+def test_cascade_uses_model_only_when_rules_are_unsure():
+    calls = []
+
+    def model_stage(text):
+        calls.append(text)
+        return "police", 0.7
+
+    cascade = Cascade(model_stage)
+    assert cascade("house on fire") == ("fire", 1.0, "rules")
+    assert cascade("please send someone quickly") == ("police", 0.7, "model")
+    assert calls == ["please send someone quickly"]
+    stats = cascade.stats()
+    assert stats["rules"]["count"] == 1 and stats["model"]["count"] == 1
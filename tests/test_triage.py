@@ -0,0 +1,121 @@
+import csv
+import gzip
+import json
+import os
+import subprocess
+import sys
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+pytest.importorskip("dotenv")
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+from model_bundle import write_bundle
+from parallel import bounded_imap, chunked
+from triage import triage
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRAIN = {
+    "fire": ["my house is on fire", "smoke and flames in the building"],
+    "medical": ["he collapsed and is not breathing", "need an ambulance for a heart attack"],
+    "police": ["a man broke in with a knife", "there is a robbery in progress"],
+}
+MESSAGES = ["flames in my house", "she is not breathing", "robbery with a knife"]
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    texts = [t for group in TRAIN.values() for t in group]
+    labels = [label for label, group in TRAIN.items() for _ in group]
+    vectorizer = TfidfVectorizer()
+    path = str(tmp_path / "model.bundle")
+    write_bundle(path, MultinomialNB().fit(vectorizer.fit_transform(texts), labels), vectorizer)
+    return path
+
+
+def test_csv_in_csv_out_keeps_fields_and_order(tmp_path, bundle):
+    src, dst = tmp_path / "in.csv", tmp_path / "out.csv"
+    with open(src, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "text"])
+        writer.writerows((i, text) for i, text in enumerate(MESSAGES * 3))
+    lines, _ = triage(str(src), str(dst), workers=1, chunk_size=2, bundle_path=bundle)
+    assert lines == 9
+    with open(dst, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["id"] for row in rows] == [str(i) for i in range(9)]
+    assert [row["label"] for row in rows] == ["fire", "medical", "police"] * 3
+    assert all(0 < float(row["confidence"]) <= 1 for row in rows)
+
+
+def test_jsonl_to_gzipped_csv_unions_fields_and_skips_bad_lines(tmp_path, bundle, capsys):
+    src, dst = tmp_path / "in.jsonl", tmp_path / "out.csv.gz"
+    src.write_text("\n".join([
+        json.dumps({"text": MESSAGES[0], "id": 1}),
+        "not json",
+        json.dumps(["a list"]),
+        json.dumps({"text": MESSAGES[1], "caller": "+91 99999"}),
+    ]) + "\n")
+    lines, _ = triage(str(src), str(dst), workers=1, bundle_path=bundle)
+    assert lines == 2
+    with gzip.open(dst, "rt", newline="") as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+    assert reader.fieldnames == ["text", "id", "caller", "label", "confidence"]
+    assert [(row["id"], row["caller"], row["label"]) for row in rows] == [("1", "", "fire"), ("", "+91 99999", "medical")]
+    err = capsys.readouterr().err
+    assert "in.jsonl:2: skipped" in err and "in.jsonl:3: skipped (not a JSON object)" in err
+
+
+def test_text_lines_to_jsonl_with_a_worker_pool(tmp_path, bundle):
+    src, dst = tmp_path / "in.txt", tmp_path / "out.jsonl"
+    src.write_text("\n".join(MESSAGES * 4) + "\n")
+    lines, _ = triage(str(src), str(dst), workers=2, chunk_size=3, bundle_path=bundle)
+    rows = [json.loads(line) for line in dst.read_text().splitlines()]
+    assert lines == len(rows) == 12
+    assert [row["text"] for row in rows] == MESSAGES * 4
+    assert [row["label"] for row in rows] == ["fire", "medical", "police"] * 4
+
+
+def test_missing_text_column_is_an_error(tmp_path, bundle):
+    src = tmp_path / "in.csv"
+    src.write_text("id,body\n1,fire\n")
+    with pytest.raises(ValueError, match="no 'text' column"):
+        triage(str(src), str(tmp_path / "out.csv"), workers=1, bundle_path=bundle)
+
+
+@pytest.mark.parametrize("output, extra, message", [
+    ("out.xlsx", [], "output must be .csv or .jsonl"),
+    ("out.csv", ["--model", "missing.bundle"], "--model missing.bundle: no such file"),
+])
+def test_cli_rejects_bad_arguments(tmp_path, output, extra, message):
+    (tmp_path / "in.txt").write_text("fire\n")
+    result = subprocess.run([sys.executable, os.path.join(ROOT, "triage.py"), "in.txt", output, *extra],
+                            capture_output=True, text=True, cwd=tmp_path)
+    assert result.returncode == 2
+    assert message in result.stderr
+    assert not (tmp_path / output).exists()
+
+
+def test_bounded_imap_keeps_order_and_limits_work_in_flight():
+    consumed = []
+
+    def items():
+        for i in range(20):
+            consumed.append(i)
+            yield i
+
+    with ThreadPool(4) as pool:
+        results = bounded_imap(pool, lambda x: x * x, items(), window=3)
+        assert next(results) == 0
+        assert len(consumed) == 3  # only the window has been read from the input
+        assert list(results) == [i * i for i in range(1, 20)]
+
+
+def test_chunked():
+    assert list(chunked(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(chunked([], 3)) == []
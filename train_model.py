@@ -1,6 +1,31 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-import joblib
+"""
+Train the emergency classifier and write emergency_model.bundle.
+
+    python train_model.py                                   # built-in examples
+    python train_model.py calls.jsonl archive.csv.gz --workers 8
+
+Corpora are streamed in chunks, so memory stays flat however large they are.
+JSONL rows are objects with "text" and "label" keys; CSV files need text and
+label columns (both names are configurable). Features come from a stateless
+HashingVectorizer, so worker processes vectorize chunks in parallel without
+sharing a vocabulary, and the main process folds each chunk into
+MultinomialNB.partial_fit.
+
+With no corpora the built-in examples are fit in one go with TfidfVectorizer,
+as before: on 13 short texts the IDF weighting matters and nothing needs
+streaming. Pass --hashing to train them the streamed way instead.
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import time
+from itertools import chain
+
+from model_bundle import write_bundle
+from parallel import bounded_imap
+from rules import model_class
 
 texts = [
     "My house is on fire",
@@ -26,16 +51,170 @@ labels = [
     "police"
 ]
 
-# Vectorize the text data
-vectorizer = TfidfVectorizer()
-X = vectorizer.fit_transform(texts)
+CLASSES = ("fire", "medical", "police")
+N_FEATURES = 2 ** 18
+CHUNK_SIZE = 10_000
+BUNDLE_PATH = "emergency_model.bundle"
+
+
+def make_vectorizer(n_features=N_FEATURES):
+    from sklearn.feature_extraction.text import HashingVectorizer
+    # alternate_sign=False keeps features non-negative, as MultinomialNB needs
+    return HashingVectorizer(n_features=n_features, alternate_sign=False, norm="l2")
+
+
+def _open(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def read_corpus(path, text_field="text", label_field="label"):
+    """
+    Yield (text, label) pairs from a .jsonl or .csv file (optionally gzipped), skipping incomplete rows.
+    Rule categories such as "violence" are read as the model class they map to.
+    """
+    name = path[:-3] if path.endswith(".gz") else path
+    with _open(path) as f:
+        if name.endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            text, label = row.get(text_field), row.get(label_field)
+            if text and label:
+                yield text, model_class(str(label).strip().lower())
+
+
+def iter_chunks(rows, size):
+    chunk_texts, chunk_labels = [], []
+    for text, label in rows:
+        chunk_texts.append(text)
+        chunk_labels.append(label)
+        if len(chunk_texts) >= size:
+            yield chunk_texts, chunk_labels
+            chunk_texts, chunk_labels = [], []
+    if chunk_texts:
+        yield chunk_texts, chunk_labels
+
+
+_worker_vectorizer = None
+
+
+def _init_worker(n_features):
+    global _worker_vectorizer
+    _worker_vectorizer = make_vectorizer(n_features)
+
+
+def _featurize(chunk):
+    chunk_texts, chunk_labels = chunk
+    return _worker_vectorizer.transform(chunk_texts), chunk_labels
+
+
+def train_builtin(classes=CLASSES):
+    """TF-IDF + MultinomialNB on the built-in examples; returns (model, vectorizer, stats)."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+
+    start = time.perf_counter()
+    known = set(classes)
+    rows = [(t, l) for t, l in zip(texts, labels) if l in known]
+    if not rows:
+        raise ValueError("No labelled documents found for classes " + ", ".join(classes))
+    vectorizer = TfidfVectorizer()
+    X = vectorizer.fit_transform([t for t, _ in rows])
+    model = MultinomialNB()
+    model.fit(X, [l for _, l in rows])
+    stats = {"documents": len(rows), "skipped": len(texts) - len(rows), "seconds": time.perf_counter() - start}
+    return model, vectorizer, stats
+
+
+def train(corpora=None, classes=CLASSES, n_features=N_FEATURES, chunk_size=CHUNK_SIZE,
+          workers=None, text_field="text", label_field="label", progress=None):
+    """
+    Stream corpora (or the built-in examples) through hashed partial_fit.
+    Returns (model, vectorizer, stats); progress(documents, seconds) is called after each chunk.
+    """
+    from sklearn.naive_bayes import MultinomialNB
+
+    if corpora:
+        rows = chain.from_iterable(read_corpus(p, text_field, label_field) for p in corpora)
+    else:
+        rows = zip(texts, labels)
+
+    known = set(classes)
+    stats = {"documents": 0, "skipped": 0, "seconds": 0.0}
+
+    def labelled(rows):
+        for text, label in rows:
+            if label in known:
+                yield text, label
+            else:
+                stats["skipped"] += 1
+
+    chunks = iter_chunks(labelled(rows), chunk_size)
+    workers = workers or os.cpu_count() or 1
+    model = MultinomialNB()
+    start = time.perf_counter()
+
+    def fit(batches):
+        for X, y in batches:
+            model.partial_fit(X, y, classes=list(classes))
+            stats["documents"] += len(y)
+            if progress:
+                progress(stats["documents"], time.perf_counter() - start)
+
+    if workers == 1 or not corpora:
+        _init_worker(n_features)
+        fit(map(_featurize, chunks))
+    else:
+        from multiprocessing import Pool
+        with Pool(workers, initializer=_init_worker, initargs=(n_features,)) as pool:
+            fit(bounded_imap(pool, _featurize, chunks, window=2 * workers))
+
+    stats["seconds"] = time.perf_counter() - start
+    if not stats["documents"]:
+        raise ValueError("No labelled documents found for classes " + ", ".join(classes))
+    return model, make_vectorizer(n_features), stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpora", nargs="*", help=".jsonl/.csv files, optionally .gz (default: built-in examples)")
+    parser.add_argument("--out", default=BUNDLE_PATH)
+    parser.add_argument("--classes", nargs="+", default=list(CLASSES))
+    parser.add_argument("--n-features", type=int, default=N_FEATURES)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="feature extraction processes (default: all cores)")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--label-field", default="label")
+    parser.add_argument("--hashing", action="store_true",
+                        help="use the streamed hashing pipeline for the built-in examples too")
+    args = parser.parse_args()
+
+    last = [0.0]
+
+    def progress(documents, seconds):
+        if seconds - last[0] >= 5:
+            last[0] = seconds
+            print(f"{documents:,} documents, {documents / seconds:,.0f} docs/s")
+
+    if args.corpora or args.hashing:
+        model, vectorizer, stats = train(
+            args.corpora, classes=args.classes, n_features=args.n_features, chunk_size=args.chunk_size,
+            workers=args.workers, text_field=args.text_field, label_field=args.label_field, progress=progress,
+        )
+    else:
+        model, vectorizer, stats = train_builtin(args.classes)
+
+    # Save the trained model and vectorizer as one versioned bundle
+    write_bundle(args.out, model, vectorizer)
 
-# Train the model
-model = MultinomialNB()
-model.fit(X, labels)
+    rate = stats["documents"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(f"Trained on {stats['documents']:,} documents ({stats['skipped']:,} skipped) "
+          f"in {stats['seconds']:.1f}s, {rate:,.0f} docs/s")
+    print("Model bundle saved successfully!")
 
-# Save the trained model and vectorizer
-joblib.dump(model, "emergency_model.pkl")
-joblib.dump(vectorizer, "vectorizer.pkl")
 
-print("Model and vectorizer saved successfully!")
+if __name__ == "__main__":
+    main()
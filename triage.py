@@ -0,0 +1,216 @@
+"""
+Re-triage archived SOS messages with the current model.
+
+    python triage.py gateway_export.csv triaged.csv
+    python triage.py messages.jsonl.gz triaged.jsonl --workers 8 --text-field body
+
+Input is .csv, .jsonl or .txt (one message per line), optionally gzipped.
+Output is .csv or .jsonl: every input field is kept and `label` and
+`confidence` are added, in input order. A CSV written from JSONL has a column
+for every field seen in any line. Lines that are not JSON objects are
+reported on stderr with their line number and skipped.
+
+The file is read in chunks and the chunks are scored in a process pool. Each
+worker maps the model bundle, so the weights are shared through the page
+cache. At most 2 x workers chunks are in flight, so memory stays flat however
+many lines the file has. Progress goes to stderr.
+
+Texts are routed by language as in the app: Hindi and Punjabi messages are
+scored by their own bundles when those exist (see utils.LANGUAGE_BUNDLE_PATTERN)
+and by --model otherwise.
+"""
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+from collections import deque
+
+from parallel import bounded_imap, chunked
+from utils import BUNDLE_PATH, classify_batch, load_emergency_model, model_for_language
+
+CHUNK_SIZE = 5_000
+OUTPUT_KINDS = ("csv", "jsonl")
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def _kind(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    return os.path.splitext(name)[1].lstrip(".").lower()
+
+
+def _json_rows(f, path, report=True):
+    """Yield the JSON object on each line of f, skipping (and reporting) the lines that are not one."""
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row, reason = None, e
+        else:
+            reason = "not a JSON object"
+        if isinstance(row, dict):
+            yield row
+        elif report:
+            print(f"{path}:{number}: skipped ({reason})", file=sys.stderr)
+
+
+def read_fields(path, text_field="text"):
+    """Input field names in first-seen order; for JSONL, the union over every line."""
+    kind = _kind(path)
+    with _open(path, "r") as f:
+        if kind == "csv":
+            return list(csv.DictReader(f).fieldnames or [])
+        if kind in ("jsonl", "json", "ndjson"):
+            fields = {}
+            for row in _json_rows(f, path, report=False):
+                fields.update(dict.fromkeys(row))
+            return list(fields)
+    return [text_field]
+
+
+def read_rows(path, text_field="text"):
+    """Yield (row, text) pairs; row is the dict written back out."""
+    kind = _kind(path)
+    with _open(path, "r") as f:
+        if kind == "csv":
+            reader = csv.DictReader(f)
+            if text_field not in (reader.fieldnames or []):
+                raise ValueError(f"{path}: no {text_field!r} column (use --text-field)")
+            for row in reader:
+                yield row, row.get(text_field) or ""
+        elif kind in ("jsonl", "json", "ndjson"):
+            for row in _json_rows(f, path):
+                yield row, str(row.get(text_field) or "")
+        else:
+            for line in f:
+                text = line.rstrip("\r\n")
+                yield {text_field: text}, text
+
+
+class RowWriter:
+    def __init__(self, path, fieldnames=None):
+        """fieldnames: the CSV header; defaults to the first row's keys."""
+        self.kind = _kind(path)
+        self.file = _open(path, "w")
+        self.fieldnames = fieldnames
+        self.csv = None
+
+    def write(self, rows):
+        if self.kind == "jsonl":
+            self.file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+            return
+        if self.csv is None:
+            self.csv = csv.DictWriter(self.file, fieldnames=self.fieldnames or list(rows[0]), extrasaction="ignore")
+            self.csv.writeheader()
+        self.csv.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+_worker_model = None
+
+
+def _init_worker(bundle_path):
+    global _worker_model
+    _worker_model = load_emergency_model(bundle_path=bundle_path)
+
+
+def _worker_model_for(language):
+    return model_for_language(language, default=_worker_model)
+
+
+def _classify(texts):
+    results = classify_batch(texts, _worker_model_for)
+    return [label for label, _ in results], [confidence for _, confidence in results]
+
+
+def triage(src, dst, workers=None, chunk_size=CHUNK_SIZE, text_field="text", bundle_path=BUNDLE_PATH, progress=None):
+    """Classify every message in src into dst; returns (lines, seconds)."""
+    if _kind(dst) not in OUTPUT_KINDS:
+        raise ValueError("output must be .csv or .jsonl (optionally .gz)")
+    workers = workers or os.cpu_count() or 1
+    chunks = chunked(read_rows(src, text_field), chunk_size)
+    # Rows stay in this process; only the texts travel to the workers
+    pending = deque()
+
+    def texts():
+        for chunk in chunks:
+            pending.append(chunk)
+            yield [text for _, text in chunk]
+
+    fieldnames = None
+    if _kind(dst) == "csv":
+        # A CSV header is written once, so it must already cover every field
+        fieldnames = [f for f in read_fields(src, text_field) if f not in ("label", "confidence")]
+        fieldnames += ["label", "confidence"]
+    writer = RowWriter(dst, fieldnames)
+    pool = None
+    lines = 0
+    start = time.perf_counter()
+    try:
+        if workers == 1:
+            _init_worker(bundle_path)
+            scored = map(_classify, texts())
+        else:
+            from multiprocessing import Pool
+            pool = Pool(workers, initializer=_init_worker, initargs=(bundle_path,))
+            scored = bounded_imap(pool, _classify, texts(), window=2 * workers)
+        for labels, confidences in scored:
+            chunk = pending.popleft()
+            out = []
+            for (row, _), label, confidence in zip(chunk, labels, confidences):
+                row = dict(row)
+                row["label"] = str(label)
+                row["confidence"] = round(float(confidence), 4)
+                out.append(row)
+            writer.write(out)
+            lines += len(out)
+            if progress:
+                progress(lines, time.perf_counter() - start)
+    finally:
+        if pool is not None:
+            pool.terminate()
+        writer.close()
+    return lines, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--model", default=None,
+                        help=f"model bundle (default: {BUNDLE_PATH}, falling back to the legacy pickles)")
+    args = parser.parse_args()
+    if _kind(args.output) not in OUTPUT_KINDS:
+        parser.error(f"{args.output}: output must be .csv or .jsonl (optionally .gz)")
+    if args.model is not None and not os.path.exists(args.model):
+        parser.error(f"--model {args.model}: no such file")
+
+    last = [0.0]
+
+    def progress(lines, seconds):
+        if seconds - last[0] >= 2:
+            last[0] = seconds
+            print(f"\r{lines:,} lines, {lines / seconds:,.0f} lines/s", end="", file=sys.stderr, flush=True)
+
+    lines, seconds = triage(args.input, args.output, args.workers, args.chunk_size, args.text_field,
+                            args.model or BUNDLE_PATH, progress)
+    rate = lines / seconds if seconds else 0.0
+    print(f"\rTriaged {lines:,} lines in {seconds:.1f}s ({rate:,.0f} lines/s) -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,77 +1,304 @@
-import joblib
-import geocoder
-import requests
+import atexit
 import os
-import smtplib
+import threading
 from dotenv import load_dotenv
-from twilio.rest import Client
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.message import EmailMessage
+from compiled_model import CompiledEmergencyModel
+from language import DEFAULT_LANGUAGE, detect_language
+
+# Heavy dependencies (joblib/numpy, requests, twilio, smtplib) are imported
+# inside the functions that use them so `import utils` stays cheap.
+
+BUNDLE_PATH = "emergency_model.bundle"
+LEGACY_MODEL_PATHS = ("emergency_model.pkl", "vectorizer.pkl")
+# Models for other languages, e.g. emergency_model.hi.bundle (see language.py)
+LANGUAGE_BUNDLE_PATTERN = os.getenv("LANGUAGE_BUNDLE_PATTERN", "emergency_model.{lang}.bundle")
+# Counts the mmapped bundles only; see model_registry.LanguageModels for what else each model holds
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "256"))
 
 load_dotenv()
 
-def load_emergency_model():
-    model = joblib.load("emergency_model.pkl")
-    vectorizer = joblib.load("vectorizer.pkl")
+def language_bundle_path(language):
+    return BUNDLE_PATH if language == DEFAULT_LANGUAGE else LANGUAGE_BUNDLE_PATTERN.format(lang=language)
+
+_convert_lock = threading.Lock()
+
+def ensure_bundle(bundle_path=BUNDLE_PATH):
+    """
+    Convert the legacy pickles to bundle_path if it doesn't exist yet.
+    Returns True when the bundle is there; online training and reloads need it.
+    """
+    with _convert_lock:
+        if os.path.exists(bundle_path):
+            return True
+        if not all(os.path.exists(path) for path in LEGACY_MODEL_PATHS):
+            return False
+        from model_bundle import convert_pickles
+        try:
+            convert_pickles(*LEGACY_MODEL_PATHS, bundle_path)
+        except OSError as e:
+            print(f"Could not write {bundle_path}, using the pickles: {e}")
+            return False
+        print(f"Converted {' and '.join(LEGACY_MODEL_PATHS)} to {bundle_path}")
+        return True
+
+def load_emergency_model(compiled=False, bundle_path=BUNDLE_PATH, language=None):
+    if language not in (None, DEFAULT_LANGUAGE):
+        # Other languages only ship as bundles; there are no legacy pickles to fall back to
+        bundle_path = language_bundle_path(language)
+        if not os.path.exists(bundle_path):
+            raise FileNotFoundError(f"No model for language {language!r} at {bundle_path}")
+    elif bundle_path == BUNDLE_PATH:
+        ensure_bundle(bundle_path)
+    if os.path.exists(bundle_path):
+        from model_bundle import read_bundle
+        # One mmapped file: shared page cache across workers, no unpickling
+        model, vectorizer = read_bundle(bundle_path)
+    else:
+        # Legacy pickles written before the bundle format existed
+        import joblib
+        model, vectorizer = (joblib.load(path) for path in LEGACY_MODEL_PATHS)
+    if compiled:
+        # Flat token -> log-weight table; detect_emergency no longer touches sklearn
+        model = CompiledEmergencyModel.from_sklearn(model, vectorizer)
     return model, vectorizer
 
-def detect_emergency(text, model, vectorizer):
+MODEL_PATHS = (BUNDLE_PATH, *LEGACY_MODEL_PATHS)
+_model_registry = None
+_model_registry_lock = threading.Lock()
+
+def get_model_registry():
+    """Shared, self-reloading (model, vectorizer) holder, started once per process."""
+    global _model_registry
+    with _model_registry_lock:
+        if _model_registry is None:
+            from model_registry import ModelRegistry
+            _model_registry = ModelRegistry(MODEL_PATHS, load_emergency_model).start()
+    return _model_registry
+
+_language_models = None
+
+def get_language_models():
+    """Non-English models, loaded on first use and LRU-evicted beyond MODEL_MEMORY_BUDGET_MB."""
+    global _language_models
+    with _model_registry_lock:
+        if _language_models is None:
+            from model_registry import LanguageModels
+            _language_models = LanguageModels(
+                language_bundle_path,
+                lambda path: load_emergency_model(bundle_path=path),
+                budget_bytes=int(MODEL_MEMORY_BUDGET_MB * 2**20),
+                poll_interval=2.0,  # pick up retrained and online-updated bundles like the main model
+            )
+    return _language_models
+
+def model_for(text):
+    return model_for_language(detect_language(text))
+
+def model_for_language(language, default=None):
+    """
+    (model, vectorizer) for language. English, or any language without a usable model,
+    gets default, or the main model when default is None.
+    """
+    if language != DEFAULT_LANGUAGE:
+        version = get_language_models().get(language)
+        if version is not None:
+            return version.model, version.vectorizer
+    return default if default is not None else get_model_registry().current()[:2]
+
+def model_language(text):
+    """The language whose model scores text: its own if that model loads, else English."""
+    language = detect_language(text)
+    if language != DEFAULT_LANGUAGE and get_language_models().registry(language) is None:
+        return DEFAULT_LANGUAGE
+    return language
+
+def model_registry_for(language):
+    """The ModelRegistry serving language (the main one for English or a language without a model)."""
+    registry = get_language_models().registry(language) if language != DEFAULT_LANGUAGE else None
+    return registry or get_model_registry()
+
+def detect_emergency(text, model=None, vectorizer=None):
+    """Classify text; without an explicit model, picks one by the text's language."""
+    if model is None:
+        model, vectorizer = model_for(text)
+    if isinstance(model, CompiledEmergencyModel):
+        return model.predict(text)
     X = vectorizer.transform([text])
     return model.predict(X)[0]
 
-def get_current_location():
+def detect_emergency_batch(texts, model, vectorizer):
+    """
+    Classify many messages in one vectorized pass.
+    Returns (labels, confidences) where confidence is the predict_proba of the chosen label.
+    """
+    texts = list(texts)
+    if not texts:
+        return [], []
+    if isinstance(model, CompiledEmergencyModel):
+        results = [model.predict_with_confidence(t) for t in texts]
+        return [r[0] for r in results], [r[1] for r in results]
+    X = vectorizer.transform(texts)
+    proba = model.predict_proba(X)
+    best = proba.argmax(axis=1)
+    labels = model.classes_[best].tolist()
+    confidences = proba[range(len(texts)), best].tolist()
+    return labels, confidences
+
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "2"))
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", "64"))
+_inference_scheduler = None
+_inference_scheduler_lock = threading.Lock()
+
+def classify_batch(texts, models_for=model_for_language):
+    """
+    (label, confidence) per text, each scored by the model for its language.
+    models_for(language) returns (model, vectorizer); each is asked once per batch.
+    """
+    if all(text.isascii() for text in texts):
+        # English-only batch: one call, no per-text routing
+        model, vectorizer = models_for(DEFAULT_LANGUAGE)
+        labels, confidences = detect_emergency_batch(texts, model, vectorizer)
+        return list(zip(labels, confidences))
+    groups = {}
+    for i, text in enumerate(texts):
+        groups.setdefault(detect_language(text), []).append(i)
+    results = [None] * len(texts)
+    for language, indices in groups.items():
+        model, vectorizer = models_for(language)
+        labels, confidences = detect_emergency_batch([texts[i] for i in indices], model, vectorizer)
+        for i, label, confidence in zip(indices, labels, confidences):
+            results[i] = (label, confidence)
+    return results
+
+def get_inference_scheduler():
+    """
+    Shared micro-batcher over the registry's current model.
+    get_inference_scheduler()(text) returns (label, confidence); .submit(text) returns a Future.
+    """
+    global _inference_scheduler
+    with _inference_scheduler_lock:
+        if _inference_scheduler is None:
+            from batching import InferenceScheduler
+            _inference_scheduler = InferenceScheduler(
+                classify_batch,
+                max_wait_ms=INFERENCE_MAX_WAIT_MS,
+                max_batch=INFERENCE_MAX_BATCH,
+            ).start()
+    return _inference_scheduler
+
+_cascade = None
+_cascade_lock = threading.Lock()
+
+def get_cascade():
+    """Keyword rules in front of the micro-batched model; get_cascade()(text) -> (label, confidence, stage)."""
+    global _cascade
+    with _cascade_lock:
+        if _cascade is None:
+            from rules import Cascade
+            _cascade = Cascade(lambda text: get_inference_scheduler()(text))
+    return _cascade
+
+_location_provider = None
+_location_provider_lock = threading.Lock()
+
+def get_current_location(client_ip=None):
+    """Locate client_ip (or this server when None) via the pooled, cached provider chain."""
+    global _location_provider
+    with _location_provider_lock:
+        if _location_provider is None:
+            from location import LocationProvider
+            _location_provider = LocationProvider()
+    return _location_provider.locate(client_ip)
+
+_messaging_client = None
+_messaging_client_lock = threading.Lock()
+
+def get_messaging_client():
+    """Shared Twilio client with pooled connections and a send-rate limit, created on first use."""
+    global _messaging_client
+    with _messaging_client_lock:  # alert-queue workers may all ask for it at once
+        if _messaging_client is None:
+            from messaging import TwilioMessagingClient, TWILIO_API_URL
+            _messaging_client = TwilioMessagingClient(
+                os.getenv("TWILIO_SID"),
+                os.getenv("TWILIO_AUTH"),
+                os.getenv("TWILIO_WHATSAPP_FROM"),
+                base_url=os.getenv("TWILIO_API_URL", TWILIO_API_URL),
+                rate=float(os.getenv("TWILIO_RATE_PER_SEC", "1")),
+                burst=float(os.getenv("TWILIO_BURST", "5")),
+            )
+    return _messaging_client
+
+def whatsapp_recipients(to=None):
+    """to, or the comma-separated WHATSAPP_TO numbers, as a list."""
+    recipients = to or os.getenv("WHATSAPP_TO") or []
+    if isinstance(recipients, str):
+        recipients = [r.strip() for r in recipients.split(",") if r.strip()]
+    return list(recipients)
+
+def send_whatsapp_many(message, to=None, timeout=None):
+    """
+    Send to every number in to (default WHATSAPP_TO) within timeout seconds; returns the numbers that failed.
+    Raises ValueError when there is nobody to send to.
+    """
+    recipients = whatsapp_recipients(to)
+    if not recipients:
+        raise ValueError("Missing WhatsApp recipient (set WHATSAPP_TO)")
     try:
-        response = requests.get("http://ip-api.com/json/")
-        data = response.json()
-        lat = data["lat"]
-        lon = data["lon"]
-        city = data["city"]
-        return lat, lon, city
+        from messaging import failed_recipients
+        results = get_messaging_client().send_many(recipients, message, timeout=timeout)
     except Exception as e:
-        print("Error getting location:", e)
-        return None, None, None
+        print("WhatsApp error:", e)
+        return recipients
+    failed = failed_recipients(results)
+    for recipient in failed:
+        print(f"WhatsApp error for {recipient}:", results[recipient])
+    print("WhatsApp messages sent:", [sid for sid in results.values() if not isinstance(sid, Exception)])
+    return failed
 
 # Send WhatsApp using Twilio sandbox
-def send_whatsapp(message):
+def send_whatsapp(message, to=None, timeout=None):
+    """Send to one number or a list of numbers (default WHATSAPP_TO); True only if every send succeeded."""
     try:
-        client = Client(os.getenv("TWILIO_SID"), os.getenv("TWILIO_AUTH"))
-        msg = client.messages.create(
-            from_=os.getenv("TWILIO_WHATSAPP_FROM"),
-            body=message,
-            to=os.getenv("WHATSAPP_TO")
-        )
-        print("WhatsApp message sent:", msg.sid)
-        return True
-    except Exception as e:
+        return not send_whatsapp_many(message, to, timeout)
+    except ValueError as e:
         print("WhatsApp error:", e)
         return False
 
-def send_email(subject, body, to_email=None):
+_smtp_pool = None
+_smtp_pool_lock = threading.Lock()
+
+def get_smtp_pool():
+    """Shared pool of logged-in Gmail sessions, created on first use."""
+    global _smtp_pool
+    with _smtp_pool_lock:  # a second pool would leak its sessions
+        if _smtp_pool is None:
+            from smtp_pool import SMTPPool
+            sender = os.getenv("EMAIL_SENDER")
+            app_password = os.getenv("GMAIL_APP_PASSWORD")
+            if not sender or not app_password:
+                raise ValueError("Missing email credentials")
+            _smtp_pool = SMTPPool(
+                os.getenv("SMTP_HOST", "smtp.gmail.com"),
+                int(os.getenv("SMTP_PORT", "587")),
+                sender,
+                app_password,
+                debug=os.getenv("SMTP_DEBUG") == "1",  # protocol trace on stdout
+            )
+    return _smtp_pool
+
+def send_email(subject, body, to_email=None, timeout=None):
+    """Email one recipient or a list of recipients over a pooled SMTP session, within timeout seconds if given."""
     try:
-        sender = os.getenv("EMAIL_SENDER")
-        app_password = os.getenv("GMAIL_APP_PASSWORD")
         receiver = to_email or os.getenv("EMAIL_RECEIVER")
 
         # Validate credentials
-        if not sender or not app_password or not receiver:
+        if not receiver:
             raise ValueError("Missing email credentials or recipient address")
-        
-        msg = MIMEMultipart()
-        #msg = EmailMessage()
-        msg["Subject"] = subject
-        msg["From"] = sender
-        msg["To"] = receiver
-        msg.attach(MIMEText(body, "plain"))
-
-        # Connect and send the email
-        server = smtplib.SMTP("smtp.gmail.com", 587)
-        server.set_debuglevel(1)  # For detailed debugging, you can remove this in production
-        server.starttls()
-        server.login(sender, app_password)
-        server.sendmail(sender, receiver, msg.as_string())
-        server.quit()
+
+        refused = get_smtp_pool().send_alert(subject, body, receiver, timeout=timeout)
+        if refused:
+            print(f"⚠️ Some recipients were refused: {', '.join(refused)}")
 
         print("✅ Email sent successfully.")
         return True
@@ -80,66 +307,179 @@ def send_email(subject, body, to_email=None):
         print(f"❌ Email sending failed: {e}")
         return False
 
-#def find_nearby(lat, lon, place_type="hospital"):
+CONTACTS_PATH = os.getenv("CONTACTS_PATH", "contacts.csv")
+CONTACTS_RADIUS_KM = float(os.getenv("CONTACTS_RADIUS_KM", "2"))
+_contact_directory = None
+_contact_directory_lock = threading.Lock()
+
+def get_contact_directory():
+    global _contact_directory
+    with _contact_directory_lock:
+        if _contact_directory is None:
+            from contacts import ContactDirectory
+            _contact_directory = ContactDirectory.from_csv(CONTACTS_PATH) if os.path.exists(CONTACTS_PATH) else ContactDirectory()
+    return _contact_directory
+
+def notify_contacts(subject, body, lat=None, lon=None, radius_km=None, zones=None, roles=None, key=None):
+    """
+    Queue an alert to every registered contact matching the geofence/zones/roles on all
+    their channels. Returns (key, {channel: [alert_id, ...]}); poll get_alert_queue().group_status(key).
+    The same key (default: derived from the whole request) never queues a contact twice.
+    """
+    from alert_queue import idempotency_key
+    from contacts import FanOut
+    key = key or idempotency_key("contacts", [subject, body, lat, lon, radius_km, zones, roles])
+    recipients = get_contact_directory().select(lat, lon, radius_km, zones=zones, roles=roles)
+    return key, FanOut(get_alert_queue()).enqueue(subject, body, recipients, key)
+
+ALERT_QUEUE_PATH = os.getenv("ALERT_QUEUE_PATH", "alerts.sqlite3")
+_alert_queue = None
+_alert_queue_lock = threading.Lock()
+
+def get_alert_queue():
+    """Durable email/WhatsApp outbox with its delivery workers, started once per process."""
+    global _alert_queue
+    with _alert_queue_lock:
+        if _alert_queue is None:
+            from alert_queue import AlertQueue
+            _alert_queue = AlertQueue(
+                ALERT_QUEUE_PATH,
+                handlers={"email": send_email, "whatsapp": send_whatsapp},
+            ).start()
+            # Streamlit has no shutdown hook; let in-flight sends finish on exit
+            atexit.register(_alert_queue.stop)
+    return _alert_queue
+
+FEEDBACK_PATH = os.getenv("FEEDBACK_PATH", "feedback.sqlite3")
+_feedback_store = None
+_feedback_store_lock = threading.Lock()
+
+def get_feedback_store():
+    """Dispatcher corrections awaiting (or used by) online model updates."""
+    global _feedback_store
+    with _feedback_store_lock:
+        if _feedback_store is None:
+            from online_learning import FeedbackStore
+            _feedback_store = FeedbackStore(FEEDBACK_PATH)
+    return _feedback_store
+
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org")
+POI_CACHE_PATH = os.getenv("POI_CACHE_PATH", "poi_cache.sqlite3")
+# Ask OpenStreetMap when the local facility dataset has nothing of a type near the caller
+OSM_FALLBACK = os.getenv("OSM_FALLBACK", "1") != "0"
+_poi_cache = None
+_poi_cache_lock = threading.Lock()
+
+def find_nearby_osm(lat, lon, place_type="hospital", k=5, radius_km=None):
+    """
+    Live OpenStreetMap search, cached on disk per geotile and rate limited.
+    Results have the same keys as find_nearby's, closest first. Only the tiles
+    around the point are searched (POICache.radius_km); radius_km just filters.
+    """
+    global _poi_cache
     try:
-        query = f"{place_type} near {lat},{lon}"
-        url = f"https://nominatim.openstreetmap.org/search?format=json&q={query}&limit=5&bounded=1&viewbox={lon-0.05},{lat+0.05},{lon+0.05},{lat-0.05}"
-        headers = {"User-Agent": "EmergencyApp/1.0"}
-        response = requests.get(url, headers=headers)
-        return response.json()
+        with _poi_cache_lock:
+            if _poi_cache is None:
+                from poi_cache import POICache
+                _poi_cache = POICache(POI_CACHE_PATH, base_url=NOMINATIM_URL)
+        found = _poi_cache.lookup(lat, lon, place_type.replace("_", " "), prefetch=True)
     except Exception as e:
         print(f"Error finding nearby {place_type}: {e}")
         return []
-
-def find_nearby(lat, lon, place_type="hospital"):
-    # Static demo data 
-    hospitals = [
-        {
-            "display_name": "EMC Super Speciality Hospital, Amritsar",
-            "contact:phone": "+91 180 2571222",
-            "lat": "31.6203",
-            "lon": "74.8765"
-        },
-        {
-            "display_name": "PULSE Hospital, Amritsar",
-            "contact:phone": "+91 180 2640022",
-            "lat": "31.6200",
-            "lon": "74.8760"
-        },
+    return [
         {
-            "display_name": "Fortis Escorts Hospital, Amritsar",
-            "contact:phone": "+91 7527000036",
-            "lat": "31.6400",
-            "lon": "74.8770"
-        },
-        {
-            "display_name": "Amandeep Medicity Hospital, Amritsar",
-            "contact:phone": "+91 8288082870",
-            "lat": "31.64123",
-            "lon": "74.87735"
+            "display_name": r.get("display_name") or "Unknown",
+            "contact:phone": r.get("contact:phone") or "N/A",
+            "lat": float(r["lat"]),
+            "lon": float(r["lon"]),
+            "address": r.get("address") if isinstance(r.get("address"), str) else "",
+            "distance_km": round(r["distance_km"], 2),
         }
-    ]
+        for r in found
+        if radius_km is None or r["distance_km"] <= radius_km
+    ][:k]
 
-    police_stations = [
-        {
-            "display_name": "A Division Police Station (Rambagh / Kotwali area)",
-            "contact:phone": "+91 9781130201",
-            "lat": "31.6358",
-            "lon": "74.88038"
-        },
-        {
-            "display_name": "B Division Police Station (Sultanwind Gate area)",
-            "contact:phone": "+91 9781130202",
-            "lat": "31.6357",
-            "lon": "74.88030"
-        },
-        {
-            "display_name": "C Division Police Station (Gilwali Gate / Maqboolpura)",
-            "contact:phone": "+91 9781130203",
-            "lat": "31.6360",
-            "lon": "74.88040"
-        }
-    ]
+# Static demo data, used when no facility dataset is configured
+DEMO_HOSPITALS = [
+    {
+        "display_name": "EMC Super Speciality Hospital, Amritsar",
+        "contact:phone": "+91 180 2571222",
+        "lat": "31.6203",
+        "lon": "74.8765"
+    },
+    {
+        "display_name": "PULSE Hospital, Amritsar",
+        "contact:phone": "+91 180 2640022",
+        "lat": "31.6200",
+        "lon": "74.8760"
+    },
+    {
+        "display_name": "Fortis Escorts Hospital, Amritsar",
+        "contact:phone": "+91 7527000036",
+        "lat": "31.6400",
+        "lon": "74.8770"
+    },
+    {
+        "display_name": "Amandeep Medicity Hospital, Amritsar",
+        "contact:phone": "+91 8288082870",
+        "lat": "31.64123",
+        "lon": "74.87735"
+    }
+]
+
+DEMO_POLICE_STATIONS = [
+    {
+        "display_name": "A Division Police Station (Rambagh / Kotwali area)",
+        "contact:phone": "+91 9781130201",
+        "lat": "31.6358",
+        "lon": "74.88038"
+    },
+    {
+        "display_name": "B Division Police Station (Sultanwind Gate area)",
+        "contact:phone": "+91 9781130202",
+        "lat": "31.6357",
+        "lon": "74.88030"
+    },
+    {
+        "display_name": "C Division Police Station (Gilwali Gate / Maqboolpura)",
+        "contact:phone": "+91 9781130203",
+        "lat": "31.6360",
+        "lon": "74.88040"
+    }
+]
+
+FACILITIES_PATH = os.getenv("FACILITIES_PATH", "facilities.csv")
+_facility_index = None
+_facility_index_lock = threading.Lock()
+
+def get_facility_index():
+    """Build the spatial index once per process from FACILITIES_PATH, or the demo data."""
+    global _facility_index
+    with _facility_index_lock:
+        if _facility_index is None:
+            from facilities import FacilityIndex, load_facilities
+            if os.path.exists(FACILITIES_PATH):
+                records = load_facilities(FACILITIES_PATH)
+            else:
+                records = [
+                    {"type": place_type, "name": f["display_name"], "phone": f["contact:phone"], "lat": f["lat"], "lon": f["lon"]}
+                    for place_type, group in (("hospital", DEMO_HOSPITALS), ("police", DEMO_POLICE_STATIONS))
+                    for f in group
+                ]
+            _facility_index = FacilityIndex(records)
+    return _facility_index
+
+def find_nearby(lat, lon, place_type="hospital", k=5, radius_km=None):
+    """
+    Return the k nearest facilities of place_type, closest first, each with distance_km.
+    When the local dataset has none, OpenStreetMap is searched instead (unless OSM_FALLBACK=0).
+    """
+    results = get_facility_index().nearest(lat, lon, place_type, k=k, radius_km=radius_km)
+    if results or not OSM_FALLBACK:
+        return results
+    return find_nearby_osm(lat, lon, place_type, k=k, radius_km=radius_km)
 
-    return hospitals if place_type == "hospital" else police_stations
+def find_within(lat, lon, place_type="hospital", radius_km=10.0):
+    """Return every facility of place_type within radius_km, closest first."""
+    return get_facility_index().within(lat, lon, place_type, radius_km=radius_km)
 